@@ -1,5 +1,9 @@
 from ._version import __version__
 from .data import Source
+from . import bulk
+from . import cache
+from . import checkpoint
+from . import lut_cache
 from . import defs
 from .import datasets
 from .defs import TableType
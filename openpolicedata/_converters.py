@@ -5,10 +5,12 @@ import pandas as pd
 
 try:
     from . import defs
+    from . import lut_cache
     from . import utils
     from._preproc_utils import MultType
 except:
     import defs
+    import lut_cache
     from _preproc_utils import MultType
     import utils
 
@@ -34,6 +36,9 @@ def convert(converter, col, source_name="", state=None, cats=None, std_map=None,
     if no_id not in ["keep", "null", "error","test"]:
         raise ValueError(f"no_id is {no_id}. It should be 'keep', 'null', or 'error'.")
     
+    # Reuse standardized values of raw values that have already been converted
+    converter = lut_cache.memoize(converter)
+
     is_boolean_cols = False
     if len(col.shape)==2: # More than 1 column was passed in
         is_boolean_cols = (col.isnull() | col.isin(['True','False','true','false', True, False,'Yes','No'])).all().all()
@@ -0,0 +1,172 @@
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import os
+import pandas as pd
+from tqdm import tqdm
+from typing import Callable, Iterator, Literal
+
+from .data import Source, Table
+from .data_loaders.data_loader import RetryPolicy, _get_host, _throttle_host
+from . import log
+
+logger = log.get_logger()
+
+# Default policy for retrying a dataset's load after a transient error (i.e. the server responds that too many requests 
+# have been made) that persisted after the retries of individual requests
+default_retry_policy = RetryPolicy(max_attempts=4, backoff=10.0, max_backoff=120.0)
+
+
+def load_iter(datasets: pd.DataFrame,
+              max_workers: int = 4,
+              max_loads_per_host: int = 1,
+              errors: Literal['raise','return'] = 'raise',
+              retry_policy: RetryPolicy | None = None,
+              **kwargs
+              ) -> Iterator[tuple]:
+    '''Generator that loads multiple datasets in parallel. Tables are generated in the order that loads complete
+    so that slow datasets do not hold up datasets from other hosts.
+
+    Parameters
+    ----------
+    datasets : pd.DataFrame
+        Rows of the datasets table (or the result of openpolicedata.datasets.query) to load
+    max_workers : int, optional
+        Number of datasets to load simultaneously, by default 4
+    max_loads_per_host : int, optional
+        Maximum number of datasets to load simultaneously from a single host. Successive loads from a host are
+        additionally separated by data_loaders.data_loader.min_request_interval seconds. By default 1
+    errors : 'raise' | 'return', optional
+        If 'raise', the first error stops all remaining loads and is raised. If 'return', the error is generated in
+        place of the Table and the remaining datasets are loaded. By default 'raise'
+    retry_policy : RetryPolicy | None, optional
+        Policy for retrying a dataset's load after a transient error. By default, loads are attempted up to 4 times
+        with exponential backoff starting at 10 seconds (default_retry_policy)
+
+    **kwargs are passed to Source.load (i.e. nrows, format_date, columns)
+
+    Returns
+    -------
+    Generator of tuples
+        generates (index, Table) for each row of datasets where index is the row's index in datasets. If errors='return',
+        Table is replaced by the error if the load failed.
+    '''
+
+    if errors not in ['raise','return']:
+        raise ValueError(f"Unknown errors value {errors}. Allowable values: 'raise' and 'return'")
+    retry_policy = retry_policy if retry_policy else default_retry_policy
+    if 'pbar' not in kwargs:
+        # Progress bars of simultaneous loads would overlap
+        kwargs['pbar'] = False
+
+    # Datasets waiting to be loaded from each host
+    queues = {}
+    for idx, row in datasets.iterrows():
+        queues.setdefault(_get_host(row['URL']), deque()).append((idx, row))
+
+    active = {}
+    running = {host:0 for host in queues}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def submit():
+            # Start the next dataset of each host that is below its limit of simultaneous loads
+            for host, queue in queues.items():
+                while len(queue)>0 and running[host]<max_loads_per_host and len(active)<max_workers:
+                    idx, row = queue.popleft()
+                    running[host]+=1
+                    active[executor.submit(_load_row, row, retry_policy, kwargs)] = (idx, host)
+
+        submit()
+        try:
+            while len(active)>0:
+                done, _ = wait(active, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx, host = active.pop(future)
+                    running[host]-=1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if errors=='raise':
+                            raise
+                        logger.debug(f"Loading dataset {idx} failed: {e}")
+                        result = e
+
+                    submit()
+                    yield idx, result
+        finally:
+            for future in active:
+                future.cancel()
+
+
+def load(datasets: pd.DataFrame,
+         output_dir: str | None = None,
+         callback: Callable[[object, Table], None] | None = None,
+         max_workers: int = 4,
+         max_loads_per_host: int = 1,
+         errors: Literal['raise','return'] = 'raise',
+         pbar: bool = True,
+         mixed: bool = False,
+         **kwargs
+         ) -> dict:
+    '''Load multiple datasets in parallel. See load_iter to receive tables as they are loaded.
+
+    Parameters
+    ----------
+    datasets : pd.DataFrame
+        Rows of the datasets table (or the result of openpolicedata.datasets.query) to load
+    output_dir : str | None, optional
+        If set, each table is saved to a parquet file in this directory as soon as it is loaded
+        instead of being kept in memory, by default None
+    callback : Callable | None, optional
+        If set, callback(index, table) is called for each table as soon as it is loaded (and saved if output_dir 
+        is set) where index is the row's index in datasets. Tables are not kept in memory, by default None
+    max_workers : int, optional
+        Number of datasets to load simultaneously, by default 4
+    max_loads_per_host : int, optional
+        Maximum number of datasets to load simultaneously from a single host, by default 1
+    errors : 'raise' | 'return', optional
+        If 'raise', the first error stops all remaining loads and is raised. If 'return', the error is returned in
+        place of the result and the remaining datasets are loaded. By default 'raise'
+    pbar : bool, optional
+        If True, a progress bar of the number of datasets loaded is displayed, by default True
+    mixed : bool, optional
+        Passed to Table.to_parquet if output_dir is set. By default False
+
+    **kwargs are passed to load_iter
+
+    Returns
+    -------
+    dict
+        Dictionary with keys equal to the indices of datasets. Values are the result of callback if callback is set,
+        parquet filenames if only output_dir is set, and Table objects otherwise (or the error if the load failed and errors='return')
+    '''
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    results = {}
+    iter = load_iter(datasets, max_workers=max_workers, max_loads_per_host=max_loads_per_host, errors=errors, **kwargs)
+    if pbar:
+        iter = tqdm(iter, total=len(datasets), desc="Loading datasets")
+    for idx, table in iter:
+        if isinstance(table, Exception):
+            results[idx] = table
+            continue
+
+        results[idx] = table
+        if output_dir:
+            results[idx] = table.to_parquet(output_dir, mixed=mixed)
+        if callback:
+            results[idx] = callback(idx, table)
+
+    return results
+
+
+def _load_row(row, retry_policy, kwargs):
+    src = Source(row['SourceName'], state=row['State'], agency=row['Agency'])
+    id = row['dataset_id'] if 'dataset_id' in row and (isinstance(row['dataset_id'], list) or pd.notnull(row['dataset_id'])) else None
+
+    def load():
+        _throttle_host(row['URL'])
+        return src.load(row['TableType'], row['Year'], url=row['URL'], id=id, **kwargs)
+
+    return retry_policy.call(load)
@@ -0,0 +1,322 @@
+from __future__ import annotations
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import pandas as pd
+
+from . import log
+
+logger = log.get_logger()
+
+# Default location of the cache of responses from data requests
+default_directory = os.path.join(os.path.expanduser("~"), ".openpolicedata", "cache")
+# Default number of seconds that a cached response is valid for (1 day)
+default_ttl = 24*60*60
+# Default maximum size of the cache in bytes (1 GB). Least recently used responses are removed when the size is exceeded
+default_max_size = 2**30
+
+_ext = ".json.gz"
+
+_directory = None
+_ttl = default_ttl
+_max_size = default_max_size
+_lock = threading.Lock()
+
+
+def enable(directory: str | None = None,
+           ttl: int | float | None = default_ttl,
+           max_size: int | None = default_max_size
+           ) -> None:
+    '''Enable caching of responses from data requests to disk. Once enabled, responses from REST APIs
+    (ArcGIS, Carto, CKAN, Opendatasoft, and Socrata) are stored locally and repeated requests with the
+    same URL and parameters are read from disk instead of being requested from the server.
+
+    Parameters
+    ----------
+    directory : str | None, optional
+        Directory where responses are stored, by default ~/.openpolicedata/cache
+    ttl : int | float | None, optional
+        Number of seconds that a cached response is valid for. None indicates that responses do not expire. By default 1 day
+    max_size : int | None, optional
+        Maximum size of the cache in bytes. When exceeded, the least recently used responses are removed.
+        None indicates no limit. By default 1 GB
+    '''
+    global _directory, _ttl, _max_size
+    directory = directory if directory else default_directory
+    os.makedirs(directory, exist_ok=True)
+    logger.debug(f"Enabling cache of data requests in {directory}")
+    _directory = directory
+    _ttl = ttl
+    _max_size = max_size
+
+
+def disable() -> None:
+    '''Disable caching of responses from data requests. Previously cached responses are not deleted.
+    '''
+    global _directory
+    _directory = None
+
+
+def is_enabled() -> bool:
+    '''Returns whether caching of responses from data requests is enabled
+
+    Returns
+    -------
+    bool
+        True if cache is enabled
+    '''
+    return _directory is not None
+
+
+def _get_key(url, params):
+    # Content address of a request. Parameters that are None are not sent by requests so they are ignored.
+    params = {} if params is None else {str(k):v for k,v in params.items() if v is not None}
+    key_str = json.dumps([url, params], sort_keys=True, default=str)
+    return hashlib.sha256(key_str.encode("utf-8")).hexdigest(), params
+
+
+def _get_filename(key):
+    return os.path.join(_directory, key + _ext)
+
+
+def _is_expired(created, now=None):
+    now = now if now else time.time()
+    return _ttl is not None and now - created > _ttl
+
+
+def get(url: str, params: dict | None = None) -> bytes | None:
+    '''Get cached response content for a request
+
+    Parameters
+    ----------
+    url : str
+        Request URL
+    params : dict | None, optional
+        Request parameters
+
+    Returns
+    -------
+    bytes | None
+        Content of cached response. None if the cache is disabled or no valid response is cached.
+    '''
+    if not is_enabled():
+        return None
+
+    key, _ = _get_key(url, params)
+    filename = _get_filename(key)
+    try:
+        stats = os.stat(filename)
+        if _is_expired(stats.st_mtime):
+            logger.debug(f"Cached response for {url} has expired")
+            return None
+        with gzip.open(filename, "rb") as f:
+            # First line contains the request information
+            _, content = f.read().split(b"\n", 1)
+        # Access time is used to track least recently used responses. Modification time is the time the response was stored.
+        os.utime(filename, (time.time(), stats.st_mtime))
+    except (FileNotFoundError, OSError, ValueError, EOFError):
+        return None
+
+    logger.debug(f"Loading response for request to {url} from cache")
+    return content
+
+
+def put(url: str, params: dict | None, content: bytes) -> None:
+    '''Store response content for a request in the cache. Does nothing if the cache is disabled.
+
+    Parameters
+    ----------
+    url : str
+        Request URL
+    params : dict | None
+        Request parameters
+    content : bytes
+        Response content
+    '''
+    if not is_enabled():
+        return
+
+    key, params = _get_key(url, params)
+    header = json.dumps({"url":url, "params":params}, default=str).encode("utf-8")
+    directory = _directory
+    fd, tmp_file = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                gz.write(header + b"\n" + content)
+        os.replace(tmp_file, _get_filename(key))
+    except:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+    _evict()
+
+
+def get_json(url: str, params: dict | None = None):
+    '''Get cached JSON response for a request
+
+    Parameters
+    ----------
+    url : str
+        Request URL
+    params : dict | None, optional
+        Request parameters
+
+    Returns
+    -------
+    Decoded JSON or None if no valid response is cached
+    '''
+    content = get(url, params)
+    return json.loads(content) if content is not None else None
+
+
+def put_json(url: str, params: dict | None, result) -> None:
+    '''Store decoded JSON response for a request in the cache
+
+    Parameters
+    ----------
+    url : str
+        Request URL
+    params : dict | None
+        Request parameters
+    result :
+        Decoded JSON response
+    '''
+    if is_enabled():
+        put(url, params, json.dumps(result).encode("utf-8"))
+
+
+def _entries():
+    if not is_enabled():
+        return []
+    entries = []
+    with os.scandir(_directory) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(_ext):
+                try:
+                    entries.append((entry.path, entry.stat()))
+                except FileNotFoundError:
+                    # Removed by another thread
+                    pass
+    return entries
+
+
+def _evict():
+    if _max_size is None:
+        return
+
+    with _lock:
+        entries = _entries()
+        total = sum(x[1].st_size for x in entries)
+        if total <= _max_size:
+            return
+
+        # Remove least recently used first
+        entries.sort(key=lambda x: x[1].st_atime)
+        for filename, stats in entries:
+            logger.debug(f"Removing {filename} from cache to reduce cache size")
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+            total -= stats.st_size
+            if total <= _max_size:
+                break
+
+
+def info() -> pd.DataFrame:
+    '''Get information on responses stored in the cache
+
+    Returns
+    -------
+    pd.DataFrame
+        Table containing the URL, parameters, size in bytes, time stored, time last accessed, and whether
+        the response has expired for each cached response
+    '''
+    now = time.time()
+    rows = []
+    for filename, stats in _entries():
+        try:
+            with gzip.open(filename, "rb") as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError, EOFError):
+            continue
+        rows.append({
+            "url" : header["url"],
+            "params" : header["params"],
+            "size" : stats.st_size,
+            "created" : pd.to_datetime(stats.st_mtime, unit='s'),
+            "last_access" : pd.to_datetime(stats.st_atime, unit='s'),
+            "expired" : _is_expired(stats.st_mtime, now),
+            "filename" : filename
+        })
+
+    return pd.DataFrame(rows, columns=["url", "params", "size", "created", "last_access", "expired", "filename"])
+
+
+def purge(url: str | None = None, expired_only: bool = False) -> int:
+    '''Remove responses from the cache
+
+    Parameters
+    ----------
+    url : str | None, optional
+        If set, only responses for request URLs containing this string are removed, by default None
+    expired_only : bool, optional
+        If True, only expired responses are removed, by default False
+
+    Returns
+    -------
+    int
+        Number of responses removed
+    '''
+    if not is_enabled():
+        return 0
+
+    if url is None:
+        entries = [x[0] for x in _entries() if not expired_only or _is_expired(x[1].st_mtime)]
+    else:
+        df = info()
+        df = df[df["url"].str.contains(url, regex=False)]
+        if expired_only:
+            df = df[df["expired"]]
+        entries = df["filename"].tolist()
+
+    count = 0
+    with _lock:
+        for filename in entries:
+            try:
+                os.remove(filename)
+                count+=1
+            except FileNotFoundError:
+                pass
+
+    logger.debug(f"Removed {count} responses from cache")
+    return count
+
+
+def warm(src, table_type, dates: list | None = None, **kwargs) -> None:
+    '''Load data into the cache so that later requests for the same data are read from disk
+
+    Parameters
+    ----------
+    src : openpolicedata.Source
+        Source to load data from
+    table_type : str or TableType enum
+        Table type to load
+    dates : list | None, optional
+        List of date inputs to Source.load (i.e. years) to load. Each is loaded separately. By default None, which loads
+        the dataset(s) matching the date input of None
+    **kwargs
+        Additional keyword arguments passed to Source.load
+    '''
+    if not is_enabled():
+        raise ValueError("Cache must be enabled with enable() before warming it")
+
+    dates = dates if dates is not None else [None]
+    for date in dates:
+        src.load(table_type, date, **kwargs)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from . import log
+
+logger = log.get_logger()
+
+# Default location where pages of partially completed downloads are stored
+default_directory = os.path.join(os.path.expanduser("~"), ".openpolicedata", "checkpoints")
+
+_ext = ".json.gz"
+
+_directory = None
+
+
+def enable(directory: str | None = None) -> None:
+    '''Enable checkpointing of paged downloads (ArcGIS, Carto, CKAN, and Socrata). Once enabled, each page of data
+    is stored locally as soon as it is downloaded. If a download fails partway through, repeating the same request
+    (same dataset, date range, filters, and columns) reads the completed pages from disk and resumes from the first
+    page that was not downloaded. Pages are removed once a download completes.
+
+    Parameters
+    ----------
+    directory : str | None, optional
+        Directory where pages are stored, by default ~/.openpolicedata/checkpoints
+    '''
+    global _directory
+    directory = directory if directory else default_directory
+    os.makedirs(directory, exist_ok=True)
+    logger.debug(f"Enabling checkpoints of paged downloads in {directory}")
+    _directory = directory
+
+
+def disable() -> None:
+    '''Disable checkpointing of paged downloads. Previously stored pages are not deleted.
+    '''
+    global _directory
+    _directory = None
+
+
+def is_enabled() -> bool:
+    '''Returns whether checkpointing of paged downloads is enabled
+
+    Returns
+    -------
+    bool
+        True if checkpointing is enabled
+    '''
+    return _directory is not None
+
+
+def clear() -> None:
+    '''Remove pages of all incomplete downloads
+    '''
+    if not is_enabled():
+        return
+    with os.scandir(_directory) as it:
+        for entry in it:
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+class Spool:
+    """Pages of a single paged download. All methods do nothing if checkpointing is disabled.
+
+    Parameters
+    ----------
+    *key
+        Values identifying the download (i.e. URL, where query, order, and requested fields). Pages are only
+        shared by downloads with the same key.
+
+    Methods
+    -------
+    get(offset, count)
+        Get stored page. Returns None if not found
+    put(offset, count, result)
+        Store page
+    remove()
+        Remove all pages of download
+    """
+
+    def __init__(self, *key):
+        if is_enabled():
+            key_str = json.dumps(key, sort_keys=True, default=str)
+            self.directory = os.path.join(_directory, hashlib.sha256(key_str.encode("utf-8")).hexdigest())
+            self.key = key_str
+        else:
+            self.directory = None
+
+    def __get_filename(self, offset, count):
+        return os.path.join(self.directory, f"{offset}_{count}{_ext}")
+
+    def get(self, offset, count):
+        '''Get stored page
+
+        Parameters
+        ----------
+        offset : int
+            Record offset of page
+        count : int
+            Number of records requested for page
+
+        Returns
+        -------
+        Decoded JSON result of page request or None if the page is not stored
+        '''
+        if self.directory is None:
+            return None
+        try:
+            with gzip.open(self.__get_filename(offset, count), "rb") as f:
+                result = json.loads(f.read())
+        except (FileNotFoundError, OSError, ValueError, EOFError):
+            return None
+
+        logger.debug(f"Loading page at offset {offset} from checkpoint")
+        return result
+
+    def put(self, offset, count, result):
+        '''Store page
+
+        Parameters
+        ----------
+        offset : int
+            Record offset of page
+        count : int
+            Number of records requested for page
+        result :
+            Decoded JSON result of page request
+        '''
+        if self.directory is None:
+            return
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, "key.json"), "w") as f:
+                f.write(self.key)
+
+        # Write to temporary file first so that an interruption does not leave a partial page
+        fd, tmp_file = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                    gz.write(json.dumps(result).encode("utf-8"))
+            os.replace(tmp_file, self.__get_filename(offset, count))
+        except:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+
+    def remove(self):
+        '''Remove all pages of download
+        '''
+        if self.directory is not None and os.path.exists(self.directory):
+            logger.debug("Download complete. Removing checkpoint")
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -9,6 +9,7 @@ from dateutil.parser._parser import ParserError
 from packaging import version
 import re
 from collections.abc import Iterator
+from concurrent.futures import Executor
 import sys
 
 import pyarrow
@@ -804,6 +805,8 @@ class Source:
         Get agencies available for 1 or more datasets
     load()
         Load data from URL
+    aggregate()
+        Group records and calculate statistics for each group
     load_csv()
         Load data from a previously saved CSV file
     load_feather()
@@ -889,7 +892,7 @@ class Source:
         force - bool
             (Optional) Some data types such as CSV files require reading the whole file to filter for years. By default, an error will be thrown that indicates running load may be more efficient. For these cases, set force=True to run get_years without error.
         manual - bool
-            (Optional) If True, for datasets that contain multiple years, the years will be determined by making requests to the dataset rather than using the years stored in the dataset table. The default is False, which runs faster but may not be up-to-date.
+            (Optional) If True, for datasets that contain multiple years, the years will be determined by making requests to the dataset rather than using the years stored in the dataset table. Where supported (ArcGIS, CKAN, and Socrata datasets with date fields), years are found with a single query that groups records by year. Otherwise, the record count for each year is requested. The default is False, which runs faster but may not be up-to-date.
         datasets - pd.DataFrame
             (Optional) Only select from datasets in this dataframe instead of self.datasets. datasets should be a subset of the rows in self.datasets.
 
@@ -1069,6 +1072,63 @@ class Source:
         return self.__load(table_type, date, agency, True, pbar=False, return_count=True, force=force, verbose=verbose, 
                            url_contains=url, id=id)
     
+    def aggregate(self,
+                  table_type: str | defs.TableType,
+                  date: str | int | list[Union[int, str, pd.Timestamp]] = None,
+                  group_by: str | list[str] | None = None,
+                  metrics: str | list[str] | None = None,
+                  by_year: bool = False,
+                  agency: str | None = None,
+                  pbar: bool = False,
+                  verbose: bool | str | int = False,
+                  url: str | None = None,
+                  id: str | None = None
+                  ) -> pd.DataFrame:
+        '''Group records and calculate statistics (i.e. counts) for each group. Where supported (ArcGIS, Carto, CKAN, 
+        Opendatasoft, and Socrata data), grouping is performed by the server and only the results are downloaded. 
+        Otherwise, the data is loaded and grouped locally.
+
+        Parameters
+        ----------
+        table_type - str or TableType enum
+            Table type of requested data
+        date - int or the string opd.defs.MULTI or opd.defs.NONE or a length 2 list of start and stop year(s), date string(s), and/or timestamp(s)
+            Define timespan of data to request:
+                1. Request data for an entire year by inputting the year (i.e. 2023)
+                2. Request data from a start year or datetime to a stop year or datetime using a length 2 list (i.e. [2021, '2023-02-01'] for start of 2021 to end of 2023-02-01)
+                3. Request an entire multi-year dataset by inputting 'MULTIPLE'
+                4. Request of a dataset with no time information (i.e. officer demographics) by inputting 'NONE'
+        group_by - str | list[str] | None
+            (Optional) Column(s) in the source data to group by (i.e. ['race', 'gender']). If None, statistics are calculated for all records
+        metrics - str | list[str] | None
+            (Optional) Statistics to calculate: 'count' for the number of records or 'count', 'sum', 'min', 'max', 
+            or 'avg' applied to a column (i.e. 'avg(age)'). Default is 'count'
+        by_year - bool
+            (Optional) If True, records are also grouped by the year of the dataset's date field. Year is output to the 'year' column. Default False
+        agency - str
+            (Optional) If set, for datasets containing multiple agencies, data will
+            only be returned for this agency
+        pbar - bool
+            (Optional) Whether to show progress bar if data is loaded to be grouped locally. Default False
+        verbose : bool | str | int, optional
+            (Optional) If True, log level will be set to 'DEBUG' to print log messages. If a logging level ('WARNING', 'INFO', etc.), the log level
+            will be updated to the value of verbose. If any other string, verbose will specify the name of 
+            a file to log to with level 'DEBUG'
+        url - str | None
+            (Optional) If set, URL must contain this string. Can be used in combination with id when multiple datasets match a set of inputs.
+        id - str | None
+            (Optional) If set, dataset ID must equal this value. Can be used in combination with url when multiple datasets match a set of inputs.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame containing group_by columns (and year column if by_year is True) followed by 1 column for each metric. 
+            Metric columns are named 'count' (number of records) or '{statistic}_{column}' (i.e. 'avg_age')
+        '''
+
+        return self.__load(table_type, date, agency, True, pbar=pbar, verbose=verbose, url_contains=url, id=id,
+                           aggregate={"group_by":group_by, "metrics":metrics, "by_year":by_year})
+    
     def load_iter(self,
                 table_type: str | defs.TableType,
                 date: str | int | list[Union[int, str, pd.Timestamp]]=None,  
@@ -1081,7 +1141,8 @@ class Source:
                 verbose: bool | str | int = False,
                 format_date: bool = True,
                 url: str | None = None,
-                id: str | None = None
+                id: str | None = None,
+                columns: list[str] | None = None
                 ) -> Iterator[Table]:
         '''Get generator to load data from URL in batches
 
@@ -1106,8 +1167,8 @@ class Source:
             (Optional) Number of records to offset from first record. Default is 0 
             to return records starting from the first.
         force - bool
-            (Optional) For file-based data, an exception will be thrown unless force 
-            is true. It will be more efficient to read the entire dataset all at once
+            (Optional) Passed to get_count for data that is not file-based. File-based data 
+            is streamed in batches (CSV) or read once and then split into batches.
         verbose : bool | str | int, optional
             bool | str, optional
             (Optional) If True, log level will be set to 'DEBUG' to print log messages. If a logging level ('WARNING', 'INFO', etc.), the log level
@@ -1120,6 +1181,8 @@ class Source:
         format_date : bool, optional
             If True, known date columns (based on presence of date_field in datasets table or data type information provided by dataset owner) will be automatically formatted
             to be pandas datetimes (or pandas Period in rare cases), by default True
+        columns - list[str] | None
+            (Optional) Names of columns to load. Where possible, only these columns are requested from the source. Default is None (all columns)
 
         Returns
         -------
@@ -1127,10 +1190,8 @@ class Source:
             generates Table objects containing the requested data
         '''
 
-        count = self.get_count(table_type, date, agency, force, verbose=verbose, url=url, id=id)
-        for k in range(offset, count, nbatch):
-            yield self.__load(table_type, date, agency, True, pbar, nrows=min(nbatch, count-k), offset=k, 
-                              verbose=verbose, url_contains=url, id=id, format_date=format_date, sortby=sortby)
+        yield from self.__load(table_type, date, agency, True, pbar, force=force, offset=offset, nbatch=nbatch,
+                               verbose=verbose, url_contains=url, id=id, format_date=format_date, sortby=sortby, columns=columns)
     
     
     def load(self, 
@@ -1144,7 +1205,8 @@ class Source:
             verbose: bool | str | int = False,
             format_date: bool = True,
             url: str | None = None,
-            id: str | None = None
+            id: str | None = None,
+            columns: list[str] | None = None
             ) -> Table:
         '''Load data from URL
 
@@ -1180,6 +1242,8 @@ class Source:
         format_date : bool, optional
             If True, known date columns (based on presence of date_field in datasets table or data type information provided by dataset owner) will be automatically formatted
             to be pandas datetimes (or pandas Period in rare cases), by default True
+        columns - list[str] | None
+            (Optional) Names of columns to load. Where possible, only these columns are requested from the source. Default is None (all columns)
 
         Returns
         -------
@@ -1188,7 +1252,178 @@ class Source:
         '''
 
         return self.__load(table_type, date, agency, True, pbar, nrows=nrows, offset=offset, sortby=sortby, 
-                           verbose=verbose, url_contains=url, id=id, format_date=format_date)
+                           verbose=verbose, url_contains=url, id=id, format_date=format_date, columns=columns)
+
+
+    async def aload(self, 
+            table_type: str | defs.TableType, 
+            date: str | int | list[Union[int, str, pd.Timestamp]] = None,
+            agency: str | None = None,
+            pbar: bool = False,
+            nrows: int | None = None, 
+            offset: int = 0,
+            sortby=None,
+            verbose: bool | str | int = False,
+            format_date: bool = True,
+            url: str | None = None,
+            id: str | None = None,
+            columns: list[str] | None = None,
+            executor: Executor | None = None
+            ) -> Table:
+        '''Asynchronous version of load. Allows many datasets to be loaded concurrently from a single event loop:
+
+        >>> tables = await asyncio.gather(*[src.aload(table_type, year) for src, table_type, year in requests])
+
+        Data is requested in a worker thread. The number of simultaneous loads from a single host is limited by 
+        data_loaders.data_loader.max_requests_per_host. The total number of simultaneous loads is limited by the 
+        number of worker threads of executor.
+
+        Parameters
+        ----------
+        See load. pbar defaults to False since progress bars of concurrent loads would overlap.
+        executor - concurrent.futures.Executor
+            (Optional) Executor to run load in. Default: the event loop's default executor, which has 
+            min(32, os.cpu_count() + 4) worker threads
+
+        Returns
+        -------
+        Table
+            Table object containing the requested data
+        '''
+
+        with warnings.catch_warnings():
+            # Any warnings will be raised by load
+            warnings.simplefilter("ignore")
+            src, _ = self.__filter_for_source(table_type, date.copy() if isinstance(date, list) else date, url, id, errors=False)
+        # If a single dataset is not found, load will raise an error so simultaneous loads from the host do not need to be limited
+        host_url = src["URL"] if isinstance(src, pd.Series) else None
+
+        return await data_loaders.data_loader._run_async(host_url, self.load, table_type, date=date, agency=agency, pbar=pbar, 
+                                                         nrows=nrows, offset=offset, sortby=sortby, verbose=verbose, 
+                                                         format_date=format_date, url=url, id=id, columns=columns, executor=executor)
+
+
+    def refresh(self,
+                table_type: str | defs.TableType,
+                date: str | int | list[Union[int, str, pd.Timestamp]] = None,
+                output_dir: str | None = None,
+                since: str | int | pd.Timestamp | None = None,
+                agency: str | None = None,
+                pbar: bool = True,
+                verbose: bool | str | int = False,
+                filename: str | None = None,
+                url: str | None = None,
+                id: str | None = None,
+                save: bool = True,
+                mixed: bool = False
+                ) -> Table:
+        '''Update a table previously saved with Table.to_parquet with newer records. Only records on or after the 
+        start date (since) are requested. Saved records on or after since are replaced by the requested records.
+
+        Parameters
+        ----------
+        table_type - str or TableType enum
+            Table type of saved data
+        date - int or the string opd.defs.MULTI or opd.defs.NONE or a length 2 list of start and stop year(s), date string(s), and/or timestamp(s)
+            Timespan of saved data (date input used when the data was loaded)
+        output_dir - str
+            (Optional) Directory where parquet file is stored
+        since - str, int, pd.Timestamp, or None
+            (Optional) Start date of records to request. Records can be edited after they are first published so 
+            an earlier date can be used to also update recent records that may have changed. Default: date of the 
+            most recent saved record
+        agency - str
+            (Optional) If set, for datasets containing multiple agencies, data will
+            only be returned for this agency
+        pbar - bool
+            (Optional) Whether to show progress bar when loading data. Default True
+        verbose : bool | str | int, optional
+            (Optional) If True, log level will be set to 'DEBUG' to print log messages. If a logging level ('WARNING', 'INFO', etc.), the log level
+            will be updated to the value of verbose. If any other string, verbose will specify the name of 
+            a file to log to with level 'DEBUG'
+        filename: str, optional
+            If set, this will override the default filename based on the other inputs
+        url - str | None
+            (Optional) If set, URL must contain this string. Can be used in combination with id when multiple datasets match a set of inputs.
+        id - str | None
+            (Optional) If set, dataset ID must equal this value. Can be used in combination with url when multiple datasets match a set of inputs.
+        save - bool
+            (Optional) If True (default), the updated table is saved to the parquet file that it was loaded from
+        mixed - bool
+            (Optional) Passed to Table.to_parquet when saving. Default: False
+
+        Returns
+        -------
+        Table
+            Table object containing the saved data updated with newer records
+        '''
+
+        table = self.load_parquet(table_type, date, output_dir, agency, filename=filename, url=url, id=id)
+        if not table.date_field or table.date_field not in table.table:
+            raise ValueError(f"Table {table.get_parquet_filename()} cannot be refreshed because it does not have a date field")
+
+        dts = table.table[table.date_field]
+        is_year = pd.api.types.is_numeric_dtype(dts)
+        if not is_year and not pd.api.types.is_datetime64_any_dtype(dts):
+            raise ValueError(f"Table cannot be refreshed because the values of date field {table.date_field} are not dates or years")
+        
+        tz = None if is_year else dts.dt.tz
+        def to_timestamp(x, year_end=False):
+            # Timestamps are compared in the time zone of the saved dates
+            if isinstance(x, numbers.Number):
+                x = pd.Timestamp(f"{int(x)}-12-31") if year_end else pd.Timestamp(f"{int(x)}-01-01")
+            else:
+                x = pd.Timestamp(x)
+            if tz is None:
+                return x.tz_localize(None) if x.tz is not None else x
+            return x.tz_localize(tz) if x.tz is None else x.tz_convert(tz)
+        
+        def to_year(x):
+            return int(x) if isinstance(x, numbers.Number) else pd.Timestamp(x).year
+
+        # Requests filter by day (or year) so requested range is expanded to the start of the day (or year) of since
+        if since is None:
+            if dts.notnull().sum()==0:
+                raise ValueError("since must be provided when the saved table does not contain any dates")
+            since = dts.max()
+        since = to_year(since) if is_year else to_timestamp(since).normalize()
+
+        # Requested range should not extend past the range of the saved data
+        if isinstance(table.date, list):
+            stop = table.date[1]
+        elif isinstance(table.date, numbers.Number):
+            stop = table.date
+        elif is_year:
+            stop = max(pd.Timestamp.now().year, dts.max())
+        else:
+            stop = max(to_timestamp(pd.Timestamp.now()), dts.max())
+        if is_year:
+            stop = to_year(stop)
+            if since>stop:
+                return table
+            req_date = [since, stop]
+        else:
+            stop = to_timestamp(stop, year_end=True)
+            if since>stop:
+                return table
+            req_date = [since.strftime('%Y-%m-%d'), stop.strftime('%Y-%m-%d')]
+        since_filter = dts >= since
+
+        with log.temp_logging_change(verbose, if_verbose_true_level='DEBUG') as logger:
+            logger.debug(f"Keeping {(~since_filter).sum()} saved records and requesting records from {req_date[0]} to {req_date[1]}")
+
+        new_table = self.load(table_type, req_date, agency=agency, pbar=pbar, verbose=verbose, url=table.url, id=table._dataset_id)
+
+        with warnings.catch_warnings():
+            # Empty DataFrames will be ignored in concat
+            warnings.filterwarnings("ignore", category=FutureWarning, message=".*empty or all-NA entries.*")
+            dfs = [x for x in [table.table[~since_filter], new_table.table] if x is not None and len(x)>0]
+            table.table = pd.concat(dfs, ignore_index=True) if len(dfs)>0 else table.table.iloc[:0]
+
+        if save:
+            table.to_parquet(output_dir, filename, mixed=mixed)
+
+        return table
 
     
     def __find_datasets(self, table_type, src=None):
@@ -1344,7 +1579,8 @@ class Source:
 
 
     def __load(self, table_type, date, agency, load_table, pbar=True, return_count=False, force=False, 
-               nrows=None, offset=0, sortby=None, verbose=False, url_contains=None, id=None, format_date=True):
+               nrows=None, offset=0, sortby=None, verbose=False, url_contains=None, id=None, format_date=True, nbatch=None,
+               aggregate=None, columns=None):
         # Make copy so original isn't changed
         date = date.copy() if isinstance(date, list) else date
 
@@ -1398,9 +1634,15 @@ class Source:
 
                 if return_count:
                     return loader.get_count(date=date_filter, agency=agency, opt_filter=opt_filter, force=force)
+                elif aggregate is not None:
+                    return loader.aggregate(date=date_filter, agency=agency, opt_filter=opt_filter, pbar=pbar, **aggregate)
+                elif nbatch:
+                    batches = loader.load_iter(nbatch, date=date_filter, offset=offset, agency=agency, opt_filter=opt_filter, pbar=pbar, 
+                                               force=force, sortby=sortby, format_date=format_date, columns=columns)
+                    return self.__iter_tables(src, batches, date_field, table_year, table_agency, verbose, format_date)
                 else:
                     table = loader.load(date=date_filter, agency=agency, opt_filter=opt_filter, nrows=nrows, pbar=pbar, offset=offset, sortby=sortby, 
-                                        format_date=format_date)
+                                        format_date=format_date, columns=columns)
                     if format_date:
                         date_field = self.__fix_date_field(table, date_field, src.name)
                         table = _check_date(table, date_field)
@@ -1408,6 +1650,20 @@ class Source:
             table = None
 
         return Table(src, table, year_filter=table_year, agency=table_agency, src_obj=self)
+    
+    def __iter_tables(self, src, batches, date_field, table_year, table_agency, verbose, format_date):
+        # Wrap DataFrames generated by a loader's load_iter in Table objects. Logging level is only changed 
+        # while each batch is being loaded.
+        while True:
+            with log.temp_logging_change(verbose, if_verbose_true_level='DEBUG'):
+                table = next(batches, None)
+                if table is None:
+                    return
+                if format_date:
+                    table_date_field = self.__fix_date_field(table, date_field, src.name)
+                    table = _check_date(table, table_date_field)
+
+            yield Table(src, table, year_filter=table_year, agency=table_agency, src_obj=self)
 
     def load_csv(self, 
                 table_type: str | defs.TableType,
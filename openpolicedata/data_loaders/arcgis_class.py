@@ -1,30 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import itertools
+import json
 from math import ceil
 import numbers
+import numpy as np
 from numpy import nan
 import pandas as pd
 import re
 import requests
-from time import sleep
+import struct
 from tqdm import tqdm
 from typing import Optional
 import warnings
 
-from .data_loader import Data_Loader, str2json, _url_error_msg, get_legacy_session, _process_date, _default_limit, _use_gpd_force, _has_gpd
+from .data_loader import Data_Loader, str2json, _url_error_msg, session_pool, _process_date, _default_limit, _use_gpd_force, _has_gpd, \
+    _default_max_workers, _get_host_semaphore, count_cache, _agg_year_col, _format_aggregate, _select_columns, _get, _call_with_retry, _is_retryable, \
+    _points_from_xy, _page_to_columns, _concat_pages
 from ..datetime_parser import to_datetime
 from ..exceptions import OPD_DataUnavailableError, OPD_arcgisAuthInfoError, OPD_TooManyRequestsError
-from .. import log
+from .. import cache, checkpoint, log
+from . import arcgis_pbf
 
 if _has_gpd:
     import geopandas as gpd
-    from shapely.geometry import Point
 
 logger = log.get_logger()
 
 # Flag to indicate if ArcGIS queries should be verified against the arcgis package. Used in testing
 _verify_arcgis = False
 
+# Flag to indicate if pages of data should be requested in the PBF format (smaller than JSON) when supported by the server
+_use_pbf = True
+
+# ArcGIS field types that are stored as numbers in JSON responses (dates are milliseconds since the epoch)
+_numeric_field_types = ['esriFieldTypeOID', 'esriFieldTypeSmallInteger', 'esriFieldTypeInteger', 'esriFieldTypeBigInteger',
+                        'esriFieldTypeSingle', 'esriFieldTypeDouble', 'esriFieldTypeDate']
+
+
+def _features_to_xy(features):
+    # Extract point coordinates of a page of features in a single pass
+    x = np.full(len(features), nan)
+    y = np.full(len(features), nan)
+    missing = np.zeros(len(features), dtype=bool)
+    for k, feat in enumerate(features):
+        geom = feat.get("geometry")
+        if geom is None or "x" not in geom:
+            missing[k] = True
+        elif geom["x"]!="NaN":
+            x[k] = geom["x"]
+            y[k] = geom["y"]
+    return x, y, missing
+
 class repeat_format(object):
     def __init__(self, string):
         self.string = string
@@ -58,7 +85,7 @@ class Arcgis(Data_Loader):
 
     Methods
     -------
-    load(date=None, nrows=None, offset=0, pbar=True)
+    load(date=None, nrows=None, offset=0, pbar=True, max_workers=None, columns=None, paging=None)
         Load data for query
     get_count(date=None, where=None)
         Get number of records/rows generated by query
@@ -108,6 +135,20 @@ class Arcgis(Data_Loader):
         else:
             self.max_record_count = None
 
+        # Field information is used to determine if data can be grouped by year
+        self._fields = meta.get("fields") or []
+        self._supports_statistics = meta.get("advancedQueryCapabilities", {}).get("supportsStatistics", False)
+        self._supports_pagination = meta.get("advancedQueryCapabilities", {}).get("supportsPagination", True)
+        oid_fields = [x['name'] for x in self._fields if x.get('type')=='esriFieldTypeOID']
+        self._oid_field = meta.get("objectIdField") or (oid_fields[0] if len(oid_fields)>0 else None)
+
+        # PBF results are decoded for layers without geometry or with point geometry. Fall back to JSON if the server does 
+        # not support PBF or there are fields of a type that the decoder does not know
+        self._supports_pbf = _use_pbf and \
+            "pbf" in [x.strip().lower() for x in meta.get("supportedQueryFormats", "").split(",")] and \
+            meta.get("geometryType") in [None, "esriGeometryPoint"] and \
+            all(x.get("type") in arcgis_pbf._field_types for x in self._fields)
+
         if meta["type"]=="Feature Layer":
             self.is_table = False
         elif meta["type"]=="Table":
@@ -200,10 +241,10 @@ class Arcgis(Data_Loader):
             Record count or number of rows in data request
         '''
         
-        if self._last_count is not None and self._last_count[0]==(date,where):
+        count_key = self._count_key(date, where)
+        if (cached_count:=count_cache.get(count_key)) is not None:
             logger.debug("Request matches previous count request. Returning saved count.")
-            record_count = self._last_count[1]
-            where_query = self._last_count[2]
+            record_count, where_query = cached_count
         elif where==None:
             where_query, record_count = self.__construct_where(date)
 
@@ -230,12 +271,30 @@ class Arcgis(Data_Loader):
             except:
                 raise
 
-        self._last_count = ((date,where), record_count, where_query)
+        count_cache.put(count_key, (record_count, where_query))
 
         return record_count
 
 
-    def __request(self, where=None, return_count=False, out_fields="*", out_type="json", offset=0, count=None, sp_ref=None):
+    def __request(self, *args, **kwargs):
+        # Request retried according to the retry policy. Retries are only made here (and not by the GET request) 
+        # so that they do not multiply
+        return self.__retry(self.__request_once, *args, **kwargs)
+
+
+    def __retry(self, func, *args, **kwargs):
+        try:
+            return _call_with_retry(func, *args, **kwargs)
+        except requests.exceptions.ConnectTimeout as e:
+            raise OPD_DataUnavailableError(self.url, e.args, _url_error_msg.format(self.url))
+        except requests.HTTPError as e:
+            if len(e.args)>0 and "503 Server Error" in str(e.args[0]):
+                raise OPD_DataUnavailableError(self.url, e.args, _url_error_msg.format(self.url))
+            raise e
+
+
+    def __request_once(self, where=None, return_count=False, out_fields="*", out_type="json", offset=0, count=None, sp_ref=None, 
+                  out_statistics=None, group_by=None, return_ids=False, order_by=None):
         
         # Running with no inputs or just an out_type will return metadata only
         url = self.url + "/"
@@ -246,14 +305,26 @@ class Arcgis(Data_Loader):
             params["outFields"] = out_fields
             if return_count:
                 params["returnCountOnly"] = True
+            elif return_ids:
+                params["returnIdsOnly"] = True
+            elif out_statistics:
+                # Offset and ordering by the date field are not valid for statistics queries
+                params["outStatistics"] = json.dumps(out_statistics)
+                if group_by!=None:
+                    params["groupByFieldsForStatistics"] = group_by
+                if offset>0:
+                    params["resultOffset"] = offset
             else:
                 # Don't add offset for returning record count. The maximum value returned appears to be the maxRecordCount not the total count of records.
                 # If it's ever desired to get the record with an offset, recommend getting the record count without the offset and then subtracting the offset.
-                params["resultOffset"] = offset
+                # Offset is None when paging by ObjectID (some servers do not support resultOffset)
+                if offset!=None:
+                    params["resultOffset"] = offset
                 if sp_ref!=None:
                     params["outSR"] = sp_ref
-                if self.date_field!=None:
-                    params["orderByFields"] = self.date_field
+                order_by = order_by or self.date_field
+                if order_by!=None:
+                    params["orderByFields"] = order_by
                 
             if count!=None:
                 params["resultRecordCount"] = count
@@ -265,30 +336,44 @@ class Arcgis(Data_Loader):
         for k,v in params.items():
             logger.debug(f"\t{k} = {v}")
 
+        if (result:=cache.get_json(url, params)) is not None:
+            return result
+
         try:
-            r = requests.get(url, params=params)
+            r = _get(url, params=params, retry=False)
             r.raise_for_status()
         except requests.exceptions.SSLError as e:
             if "[SSL: UNSAFE_LEGACY_RENEGOTIATION_DISABLED] unsafe legacy renegotiation disabled" in str(e.args[0]):
-                with get_legacy_session() as session:
-                    r = session.get(url, params=params)
-                    
+                r = _get(url, session=session_pool.get_session(legacy=True), params=params, retry=False)
                 r.raise_for_status()
             elif "[SSL: CERTIFICATE_VERIFY_FAILED] certificate verify failed" in str(e.args[0]):
                 raise OPD_DataUnavailableError(self.url, e.args, _url_error_msg.format(self.url))
             else:
                 raise e
         except requests.HTTPError as e:
+            if _is_retryable(e):
+                # Retried by caller
+                raise e
             if len(e.args)>0:
                 if "503 Server Error" in e.args[0]:
                     raise OPD_DataUnavailableError(self.url, e.args, _url_error_msg.format(self.url))
 
             else: raise e
-        except requests.exceptions.ConnectTimeout as e:
-            raise OPD_DataUnavailableError(self.url, e.args, _url_error_msg.format(self.url))
         except Exception as e: 
             raise e
 
+        if out_type=="pbf" and "json" not in r.headers.get("Content-Type", ""):
+            try:
+                result = arcgis_pbf.decode(r.content)
+            except (ValueError, IndexError, struct.error) as e:
+                logger.debug(f"Unable to decode PBF result ({e}). Requesting data in JSON format.")
+                self._supports_pbf = False
+                return self.__request_once(where=where, return_count=return_count, out_fields=out_fields, offset=offset, count=count, 
+                                           sp_ref=sp_ref, out_statistics=out_statistics, group_by=group_by, return_ids=return_ids, order_by=order_by)
+
+            cache.put_json(url, params, result)
+            return result
+
         try:
             result = r.json()
         except requests.exceptions.JSONDecodeError:
@@ -302,24 +387,131 @@ class Arcgis(Data_Loader):
                 if not hasattr(v,'__len__') or len(v)>0:
                     v = v[0] if isinstance(v,list) and len(v)==1 else v
                     args += (k,v)
+            if result['error'].get('code')==429:
+                # Retried by retry policy
+                raise OPD_TooManyRequestsError(url, 'Error returned by ArcGIS query', *args, _url_error_msg.format(self.url))
             raise OPD_DataUnavailableError(url, 'Error returned by ArcGIS query', *args, _url_error_msg.format(self.url))
         
+        cache.put_json(url, params, result)
+        
         return result
 
 
-    def __construct_where(self, date=None, date_range_error=True):
+    def __year_expression(self):
+        # Expression for grouping by the year of the date field. None if years cannot be extracted with a query
+        field = [x for x in self._fields if x['name']==self.date_field]
+        if len(field)==0:
+            return None
+        elif field[0]['type']=='esriFieldTypeDate':
+            return f"EXTRACT(YEAR FROM {self.date_field})"
+        elif field[0]['type'] in ['esriFieldTypeInteger','esriFieldTypeSmallInteger','esriFieldTypeDouble'] and \
+            (self.date_field.lower()=='yr' or 'year' in self.date_field.lower()):
+            return self.date_field
+        else:
+            # Years cannot be extracted from text with a query
+            return None
+
+
+    def __query_where(self):
+        # Where query for all data
+        if self.query:
+            return " AND ".join([f"{k} = '{v}'" for k,v in self.query.items()])
+        else:
+            return "1=1"
+
+
+    def __request_statistics(self, where_query, stats, group_by):
+        # Statistics queries return at most maxRecordCount groups per request
+        features = []
+        while True:
+            result = self.__request(where=where_query, out_statistics=stats, group_by=group_by, offset=len(features))
+            features.extend(result['features'])
+            if not result.get('exceededTransferLimit') or len(result['features'])==0:
+                break
+
+        return features
+
+
+    def aggregate(self, group_by=None, metrics=None, date=None, *, by_year=False, pbar=True, **kwargs):
+        '''Group records and calculate statistics for each group using an outStatistics query. See 
+        Data_Loader.aggregate for details on inputs and outputs.
+        '''
+
+        group_by, parsed_metrics = self._check_aggregate_inputs(group_by, metrics, by_year)
+        year_expr = self.__year_expression() if by_year else None
+        if not self._supports_statistics or (by_year and year_expr is None):
+            return super().aggregate(group_by, metrics, date, by_year=by_year, pbar=pbar, **kwargs)
+        
+        if date is None:
+            where_query = self.__query_where()
+        else:
+            where_query, _ = self.__construct_where(date, return_count=False)
+            if not self.__accurate_count:
+                # Where query only filters by year for text date fields so records must be filtered after loading
+                logger.debug("Date range cannot be exactly filtered at the source. Aggregating loaded data.")
+                return super().aggregate(group_by, metrics, date, by_year=by_year, pbar=pbar, **kwargs)
+            where_query = where_query if where_query else "1=1"
+
+        oid_field = [x['name'] for x in self._fields if x['type']=='esriFieldTypeOID']
+        stats = []
+        for stat, col, name in parsed_metrics:
+            if col is None:
+                # Count of records
+                col = oid_field[0] if len(oid_field)>0 else (group_by[0] if len(group_by)>0 else self.date_field)
+            stats.append({"statisticType":stat, "onStatisticField":col, "outStatisticFieldName":name})
+
+        group_fields = group_by + ([year_expr] if by_year else [])
+        logger.debug(f"Requesting aggregated data from {self.url}")
+        features = self.__request_statistics(where_query, stats, ",".join(group_fields) if len(group_fields)>0 else None)
+
+        rows = []
+        metric_names = [x[2].lower() for x in parsed_metrics]
+        for feat in features:
+            # Field names returned by server may not match the case of the requested names
+            attributes = {k.lower():v for k,v in feat['attributes'].items()}
+            row = {k:attributes.get(k.lower()) for k in group_by}
+            row.update({x[2]:attributes.get(x[2].lower()) for x in parsed_metrics})
+            if by_year:
+                year = [v for k,v in attributes.items() if k not in metric_names and k not in [x.lower() for x in group_by]]
+                row[_agg_year_col] = year[0] if len(year)>0 else None
+            rows.append(row)
+
+        return _format_aggregate(pd.DataFrame(rows, columns=group_by+([_agg_year_col] if by_year else [])+[x[2] for x in parsed_metrics]), 
+                                 group_by, parsed_metrics, by_year)
+
+
+    def _get_years_grouped(self):
+        if not self._supports_statistics or (group_by:=self.__year_expression()) is None:
+            return None
+        
+        logger.debug(f"Requesting years in {self.url} with grouped query")
+        stats = [{"statisticType":"count", "onStatisticField":self.date_field, "outStatisticFieldName":"opd_count"}]
+        features = self.__request_statistics(self.__query_where(), stats, group_by)
+
+        years = []
+        for feat in features:
+            year = [v for k,v in feat['attributes'].items() if k.lower()!="opd_count"]
+            if len(year)==1 and year[0] is not None:
+                years.append(int(year[0]))
+        return years
+
+
+    def __construct_where(self, date=None, date_range_error=True, return_count=True):
+        # If return_count is False, the record count is only requested if necessary to determine the format of the where query
         if self.query:
             where_query = " AND ".join([f"{k} = '{v}'" for k,v in self.query.items()])
         else:
             where_query = ""
         self.__accurate_count = True
-        if self._last_count is not None and self._last_count[0]==(date,None):
-            record_count = self._last_count[1]
-            where_query = self._last_count[2]
+        count_key = self._count_key(date, None)
+        if (cached_count:=count_cache.get(count_key)) is not None:
+            record_count, where_query = cached_count
         elif self.date_field!=None and date!=None:
-            where_query, record_count = self._build_date_query(date, date_range_error)
+            where_query, record_count = self._build_date_query(date, date_range_error, return_count)
         else:
             where_query = '1=1' if len(where_query)==0 else where_query
+            if not return_count:
+                return where_query, None
             try:
                 record_count = self.__request(where=where_query, return_count=True)["count"]
                 if self.verify:
@@ -334,13 +526,13 @@ class Arcgis(Data_Loader):
             except:
                 raise
 
-        if self.__accurate_count:
+        if self.__accurate_count and record_count is not None:
             # Count may not be accurate if date ranges are allowed and the date field was a string
-            self._last_count = ((date,None), record_count, where_query)
+            count_cache.put(count_key, (record_count, where_query))
 
         return where_query, record_count
     
-    def _build_date_query(self, date, date_range_error):
+    def _build_date_query(self, date, date_range_error, return_count=True):
         # Determine format by getting some data
         data = None
         if not self._date_type:
@@ -348,18 +540,18 @@ class Arcgis(Data_Loader):
             self._date_type = data['fields'][0]['type']
 
         if self._date_type=='esriFieldTypeDate':
-            where_query, record_count = self._build_date_query_date_type(date)
+            where_query, record_count = self._build_date_query_date_type(date, return_count=return_count)
         elif self._date_type=='esriFieldTypeString':
-            where_query, record_count = self._build_date_query_string_type(date, data, date_range_error)
+            where_query, record_count = self._build_date_query_string_type(date, data, date_range_error, return_count)
         elif self._date_type in ['esriFieldTypeInteger','esriFieldTypeDouble'] and \
             (self.date_field.lower()=='yr' or 'year' in self.date_field.lower()):
-            where_query, record_count = self._build_date_query_date_type(date, is_numeric_year=True)
+            where_query, record_count = self._build_date_query_date_type(date, is_numeric_year=True, return_count=return_count)
         else:
             raise NotImplementedError(f"Unknown field {self._date_type}")
         
         return where_query, record_count
 
-    def _build_date_query_string_type(self, date, data, date_range_error):
+    def _build_date_query_string_type(self, date, data, date_range_error, return_count=True):
         if data != None:
             if len(data['features'])==0:
                 warnings.warn("No data found in dataset. Unable to determine date format in order to generate query")
@@ -409,7 +601,7 @@ class Arcgis(Data_Loader):
                 self._full_date = matches[idx].full_date
 
         if self._ineq_comp:
-            where_query, record_count = self._build_date_query_date_type(date, self._date_delim, is_date_string=True)
+            where_query, record_count = self._build_date_query_date_type(date, self._date_delim, is_date_string=True, return_count=return_count)
         else:
             date = [date] if isinstance(date, numbers.Number) else date.copy()
             for k,y in enumerate(date):
@@ -429,13 +621,13 @@ class Arcgis(Data_Loader):
                 for x in range(int(date[0])+1,int(date[1])+1):
                     where_query = f"{where_query} or " + self._date_format.format(self.date_field, x)
 
-            record_count = self.__request(where=where_query, return_count=True)["count"]
+            record_count = self.__request(where=where_query, return_count=True)["count"] if return_count else None
 
         return where_query, record_count
         
         
 
-    def _build_date_query_date_type(self, date, date_delim='-', is_numeric_year=False, is_date_string=False):
+    def _build_date_query_date_type(self, date, date_delim='-', is_numeric_year=False, is_date_string=False, return_count=True):
         # List of error messages that can occur for bad queries as we search for the right query format
         query_err_msg = ["Unable to complete operation", "Failed to execute query", "Unable to perform query", "Database error has occurred", 
                          "'where' parameter is invalid", "Parsing error",'Query with count request failed']
@@ -471,6 +663,10 @@ class Arcgis(Data_Loader):
                     # https://gis.stackexchange.com/questions/451107/arcgis-rest-api-unable-to-complete-operation-on-esrifieldtypedate-in-query
                     stop_date_tmp = stop_date.replace("T"," ")
                     where_query = f"{self.date_field} >= TIMESTAMP '{start_date}' AND  {self.date_field} < TIMESTAMP '{stop_date_tmp}'"
+
+                if not return_count and self._date_format is not None:
+                    # Query format is already known so count is not needed to check it
+                    return where_query, None
             
                 try:
                     record_count = self.__request(where=where_query, return_count=True)["count"]
@@ -501,7 +697,40 @@ class Arcgis(Data_Loader):
         return "", 0
     
     
-    def load(self, date=None, nrows=None, offset=0, *, pbar=True, format_date=True, **kwargs):
+    def __request_ids(self, where_query):
+        # Sorted ObjectIDs of all records matching query
+        ids = self.__request(where=where_query, return_ids=True)
+        return sorted(ids.get("objectIds") or [])
+    
+
+    def __request_page(self, where_query, offset, count, out_fields, spool, ids=None):
+        if (data:=spool.get(offset, count)) is not None:
+            return data
+        
+        if ids is not None:
+            # Request page by the range of its ObjectIDs. The page is independent of all other pages and 
+            # its request time does not grow with the offset.
+            page_ids = ids[offset:offset+count]
+            where_query = f"({where_query}) AND {self._oid_field} >= {page_ids[0]} AND {self._oid_field} <= {page_ids[-1]}"
+            kwargs = {"offset":None, "order_by":self._oid_field}
+        else:
+            kwargs = {"offset":offset, "count":count}
+
+        host_semaphore = _get_host_semaphore(self.url)
+        def request():
+            # Verification compares against JSON results of the arcgis package
+            out_type = "pbf" if self._supports_pbf and not self.verify else "json"
+            with host_semaphore:
+                return self.__request_once(where=where_query, out_fields=out_fields, out_type=out_type, **kwargs)
+        
+        # There may be errors due to too many requests over a short time. Retry according to the retry policy 
+        # (without holding the semaphore while waiting)
+        data = self.__retry(request)
+        spool.put(offset, count, data)
+        return data
+    
+    
+    def load(self, date=None, nrows=None, offset=0, *, pbar=True, format_date=True, max_workers=None, columns=None, paging=None, **kwargs):
         '''Download table from ArcGIS to pandas or geopandas DataFrame
         
         Parameters
@@ -519,6 +748,16 @@ class Arcgis(Data_Loader):
         format_date : bool, optional
             If True, known date columns (based on presence of date_field in datasets table or data type information provided by dataset owner) will be automatically formatted
             to be pandas datetimes (or pandas Period in rare cases), by default True
+        max_workers : int, optional
+            (Optional) Number of threads to use to request pages of data in parallel. The number of simultaneous requests to a single host is 
+            additionally limited by data_loaders.data_loader.max_requests_per_host. Default: 1 (pages are requested one at a time)
+        columns : list
+            (Optional) Names of columns to request. Geometry is still returned for spatial layers. Default is None (all columns)
+        paging : str
+            (Optional) Method of requesting pages of data. 'offset' requests pages by record offset with records sorted by date. 
+            'objectid' requests the ObjectIDs of all records first and then requests pages by ranges of ObjectIDs with records sorted
+            by ObjectID. 'objectid' is faster for large datasets on some servers. Default is 'offset' unless the server does not support
+            requesting records by offset.
             
         Returns
         -------
@@ -527,6 +766,21 @@ class Arcgis(Data_Loader):
         '''
         
         where_query, record_count = self.__construct_where(date, date_range_error=False)
+
+        if self.verify:
+            # Verification against the arcgis package requests pages by offset
+            paging = "offset"
+        elif paging==None:
+            paging = "offset" if self._supports_pagination else "objectid"
+        if paging not in ["offset", "objectid"]:
+            raise ValueError(f"Unknown paging method {paging}. Allowable values: 'offset' and 'objectid'")
+
+        ids = None
+        if paging=="objectid" and record_count>offset:
+            if self._oid_field==None:
+                raise ValueError(f"Records cannot be requested by ObjectID for {self.url}. No ObjectID field was found.")
+            ids = self.__request_ids(where_query)
+            record_count = len(ids)
         
         # Update record count for request record offset
         record_count-=offset
@@ -537,26 +791,55 @@ class Arcgis(Data_Loader):
         nrows = nrows if nrows!=None and record_count>=nrows else record_count
         batch_size = nrows if nrows < batch_size else batch_size
         num_batches = ceil(nrows / batch_size)
+
+        out_fields = "*"
+        if columns and not self.verify:
+            # Verification compares against a query of all fields from the arcgis package
+            fields = list(columns)
+            if not self.__accurate_count and self.date_field not in fields:
+                # Date field is needed to filter by date locally
+                fields.append(self.date_field)
+            out_fields = ",".join(fields)
+
+        max_workers = max_workers or _default_max_workers
+        # Verification against the arcgis package is only performed when requesting pages one at a time
+        use_threads = max_workers>1 and num_batches>2 and not self.verify
             
         pbar = pbar and num_batches>1
         if pbar:
             bar = tqdm(desc=self.url, total=nrows, leave=False) 
+
+        # Completed pages are stored if checkpointing is enabled so that a failed download can be resumed
+        spool = checkpoint.Spool(type(self).__name__, self.url, where_query, out_fields, batch_size, paging)
             
-        features = []
+        if _use_gpd_force is not None:
+            use_gpd = _use_gpd_force
+        else:
+            use_gpd = _has_gpd
+
+        # Each page is converted to a DataFrame (and arrays of coordinates) when it is received so that the
+        # decoded JSON of only 1 page is held in memory at a time
+        pages = []
+        xy = []
+        geolocation = []
+        executor = None
+        futures = None
         for batch in range(num_batches):
             bs = batch_size if batch<num_batches-1 else nrows-batch*batch_size
             try:
-                try:
-                    data = self.__request(where=where_query, offset=offset+batch*batch_size, count=bs)
-                except:
-                    if batch>0:
-                        # There may have been an error due to too many requests over a short time. Wait and try again
-                        sleep(10)
-                        data = self.__request(where=where_query, offset=offset+batch*batch_size, count=bs)
-                    else:
-                        raise
+                if futures:
+                    data = futures.pop(batch).result()
+                else:
+                    data = self.__request_page(where_query, offset+batch*batch_size, bs, out_fields, spool, ids)
+
+                if batch==0:
+                    numeric_cols = [x["name"] for x in data["fields"] if x["type"] in _numeric_field_types]
+                pages.append(_page_to_columns([x["attributes"] for x in data["features"]], numeric_cols))
+                if not self.is_table:
+                    xy.append(_features_to_xy(data["features"]))
+                    if not use_gpd:
+                        geolocation.extend([x["geometry"] if "geometry" in x else None for x in data["features"]])
 
-                features.extend(data["features"])
                 if self.verify:
                     layer_query_result_old = self.__active_layer.query(where=where_query, result_offset=batch*batch_size, 
                         result_record_count=batch_size, return_all_records=False)
@@ -601,7 +884,18 @@ class Arcgis(Data_Loader):
                     if len(data["features"]) not in [batch_size, nrows]:
                         num_rows = len(data["features"])
                         raise ValueError(f"Number of rows is {num_rows} but is expected to be max rows to read {batch_size} or total number of rows {nrows}")
+                    
+                    if use_threads:
+                        # The first page has confirmed that the server returns the expected number of records per request.
+                        # The offsets of all remaining pages are known so request them in parallel.
+                        logger.debug(f"Requesting remaining {num_batches-1} pages using {max_workers} threads")
+                        executor = ThreadPoolExecutor(max_workers=max_workers)
+                        futures = {b:executor.submit(self.__request_page, where_query, offset+b*batch_size, 
+                                                     batch_size if b<num_batches-1 else nrows-b*batch_size, out_fields, spool, ids) 
+                                   for b in range(1, num_batches)}
             except Exception as e:
+                if executor:
+                    executor.shutdown(wait=False, cancel_futures=True)
                 if len(e.args)>0 and "Error Code: 429" in e.args[0]:
                     raise OPD_TooManyRequestsError(self.url, *e.args, _url_error_msg.format(self.url))
                 else:
@@ -612,10 +906,18 @@ class Arcgis(Data_Loader):
             if pbar:
                 bar.update(len(data["features"]))
 
+            del data
+
+        if executor:
+            executor.shutdown()
+
         if pbar:
             bar.close()
 
-        df = pd.DataFrame.from_records([x["attributes"] for x in features])
+        spool.remove()
+
+        df = _concat_pages(pages)
+        del pages
         if format_date:
             for col in date_cols:
                 if col in df:
@@ -640,29 +942,25 @@ class Arcgis(Data_Loader):
 
             df = df[ (df[self.date_field] >= date_range[0]) & (df[self.date_field] <= date_range[1]) ]
 
+        df = _select_columns(df, columns)
+
         if len(df) > 0:
-            has_point_geometry = any("geometry" in x and "x" in x["geometry"] for x in features)
+            if not self.is_table:
+                x = np.concatenate([k[0] for k in xy])
+                y = np.concatenate([k[1] for k in xy])
+                missing = np.concatenate([k[2] for k in xy])
+                has_point_geometry = not missing.all()
             if not self.is_table and has_point_geometry:
-                if _use_gpd_force is not None:
-                    if not _has_gpd and _use_gpd_force:
-                        raise ValueError("User cannot force GeoPandas usage when it is not installed")
-                    use_gpd = _use_gpd_force
-                else:
-                    use_gpd = _has_gpd
+                if use_gpd and not _has_gpd:
+                    raise ValueError("User cannot force GeoPandas usage when it is not installed")
 
                 if use_gpd:
                     # pyproj installs with geopandas
                     from pyproj.exceptions import CRSError
                     from pyproj import CRS
 
-                    geometry = []
-                    for feat in features:
-                        if "geometry" not in feat:
-                            geometry.append(None)
-                        elif feat["geometry"]["x"]=="NaN":
-                            geometry.append(Point(nan, nan))
-                        else:
-                            geometry.append(Point(feat["geometry"]["x"], feat["geometry"]["y"]))
+                    # Rows may have been removed by date filtering. Index of df is the position in the combined pages.
+                    geometry = _points_from_xy(x, y, missing)[df.index.to_numpy()]
 
                     logger.debug("Geometry found. Contructing geopandas GeoDataFrame")
                     try:
@@ -674,7 +972,7 @@ class Arcgis(Data_Loader):
                     except Exception as e:
                         raise e
                 else:
-                    geometry = [feat["geometry"] if "geometry" in feat else None for feat in features]
+                    geometry = [geolocation[k] for k in df.index]
 
                     if "geolocation" not in df:
                         logger.debug("Adding geometry column generated from spatial data provided by request.")
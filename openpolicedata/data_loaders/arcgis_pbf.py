@@ -0,0 +1,212 @@
+import struct
+
+import numpy as np
+
+# Decoder for ArcGIS query results requested with f=pbf. Results are decoded into the same structure as the
+# JSON (f=json) response so that they can be processed identically.
+# Message definitions: https://github.com/Esri/arcgis-pbf/blob/main/proto/FeatureCollection/FeatureCollection.proto
+
+# FieldType enumeration
+_field_types = ['esriFieldTypeSmallInteger', 'esriFieldTypeInteger', 'esriFieldTypeSingle', 'esriFieldTypeDouble',
+                'esriFieldTypeString', 'esriFieldTypeDate', 'esriFieldTypeOID', 'esriFieldTypeGeometry', 'esriFieldTypeBlob',
+                'esriFieldTypeRaster', 'esriFieldTypeGUID', 'esriFieldTypeGlobalID', 'esriFieldTypeXML']
+
+# GeometryType enumeration
+_geometry_types = {0:'esriGeometryPoint', 1:'esriGeometryMultipoint', 2:'esriGeometryPolyline', 3:'esriGeometryPolygon',
+                   4:'esriGeometryMultipatch', 127:None}
+
+_upper_left = 0
+
+_double = struct.Struct("<d")
+_float = struct.Struct("<f")
+
+
+def _read_varint(buf, pos):
+    result = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos+=1
+        result |= (b & 0x7f) << shift
+        if b < 0x80:
+            return result, pos
+        shift+=7
+
+
+def _zigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _iter_fields(buf, start=0, end=None):
+    # Generates (field number, wire type, value) for each field of a message. Length-delimited values are returned as
+    # (start, end) positions in buf
+    end = len(buf) if end is None else end
+    pos = start
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        wire_type = key & 0x7
+        if wire_type==0:
+            value, pos = _read_varint(buf, pos)
+        elif wire_type==1:
+            value = buf[pos:pos+8]
+            pos+=8
+        elif wire_type==2:
+            length, pos = _read_varint(buf, pos)
+            value = (pos, pos+length)
+            pos+=length
+        elif wire_type==5:
+            value = buf[pos:pos+4]
+            pos+=4
+        else:
+            raise ValueError(f"Unsupported protocol buffer wire type {wire_type}")
+        yield key >> 3, wire_type, value
+
+    if pos!=end:
+        raise ValueError("Protocol buffer message is truncated")
+
+
+def _get_message(buf, span, fields):
+    # Get scalar fields of a message as a dictionary. Length-delimited fields are returned as (start, end) positions
+    return {k:v for k,_,v in _iter_fields(buf, *span) if k in fields}
+
+
+def _get_string(buf, span):
+    return bytes(buf[span[0]:span[1]]).decode("utf-8")
+
+
+def _get_value(buf, start, end):
+    # Value is a oneof of scalar types. An empty Value is null.
+    value = None
+    for k, _, v in _iter_fields(buf, start, end):
+        if k==1:
+            value = _get_string(buf, v)
+        elif k==2:
+            # Convert from single-precision to the value output in JSON responses
+            value = float(str(np.float32(_float.unpack(v)[0])))
+        elif k==3:
+            value = _double.unpack(v)[0]
+        elif k in [4,8]:
+            value = _zigzag(v)
+        elif k in [5,7]:
+            value = v
+        elif k==6:
+            value = v-(1<<64) if v>=(1<<63) else v
+        elif k==9:
+            value = bool(v)
+    return value
+
+
+def _get_packed_sint(buf, span):
+    values = []
+    pos, end = span
+    while pos < end:
+        v, pos = _read_varint(buf, pos)
+        values.append(_zigzag(v))
+    return values
+
+
+def _get_transform(buf, span):
+    transform = _get_message(buf, span, [1,2,3])
+    scale = _get_message(buf, transform[2], [1,2]) if 2 in transform else {}
+    translate = _get_message(buf, transform[3], [1,2]) if 3 in transform else {}
+    x_scale = _double.unpack(scale[1])[0] if 1 in scale else 1.0
+    y_scale = _double.unpack(scale[2])[0] if 2 in scale else 1.0
+    x_translate = _double.unpack(translate[1])[0] if 1 in translate else 0.0
+    y_translate = _double.unpack(translate[2])[0] if 2 in translate else 0.0
+    if transform.get(1, _upper_left)==_upper_left:
+        # y coordinates are measured down from the upper left corner
+        y_scale = -y_scale
+
+    return x_scale, y_scale, x_translate, y_translate
+
+
+def decode(content):
+    '''Decode ArcGIS query result in PBF format (FeatureCollectionPBuffer) to the structure of the JSON result.
+    Only results with point geometry or without geometry are supported.
+
+    Parameters
+    ----------
+    content : bytes
+        Content of response
+
+    Returns
+    -------
+    dict
+        Result in the structure of the JSON response
+    '''
+    buf = memoryview(content)
+    collection = _get_message(buf, (0, len(buf)), [2])
+    if 2 not in collection:
+        raise ValueError("Protocol buffer does not contain a query result")
+    query_result = _get_message(buf, collection[2], [1])
+    if 1 not in query_result:
+        raise ValueError("Protocol buffer query result does not contain features")
+
+    result = {}
+    fields = []
+    features = []
+    geometry_type = None
+    transform = (1.0, 1.0, 0.0, 0.0)
+    for k, _, v in _iter_fields(buf, *query_result[1]):
+        if k==1:
+            result["objectIdFieldName"] = _get_string(buf, v)
+        elif k==7:
+            if v not in _geometry_types:
+                raise ValueError(f"Unknown geometry type {v}")
+            geometry_type = _geometry_types[v]
+            if geometry_type not in [None, 'esriGeometryPoint']:
+                raise ValueError(f"Decoding of {geometry_type} is not supported")
+            if geometry_type:
+                result["geometryType"] = geometry_type
+        elif k==8:
+            sr = _get_message(buf, v, [1,2])
+            wkid = sr.get(1) or sr.get(2)
+            if wkid:
+                result["spatialReference"] = {"wkid":wkid}
+                if 2 in sr:
+                    result["spatialReference"]["latestWkid"] = sr[2]
+        elif k==9:
+            result["exceededTransferLimit"] = bool(v)
+        elif k==12:
+            transform = _get_transform(buf, v)
+        elif k==13:
+            field = _get_message(buf, v, [1,2,3])
+            field_type = field.get(2, 0)
+            if field_type>=len(_field_types):
+                raise ValueError(f"Unknown field type {field_type}")
+            fields.append({"name":_get_string(buf, field[1]), "type":_field_types[field_type],
+                           "alias":_get_string(buf, field[3]) if 3 in field else _get_string(buf, field[1])})
+        elif k==15:
+            features.append(v)
+
+    if geometry_type and "spatialReference" not in result:
+        raise ValueError("Protocol buffer does not contain the spatial reference")
+
+    names = [x["name"] for x in fields]
+    x_scale, y_scale, x_translate, y_translate = transform
+    for j, span in enumerate(features):
+        values = []
+        geometry = None
+        for k, _, v in _iter_fields(buf, *span):
+            if k==1:
+                values.append(_get_value(buf, *v))
+            elif k==2:
+                coords = [c for m,_,c in _iter_fields(buf, *v) if m==3]
+                coords = _get_packed_sint(buf, coords[0]) if len(coords)>0 else []
+                if len(coords)>=2:
+                    geometry = {"x":coords[0]*x_scale + x_translate, "y":coords[1]*y_scale + y_translate}
+                else:
+                    geometry = {}
+            elif k==3:
+                raise ValueError("Decoding of shape buffers is not supported")
+
+        if len(values)!=len(names):
+            raise ValueError(f"Feature has {len(values)} values but there are {len(names)} fields")
+        feature = {"attributes":dict(zip(names, values))}
+        if geometry is not None:
+            feature["geometry"] = geometry
+        features[j] = feature
+
+    result["fields"] = fields
+    result["features"] = features
+    return result
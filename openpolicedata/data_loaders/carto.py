@@ -1,19 +1,43 @@
 from math import ceil
+import numpy as np
+from numpy import nan
 import pandas as pd
 import requests
 from tqdm import tqdm
 
-from .data_loader import Data_Loader, str2json, _url_error_msg, _process_date, _default_limit, _use_gpd_force, _has_gpd
+from .data_loader import Data_Loader, str2json, _url_error_msg, _process_date, _default_limit, _use_gpd_force, _has_gpd, count_cache, \
+    _agg_year_col, _format_aggregate, _select_columns, _get, _points_from_xy, \
+    _page_to_columns, _concat_pages
 from ..datetime_parser import to_datetime
 from ..exceptions import OPD_DataUnavailableError, OPD_TooManyRequestsError
-from .. import log
+from .. import cache, checkpoint, log
 
 if _has_gpd:
     import geopandas as gpd
-    from shapely.geometry import Point
 
 logger = log.get_logger()
 
+
+def _features_to_xy(features):
+    # Extract point coordinates of a page of GeoJSON features in a single pass
+    x = np.full(len(features), nan)
+    y = np.full(len(features), nan)
+    missing = np.zeros(len(features), dtype=bool)
+    has_point_geometry = False
+    for k, feat in enumerate(features):
+        geom = feat.get("geometry")
+        if geom is None:
+            missing[k] = True
+            continue
+        has_point_geometry = True
+        if len(geom["coordinates"])<2:
+            missing[k] = True
+        else:
+            x[k] = geom["coordinates"][0]
+            y[k] = geom["coordinates"][1]
+    return x, y, missing, has_point_geometry
+
+
 class Carto(Data_Loader):
     """
     A class for accessing data from Carto clients
@@ -102,20 +126,21 @@ class Carto(Data_Loader):
             Record count or number of rows in data request
         '''
 
-        if self._last_count is not None and self._last_count[0]==date:
+        count_key = self._count_key(date)
+        if (cached_count:=count_cache.get(count_key)) is not None:
             logger.debug("Request matches previous count request. Returning saved count.")
-            return self._last_count[1]
+            return cached_count[0]
         else:
             where = self.__construct_where(date)
             json = self.__request(where=where, return_count=True)
             count = json["rows"][0]["count"]
 
-        self._last_count = (date, count, where)
+        count_cache.put(count_key, (count, where))
 
         return count
 
 
-    def __request(self, where=None, return_count=False, out_fields="*", out_type="GeoJSON", offset=0, count=None):
+    def __request(self, where=None, return_count=False, out_fields="*", out_type="GeoJSON", offset=0, count=None, groupby=None):
 
         query = "SELECT "
         params = {}
@@ -142,7 +167,10 @@ class Carto(Data_Loader):
             else:
                 query+=" WHERE"+ default_where[4:]
 
-        if not return_count and count!=0:
+        if groupby:
+            query+=" GROUP BY "+ groupby
+
+        if not return_count and count!=0 and not groupby:
             # Order results to ensure data order remains constant if paging
             query+=" ORDER BY cartodb_id"
 
@@ -157,7 +185,10 @@ class Carto(Data_Loader):
         for k,v in params.items():
             logger.debug(f"\t{k} = {v}")
 
-        r = requests.get(self.url, params=params)
+        if (result:=cache.get_json(self.url, params)) is not None:
+            return result
+
+        r = _get(self.url, params=params)
 
         try:
             r.raise_for_status()
@@ -171,7 +202,37 @@ class Carto(Data_Loader):
             else: raise e
         except: raise
         
-        return r.json()
+        result = r.json()
+        cache.put_json(self.url, params, result)
+        
+        return result
+
+
+    def aggregate(self, group_by=None, metrics=None, date=None, *, by_year=False, pbar=True, **kwargs):
+        '''Group records and calculate statistics for each group using a SQL GROUP BY query. See Data_Loader.aggregate
+        for details on inputs and outputs.
+        '''
+
+        group_by, parsed_metrics = self._check_aggregate_inputs(group_by, metrics, by_year)
+        if by_year:
+            type_info = self.__request(count=0, out_type="JSON")
+            if self.date_field not in type_info["fields"] or type_info["fields"][self.date_field]["type"]!='date':
+                # Year cannot be extracted in query
+                return super().aggregate(group_by, metrics, date, by_year=by_year, pbar=pbar, **kwargs)
+
+        group = group_by.copy()
+        if by_year:
+            group.append(f"EXTRACT(YEAR FROM {self.date_field})")
+        select = [f"{x} AS {y}" for x,y in zip(group, group_by+[_agg_year_col])]
+        for stat, col, name in parsed_metrics:
+            select.append(f"{stat}({col if col else '*'}) AS {name}")
+
+        where = self.__construct_where(date)
+        logger.debug(f"Request aggregated data from {self.data_set} from {self.url}")
+        json = self.__request(where=where, out_fields=", ".join(select), out_type="JSON", groupby=", ".join(group) if len(group)>0 else None)
+
+        return _format_aggregate(pd.DataFrame(json["rows"], columns=group_by+([_agg_year_col] if by_year else [])+[x[2] for x in parsed_metrics]), 
+                                 group_by, parsed_metrics, by_year)
 
 
     def __construct_where(self, date=None):
@@ -184,7 +245,7 @@ class Carto(Data_Loader):
         return where_query
 
     
-    def load(self, date=None, nrows=None, offset=0, *, pbar=True, format_date=True, **kwargs):
+    def load(self, date=None, nrows=None, offset=0, *, pbar=True, format_date=True, columns=None, **kwargs):
         '''Download table to pandas or geopandas DataFrame
         
         Parameters
@@ -202,6 +263,8 @@ class Carto(Data_Loader):
         format_date : bool, optional
             If True, known date columns (based on presence of date_field in datasets table or data type information provided by dataset owner) will be automatically formatted
             to be pandas datetimes (or pandas Period in rare cases), by default True
+        columns : list
+            (Optional) Names of columns to request. Geometry is still returned. Default is None (all columns)
             
         Returns
         -------
@@ -209,14 +272,14 @@ class Carto(Data_Loader):
             DataFrame containing downloaded
         '''
         
-        if self._last_count is not None and self._last_count[0]==date:
-            record_count = self._last_count[1]
-            where_query = self._last_count[2]
+        count_key = self._count_key(date)
+        if (cached_count:=count_cache.get(count_key)) is not None:
+            record_count, where_query = cached_count
         else:
             where_query = self.__construct_where(date)
             json = self.__request(where=where_query, return_count=True)
             record_count = json["rows"][0]["count"]
-            self._last_count = (date, record_count, where_query)
+            count_cache.put(count_key, (record_count, where_query))
 
         record_count-=offset
         if record_count<=0:
@@ -233,16 +296,39 @@ class Carto(Data_Loader):
 
         # When requesting data as GeoJSON, no type information is returned so request it now
         type_info = self.__request(count=0, out_type="JSON")
+
+        out_fields = "*"
+        if columns:
+            # GeoJSON output requires the geometry column
+            out_fields = ", ".join(list(columns) + (["the_geom"] if "the_geom" in type_info["fields"] and "the_geom" not in columns else []))
+
+        # Completed pages are stored if checkpointing is enabled so that a failed download can be resumed
+        spool = checkpoint.Spool(type(self).__name__, self.url, self.data_set, where_query, out_fields)
             
-        features = []
+        if _use_gpd_force is not None:
+            use_gpd = _use_gpd_force
+        else:
+            use_gpd = _has_gpd
+
+        # Each page is converted to a DataFrame (and arrays of coordinates) when it is received so that the
+        # decoded JSON of only 1 page is held in memory at a time
+        numeric_cols = [key for key, x in type_info["fields"].items() if x["type"]=='number']
+        pages = []
+        xy = []
+        geolocation = []
         for batch in range(num_batches):
             bs = batch_size if batch<num_batches-1 else nrows-batch*batch_size
 
             try:
-                data = self.__request(where=where_query, offset=offset+batch*batch_size, count=bs)
-                features.extend(data["features"])
-
-                if batch==0 and len(features)>0:
+                if (data:=spool.get(offset+batch*batch_size, bs)) is None:
+                    data = self.__request(where=where_query, out_fields=out_fields, offset=offset+batch*batch_size, count=bs)
+                    spool.put(offset+batch*batch_size, bs, data)
+                pages.append(_page_to_columns([x["properties"] for x in data["features"]], numeric_cols))
+                xy.append(_features_to_xy(data["features"]))
+                if not use_gpd:
+                    geolocation.extend([feat["geometry"] if "geometry" in feat else None for feat in data["features"]])
+
+                if batch==0 and len(data["features"])>0:
                     date_cols = [key for key, x in type_info["fields"].items() if x["type"]=='date']
                     if len(data["features"]) not in [batch_size, nrows]:
                         num_rows = len(data["features"])
@@ -258,10 +344,16 @@ class Carto(Data_Loader):
             if pbar:
                 bar.update(len(data["features"]))
 
+            del data
+
         if pbar:
             bar.close()
 
-        df = pd.DataFrame.from_records([x["properties"] for x in features])
+        spool.remove()
+
+        df = _concat_pages(pages)
+        del pages
+        df = _select_columns(df, columns)
         if format_date:
             for col in date_cols:
                 if col in df:
@@ -269,27 +361,22 @@ class Carto(Data_Loader):
                     df[col] = to_datetime(df[col])
 
         if len(df) > 0:
-            has_point_geometry = any("geometry" in x and x["geometry"]!=None for x in features)
+            x = np.concatenate([k[0] for k in xy])
+            y = np.concatenate([k[1] for k in xy])
+            missing = np.concatenate([k[2] for k in xy])
+            has_point_geometry = any(k[3] for k in xy)
+
             if has_point_geometry:
-                if _use_gpd_force is not None:
-                    if not _has_gpd and _use_gpd_force:
-                        raise ValueError("User cannot force GeoPandas usage when it is not installed")
-                    use_gpd = _use_gpd_force
-                else:
-                    use_gpd = _has_gpd
+                if use_gpd and not _has_gpd:
+                    raise ValueError("User cannot force GeoPandas usage when it is not installed")
 
                 if use_gpd:
-                    geometry = []
-                    for feat in features:
-                        if "geometry" not in feat or feat["geometry"]==None or len(feat["geometry"]["coordinates"])<2:
-                            geometry.append(None)
-                        else:
-                            geometry.append(Point(feat["geometry"]["coordinates"][0], feat["geometry"]["coordinates"][1]))
+                    geometry = _points_from_xy(x, y, missing)
 
                     logger.debug("Geometry found. Contructing geopandas GeoDataFrame")
                     df = gpd.GeoDataFrame(df, crs=4326, geometry=geometry)
                 else:
-                    geometry = [feat["geometry"] if "geometry" in feat else None for feat in features]
+                    geometry = geolocation
 
                     if "geolocation" not in df:
                         logger.debug("Adding geometry column generated from spatial data provided by request.")
@@ -5,13 +5,17 @@ import re
 import requests
 from tqdm import tqdm
 
-from .data_loader import Data_Loader, _url_error_msg, str2json, _process_date
+from .data_loader import Data_Loader, _url_error_msg, str2json, _process_date, count_cache, _agg_year_col, _format_aggregate, _get, \
+    _page_to_columns, _concat_pages
 from ..datetime_parser import to_datetime
 from ..exceptions import OPD_DataUnavailableError, OPD_TooManyRequestsError
-from .. import log
+from .. import cache, checkpoint, log
 
 logger = log.get_logger()
 
+# CKAN (PostgreSQL) field types that are returned as numbers
+_numeric_field_types = ['int', 'int2', 'int4', 'int8', 'float4', 'float8']
+
 class Ckan(Data_Loader):
     """
     A class for accessing data from CKAN clients
@@ -97,20 +101,21 @@ class Ckan(Data_Loader):
             Record count or number of rows in data request
         '''
 
-        if self._last_count is not None and self._last_count[0]==date and self._last_count[1]==opt_filter:
+        count_key = self._count_key(date, opt_filter, None)
+        if (cached_count:=count_cache.get(count_key)) is not None:
             logger.debug("Request matches previous count request. Returning saved count.")
-            return self._last_count[2]
+            return cached_count[0]
         else:
             where = self.__construct_where(date, opt_filter)
             json = self.__request(where=where, return_count=True)
             count = json['result']['records'][0]['count']
 
-        self._last_count = (date, opt_filter, count, where)
+        count_cache.put(count_key, (count, where))
 
         return count
 
 
-    def __request(self, where=None, return_count=False, out_fields="*", out_type="json", offset=0, count=None, orderby="_id"):
+    def __request(self, where=None, return_count=False, out_fields="*", out_type="json", offset=0, count=None, orderby="_id", groupby=None):
 
         if isinstance(out_fields, list):
             out_fields = '"' + '", "'.join(out_fields) + '"'
@@ -145,7 +150,10 @@ class Ckan(Data_Loader):
             else:
                 query+=" WHERE"+ default_where[4:]
 
-        if not return_count and count!=0 and not out_fields.startswith("DISTINCT"):
+        if groupby:
+            query+=" GROUP BY "+ groupby
+
+        if not return_count and count!=0 and not out_fields.startswith("DISTINCT") and not groupby:
             # Order results to ensure data order remains constant if paging
             query+=' ORDER BY "'+ orderby + '"'
 
@@ -160,8 +168,11 @@ class Ckan(Data_Loader):
         for k,v in params.items():
             logger.debug(f"\t{k} = {v}")
 
+        if (result:=cache.get_json(self.url, params)) is not None:
+            return result
+
         try:
-            r = requests.get(self.url, params=params)
+            r = _get(self.url, params=params)
         except requests.exceptions.SSLError as e:
             raise OPD_DataUnavailableError(self.url, e.args, _url_error_msg.format(self.get_api_url()))
 
@@ -177,7 +188,46 @@ class Ckan(Data_Loader):
             else: raise e
         except: raise
         
-        return r.json()
+        result = r.json()
+        cache.put_json(self.url, params, result)
+        
+        return result
+
+
+    def aggregate(self, group_by=None, metrics=None, date=None, *, by_year=False, opt_filter=None, pbar=True, **kwargs):
+        '''Group records and calculate statistics for each group using a SQL GROUP BY query. See Data_Loader.aggregate
+        for details on inputs and outputs.
+        '''
+
+        group_by, parsed_metrics = self._check_aggregate_inputs(group_by, metrics, by_year)
+        if by_year:
+            fields = self.__request(count=0)['result']['fields']
+            date_col_info = [x for x in fields if x["id"]==self.date_field]
+            if len(date_col_info)==0 or date_col_info[0]["type"] not in ['timestamp','date']:
+                # Year cannot be extracted in query
+                return super().aggregate(group_by, metrics, date, by_year=by_year, opt_filter=opt_filter, pbar=pbar, **kwargs)
+
+        group = ['"' + x + '"' for x in group_by]
+        if by_year:
+            group.append(f'EXTRACT(YEAR FROM "{self.date_field}")')
+        select = [f'{x} AS "{y}"' for x,y in zip(group, group_by+[_agg_year_col])]
+        for stat, col, name in parsed_metrics:
+            col = f'"{col}"' if col else "*"
+            select.append(f'{stat.upper()}({col}) AS "{name}"')
+
+        where = self.__construct_where(date, opt_filter)
+        logger.debug(f"Request aggregated data from dataset {self.data_set} from {self.url}")
+        json = self.__request(where=where, out_fields=", ".join(select), groupby=", ".join(group) if len(group)>0 else None)
+
+        return _format_aggregate(pd.DataFrame(json['result']['records'], columns=group_by+([_agg_year_col] if by_year else [])+[x[2] for x in parsed_metrics]), 
+                                 group_by, parsed_metrics, by_year)
+
+
+    def _get_years_grouped(self):
+        # Fails for date fields that are not a date type, in which case counts are requested for each year
+        logger.debug(f"Requesting years in dataset {self.data_set} from {self.url} with grouped query")
+        json = self.__request(out_fields=f'EXTRACT(YEAR FROM "{self.date_field}") AS year, COUNT(*) AS count', groupby="year")
+        return [int(x['year']) for x in json['result']['records'] if x['year'] is not None and int(x['count'])>0]
 
 
     def __construct_where(self, date=None, opt_filter=None, filter_year=False, sample_data=None):
@@ -245,7 +295,7 @@ class Ckan(Data_Loader):
 
     
     def load(self, date=None, nrows=None, offset=0, *, pbar=True, opt_filter=None, select=None, output_type=None, sortby='_id', 
-             format_date=True, **kwargs):
+             format_date=True, columns=None, **kwargs):
         '''Download table to pandas or geopandas DataFrame
         
         Parameters
@@ -271,6 +321,8 @@ class Ckan(Data_Loader):
         format_date : bool, optional
             If True, known date columns (based on presence of date_field in datasets table or data type information provided by dataset owner) will be automatically formatted
             to be pandas datetimes (or pandas Period in rare cases), by default True
+        columns : list
+            (Optional) Names of columns to request. Ignored if select is input. Default is None (all columns)
             
         Returns
         -------
@@ -280,15 +332,17 @@ class Ckan(Data_Loader):
 
         data = self.__request(count=100)
         date_cols = [x['id'] for x in data['result']["fields"] if x["type"] in ['timestamp','date']]
+        numeric_cols = [x['id'] for x in data['result']["fields"] if x["type"] in _numeric_field_types]
         
-        if self._last_count is not None and self._last_count[0]==date and self._last_count[1]==opt_filter:
-            record_count = self._last_count[2]
-            where_query = self._last_count[3]
+        # Count depends on select (i.e. if it contains DISTINCT)
+        count_key = self._count_key(date, opt_filter, select)
+        if (cached_count:=count_cache.get(count_key)) is not None:
+            record_count, where_query = cached_count
         else:
             where_query = self.__construct_where(date, opt_filter, sample_data=data)
             json = self.__request(where=where_query, return_count=True, out_fields=select)
             record_count = json['result']['records'][0]['count']
-            self._last_count = (date, opt_filter, record_count, where_query)
+            count_cache.put(count_key, (record_count, where_query))
 
         record_count-=offset
         if record_count<=0:
@@ -306,6 +360,8 @@ class Ckan(Data_Loader):
 
         if select:
             fields = select
+        elif columns:
+            fields = list(columns)
         else:
             # CKAN includes a large _full_text and _id columns that are not useful
             # Get info on columns in order to exclude these columns from the returned data
@@ -320,18 +376,45 @@ class Ckan(Data_Loader):
         elif not sortby:
             # order by_id guarantees data order remains the same when paging
             sortby = "_id"
+
+        # When ordering by _id, pages after the first are requested by filtering for _id values greater than the last one 
+        # of the previous page (keyset paging) instead of by offset so that the server does not scan all previous records 
+        # for each page
+        keyset = sortby=="_id" and isinstance(fields, list)
+        drop_id = keyset and "_id" not in fields
+        if drop_id:
+            fields = fields + ["_id"]
+
+        # Completed pages are stored if checkpointing is enabled so that a failed download can be resumed
+        spool = checkpoint.Spool(type(self).__name__, self.url, self.data_set, where_query, sortby, fields)
             
-        features = []
+        # Each page is converted to a DataFrame when it is received so that the decoded JSON of only 1 page is held in memory at a time
+        pages = []
+        last_id = None
         for batch in range(num_batches):
             bs = batch_size if batch<num_batches-1 else nrows-batch*batch_size
 
-            try:
-                data = self.__request(where=where_query, offset=offset+batch*batch_size, count=bs, out_fields=fields, orderby=sortby)
-                features.extend(data['result']['records'])
+            page_where = where_query
+            page_offset = offset+batch*batch_size
+            if last_id is not None:
+                page_where = f'({where_query}) AND "_id" > {last_id}' if where_query else f'"_id" > {last_id}'
+                page_offset = 0
 
-                if batch==0 and len(features)>0:
-                    if len(features) not in [batch_size, nrows]:
-                        raise ValueError(f"Number of rows is {len(features)} but is expected to be max rows to read {batch_size} or total number of rows {nrows}")
+            try:
+                if (data:=spool.get(offset+batch*batch_size, bs)) is None:
+                    data = self.__request(where=page_where, offset=page_offset, count=bs, out_fields=fields, orderby=sortby)
+                    spool.put(offset+batch*batch_size, bs, data)
+                records = data['result']['records']
+                if keyset and len(records)>0:
+                    last_id = records[-1]["_id"]
+                    if drop_id:
+                        for r in records:
+                            r.pop("_id", None)
+                pages.append(_page_to_columns(records, numeric_cols))
+
+                if batch==0 and len(records)>0:
+                    if len(records) not in [batch_size, nrows]:
+                        raise ValueError(f"Number of rows is {len(records)} but is expected to be max rows to read {batch_size} or total number of rows {nrows}")
             except Exception as e:
                 if len(e.args)>0 and "Error Code: 429" in e.args[0]:
                     raise OPD_TooManyRequestsError(self.url, *e.args, _url_error_msg.format(self.get_api_url()))
@@ -341,12 +424,17 @@ class Ckan(Data_Loader):
                 raise
 
             if pbar:
-                bar.update(len(data['result']['records']))
+                bar.update(len(records))
+
+            del data, records
 
         if pbar:
             bar.close()
 
-        df = pd.DataFrame(features)
+        spool.remove()
+
+        df = _concat_pages(pages)
+        del pages
         if format_date:
             for col in date_cols:
                 if col in df:
@@ -1,10 +1,9 @@
 import pandas as pd
 from tqdm import tqdm
-from time import sleep
 import warnings
 
 from .csv_class import Csv
-from .data_loader import Data_Loader
+from .data_loader import Data_Loader, _select_columns, _throttle_host
 
 class CombinedDataset(Data_Loader):
     """
@@ -46,6 +45,7 @@ class CombinedDataset(Data_Loader):
         self.url = url
         self.data_class = data_class
         self.datasets = datasets
+        self.date_field = kwargs.get("date_field")
         
         self.loaders = []
         url = url[:-1] if url[-1]=='/' else url
@@ -64,6 +64,7 @@ class CombinedDataset(Data_Loader):
                 ds = ds.copy()
                 cur_url = url + '/' + ds.pop('url') if 'url' in ds else url
                 loc_kwargs['data_set'] = ds
+                _throttle_host(cur_url)  # Reduce likelihood of timeout due to repeated requests
                 try:
                     self.loaders.append(data_class(cur_url, *args, **loc_kwargs))
                 except ValueError as e:
@@ -73,9 +74,6 @@ class CombinedDataset(Data_Loader):
                             self.loaders.append(Csv(cur_url, *args, **loc_kwargs))
                         except:
                             raise e
-                        
-                if ds!=datasets[-1]:
-                    sleep(0.5)  # Reduce likelihood of timeout due to repeated requests
 
 
 
@@ -100,16 +98,17 @@ class CombinedDataset(Data_Loader):
         first_time = True
         if '_first_time' in kwargs:
             kwargs.pop('_first_time')
+        # Column names may change between files so columns are selected after files are combined
+        columns = kwargs.pop('columns', None)
         iter = tqdm(self.loaders, desc='Loading data files', leave=False) if pbar else self.loaders
         for k, loader in enumerate(iter):
             if isinstance(self.datasets[k],list):
                 # Tables in dfs will be merged
                 on.append(self.datasets[k][0]['on'])
 
+            _throttle_host(loader.url)  # Reduce likelihood of timeout due to repeated requests
             dfs.append(loader.load(_first_time=first_time, **kwargs))
             first_time = False
-            if loader!=self.loaders[-1]:
-                sleep(0.5)  # Reduce likelihood of timeout due to repeated requests
 
             if 'www.albemarle.org' in loader.url:
                 # Renamed
@@ -142,7 +141,7 @@ class CombinedDataset(Data_Loader):
         if nrows!=None:
             df = df.head(nrows)
 
-        return df
+        return _select_columns(df, columns)
         
     def get_count(self, *args, **kwargs):   
         """Get number of records/rows generated by query
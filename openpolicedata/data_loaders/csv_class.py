@@ -8,8 +8,9 @@ import urllib
 import warnings
 from zipfile import ZipFile
 
-from .data_loader import Data_Loader, str2json, download_zip_and_extract, _url_error_msg, get_legacy_session, filter_dataframe
-from ..datetime_parser import to_datetime
+from .data_loader import Data_Loader, str2json, download_zip_and_extract, _url_error_msg, session_pool, filter_dataframe, _iter_batches, \
+    _select_columns, _get, _zip_prefetch
+from ..datetime_parser import to_datetime, guess_datetime_format
 from ..exceptions import OPD_DataUnavailableError
 from .. import httpio, log
 
@@ -61,21 +62,22 @@ class TqdmReader:
                 self.bar.update(self.bar.total - self.bar.n)
             return ""
 
-def read_zipped_csv(url, pbar=True, block_size=2**20, data_set=None):
+def read_zipped_csv(url, pbar=True, block_size=2**20, data_set=None, usecols=None):
 
     if data_set:
         logging.debug('Load CSV from zip using httpio method')
         # Load only requested dataset to minimize download size
-        with httpio.open(url, block_size=block_size) as fp:
+        # Blocks are requested in parallel and ahead of reads
+        with httpio.open(url, block_size=block_size, prefetch=_zip_prefetch, max_workers=_zip_prefetch) as fp:
             with ZipFile(fp, 'r') as z:
-                return pd.read_csv(BytesIO(z.read(data_set['file'])), encoding_errors='surrogateescape')
+                return pd.read_csv(BytesIO(z.read(data_set['file'])), encoding_errors='surrogateescape', usecols=usecols)
     else:
         logging.debug('Load CSV from zip by downloading and converting to pandas DataFrame')
 
         zip_data = download_zip_and_extract(url, block_size, pbar)
         zip_bytes_io = BytesIO(zip_data)
         logger.debug('Converting BytesIO to DataFrame')
-        return pd.read_csv(zip_bytes_io, encoding_errors='surrogateescape')
+        return pd.read_csv(zip_bytes_io, encoding_errors='surrogateescape', usecols=usecols)
   
 
 def count_csv_rows(chunk_iter):
@@ -118,6 +120,47 @@ def count_csv_rows(chunk_iter):
     return count
 
 
+# Values that read_csv converts to booleans by default
+_true_values = ["True", "TRUE", "true"]
+_false_values = ["False", "FALSE", "false"]
+
+def _infer_column_types(df):
+    # Infer the type that read_csv would convert each column of df to from the column's values. df is read with 
+    # all values as strings. Types are 'numeric', 'bool', or None for strings.
+    types = {}
+    for col in df.columns:
+        types[col] = None
+        if df[col].notnull().any() and (df[col].isin(_true_values + _false_values) | df[col].isnull()).all():
+            types[col] = 'bool'
+        else:
+            try:
+                pd.to_numeric(df[col])
+                types[col] = 'numeric'
+            except (ValueError, TypeError):
+                pass
+    return types
+
+
+def _apply_column_types(df, types):
+    # Convert columns of df that was read with all values as strings to types from _infer_column_types. If a column 
+    # cannot be converted, it is left as strings and types is updated so that the column is strings in all following DataFrames.
+    for col in df.columns:
+        if types.get(col)=='numeric':
+            try:
+                df[col] = pd.to_numeric(df[col])
+            except (ValueError, TypeError):
+                logger.debug(f"Column {col} contains values that are not numbers. Column will not be converted to numbers.")
+                types[col] = None
+        elif types.get(col)=='bool':
+            if (df[col].isin(_true_values + _false_values) | df[col].isnull()).all():
+                df[col] = df[col].isin(_true_values).where(df[col].notnull())
+                if df[col].notnull().all():
+                    df[col] = df[col].astype(bool)
+            else:
+                types[col] = None
+    return df
+
+
 class Csv(Data_Loader):
     """
     A class for accessing data from CSV download URLs
@@ -201,7 +244,7 @@ class Csv(Data_Loader):
             return self._last_count[1]
         if ".zip" not in self.url and date==None and agency==None and not self.query:
             logger.debug(f"Loading file to count rows from {self.url}")
-            with requests.get(self.url, stream=True) as r:
+            with _get(self.url, stream=True) as r:
                 count = count_csv_rows(r.iter_content(chunk_size=2**16))
         elif force:
             count = len(self.load(date=date, agency=agency))
@@ -214,7 +257,73 @@ class Csv(Data_Loader):
         return count
 
 
-    def load(self, date=None, nrows=None, offset=0, *, pbar=True, agency=None, format_date=True, **kwargs):
+    def __open(self):
+        # Open streaming request for (non-zipped) CSV file
+        use_legacy = False
+        headers = None
+        try:
+            r = session_pool.get_session().head(self.url)
+        except requests.exceptions.SSLError as e:
+            if "[SSL: UNSAFE_LEGACY_RENEGOTIATION_DISABLED] unsafe legacy renegotiation disabled" in str(e.args[0]) or \
+                "[SSL: CERTIFICATE_VERIFY_FAILED] certificate verify failed: unable to get local issuer certificate" in str(e.args[0]):
+                use_legacy = True
+            elif 'Max retries exceeded' in str(e):
+                raise OPD_DataUnavailableError(*e.args, _url_error_msg.format(self.url))
+            else:
+                raise e
+        except requests.exceptions.ConnectionError as e:
+            if 'Max retries exceeded' in str(e):
+                raise OPD_DataUnavailableError(*e.args, _url_error_msg.format(self.url))
+            else:
+                raise e
+        except Exception as e:
+            raise
+            
+        if not use_legacy:
+            if r.status_code in [400,404]:
+                # Try get instead
+                r = _get(self.url)
+            try:
+                r.raise_for_status()
+                r.close()
+            except requests.exceptions.HTTPError as e:
+                try:
+                    headers = {
+                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:106.0) Gecko/20100101 Firefox/106.0',
+                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+                        'Accept-Language': 'en-US,en;q=0.5',
+                        # 'Accept-Encoding': 'gzip, deflate, br',
+                        'DNT': '1',
+                        'Connection': 'keep-alive',
+                        'Upgrade-Insecure-Requests': '1',
+                        'Sec-Fetch-Dest': 'document',
+                        'Sec-Fetch-Mode': 'navigate',
+                        'Sec-Fetch-Site': 'none',
+                        'Sec-Fetch-User': '?1',
+                    }
+                    r = _get(self.url, headers=headers)
+                    r.raise_for_status()
+                    r.close()
+                except:
+                    raise OPD_DataUnavailableError(*e.args, _url_error_msg.format(self.url))
+            except Exception as e:
+                raise e
+
+        if use_legacy:
+            return _get(self.url, session=session_pool.get_session(legacy=True), params=None, stream=True, headers=headers)
+        else:
+            return _get(self.url, params=None, stream=True, headers=headers)
+
+
+    def __usecols(self, columns):
+        # Only read requested columns and columns required for filtering
+        if columns is None:
+            return None
+        keep = set(columns) | set(self.query.keys()) | {x for x in [self.date_field, self.agency_field] if pd.notnull(x)}
+        return lambda x: x in keep
+
+
+    def load(self, date=None, nrows=None, offset=0, *, pbar=True, agency=None, format_date=True, columns=None, **kwargs):
         '''Download CSV file to pandas DataFrame
         
         Parameters
@@ -234,6 +343,8 @@ class Csv(Data_Loader):
         format_date : bool, optional
             If True, known date columns (based on presence of date_field in datasets table or data type information provided by dataset owner) will be automatically formatted
             to be pandas datetimes (or pandas Period in rare cases), by default True
+        columns : list
+            (Optional) Names of columns to load. Default is None (all columns)
             
         Returns
         -------
@@ -249,7 +360,7 @@ class Csv(Data_Loader):
             with warnings.catch_warnings():
                 warnings.simplefilter("ignore", category=pd.errors.DtypeWarning)
                 try:
-                    table = read_zipped_csv(self.url, pbar=pbar, data_set=self.data_set)
+                    table = read_zipped_csv(self.url, pbar=pbar, data_set=self.data_set, usecols=self.__usecols(columns))
                     logger.debug("Completed reading CSV from zip file")
                 except requests.exceptions.HTTPError as e:
                     if len(e.args) and 'Forbidden' in e.args[0]:
@@ -267,7 +378,7 @@ class Csv(Data_Loader):
                             'Sec-Fetch-User': '?1',
                         }
                         try:
-                            table = pd.read_csv(self.url, encoding_errors='surrogateescape', storage_options=headers)
+                            table = pd.read_csv(self.url, encoding_errors='surrogateescape', storage_options=headers, usecols=self.__usecols(columns))
                         except urllib.error.HTTPError as e:
                             raise OPD_DataUnavailableError(*e.args, _url_error_msg.format(self.url))
                         except:
@@ -277,87 +388,22 @@ class Csv(Data_Loader):
                 except Exception as e:
                     raise e
         else:
-            use_legacy = False
-            headers = None
-            try:
-                r = requests.head(self.url)
-            except requests.exceptions.SSLError as e:
-                if "[SSL: UNSAFE_LEGACY_RENEGOTIATION_DISABLED] unsafe legacy renegotiation disabled" in str(e.args[0]) or \
-                    "[SSL: CERTIFICATE_VERIFY_FAILED] certificate verify failed: unable to get local issuer certificate" in str(e.args[0]):
-                    use_legacy = True
-                elif 'Max retries exceeded' in str(e):
-                    raise OPD_DataUnavailableError(*e.args, _url_error_msg.format(self.url))
-                else:
-                    raise e
-            except requests.exceptions.ConnectionError as e:
-                if 'Max retries exceeded' in str(e):
-                    raise OPD_DataUnavailableError(*e.args, _url_error_msg.format(self.url))
-                else:
-                    raise e
-            except Exception as e:
-                raise
-                
-            if not use_legacy:
-                if r.status_code in [400,404]:
-                    # Try get instead
-                    r = requests.get(self.url)
-                try:
-                    r.raise_for_status()
-                    r.close()
-                except requests.exceptions.HTTPError as e:
-                    try:
-                        headers = {
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:106.0) Gecko/20100101 Firefox/106.0',
-                            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-                            'Accept-Language': 'en-US,en;q=0.5',
-                            # 'Accept-Encoding': 'gzip, deflate, br',
-                            'DNT': '1',
-                            'Connection': 'keep-alive',
-                            'Upgrade-Insecure-Requests': '1',
-                            'Sec-Fetch-Dest': 'document',
-                            'Sec-Fetch-Mode': 'navigate',
-                            'Sec-Fetch-Site': 'none',
-                            'Sec-Fetch-User': '?1',
-                        }
-                        r = requests.get(self.url, headers=headers)
-                        r.raise_for_status()
-                        r.close()
-                    except:
-                        raise OPD_DataUnavailableError(*e.args, _url_error_msg.format(self.url))
-                except Exception as e:
-                    raise e
-            
-            def get(url, use_legacy, headers=None):
-                if use_legacy:
-                    return get_legacy_session().get(url, params=None, stream=True, headers=headers)
-                else:
-                    return requests.get(url, params=None, stream=True, headers=headers)
-
             header = 'infer'   
 
-            with get(self.url, use_legacy, headers) as resp:
+            with self.__open() as resp:
                 try:
                     with warnings.catch_warnings():
                         warnings.filterwarnings("ignore", message=r"Columns \(.+\) have mixed types", category=pd.errors.DtypeWarning)
                         nrows_read = offset+nrows if nrows is not None and not self.query else None
                         table = pd.read_csv(TqdmReader(resp, pbar=pbar), nrows=nrows_read, 
                             encoding_errors='surrogateescape', 
-                            header=header)
+                            header=header, usecols=self.__usecols(columns))
                 except (urllib.error.HTTPError, pd.errors.ParserError) as e:
                     raise OPD_DataUnavailableError(*e.args, _url_error_msg.format(self.url))
                 except Exception as e:
                     raise e
                 
-        if len(table.columns)==1 and ('?xml' in table.columns[0] or re.search(r'^\<.+\>', table.columns[0])):
-            # Read data was not a CSV file. It was an error code or HTML
-            raise OPD_DataUnavailableError(table.iloc[0,0], _url_error_msg.format(self.url))
-        
-        table = filter_dataframe(table, date_field=self.date_field, date_filter=date, 
-            agency_field=self.agency_field, agency=agency, format_date=format_date)
-        
-        if bool(self.query):
-            for k,v in self.query.items():
-                table = table[table[k]==v].reset_index(drop=True)
+        table = self.__filter(table, date, agency, format_date)
 
         if offset>0:
             rows_limit = offset+nrows if nrows is not None and offset+nrows<len(table) else len(table)
@@ -367,7 +413,88 @@ class Csv(Data_Loader):
             logger.debug(f"Extracting the first {nrows} rows")
             table = table.head(nrows)
 
-        return table
+        return _select_columns(table, columns)
+
+
+    def load_iter(self, nbatch, date=None, offset=0, *, pbar=True, agency=None, format_date=True, columns=None, **kwargs):
+        '''Generator that streams CSV file in batches without reading the whole file into memory
+
+        Parameters
+        ----------
+        nbatch : int
+            Number of records to load in each batch
+        date : int or a length 2 list of start and stop year(s), date string(s), and/or timestamp(s)
+            (Optional) Define timespan of data to request:
+                1. Request data for an entire year by inputting the year (i.e. 2023)
+                2. Request data from a start year or datetime to a stop year or datetime using a length 2 list (i.e. [2021, '2023-02-01'] for start of 2021 to end of 2023-02-01)
+        offset - int
+            (Optional) Number of records to offset from first record. Default is 0 to return records starting from the first.
+        pbar : bool
+            (Optional) If true (default), a progress bar will be displayed
+        agency : str
+            (Optional) Name of the agency to filter for. None value returns data for all agencies.
+        format_date : bool, optional
+            If True, known date columns (based on presence of date_field in datasets table or data type information provided by dataset owner) will be automatically formatted
+            to be pandas datetimes (or pandas Period in rare cases), by default True
+        columns : list
+            (Optional) Names of columns to load. Default is None (all columns)
+
+        Returns
+        -------
+        DataFrame generator
+            generates DataFrames containing nbatch records (last DataFrame may contain fewer)
+        '''
+
+        if ".zip" in self.url:
+            # Zip files are extracted in their entirety
+            yield from super().load_iter(nbatch, date=date, offset=offset, pbar=pbar, agency=agency, format_date=format_date, columns=columns, **kwargs)
+            return
+
+        logger.debug(f"Streaming file from {self.url} in batches of {nbatch} rows")
+        with self.__open() as resp:
+            try:
+                # Values are read as strings so that the column types and the date format can be inferred once 
+                # (from the first chunk) and applied to all chunks. Otherwise, read_csv infers them separately for each chunk.
+                reader = pd.read_csv(TqdmReader(resp, pbar=pbar), chunksize=nbatch, encoding_errors='surrogateescape', 
+                                     usecols=self.__usecols(columns), dtype=str)
+                yield from _iter_batches((_select_columns(df, columns) for df in self.__convert_chunks(reader, date, agency, format_date)), 
+                                         nbatch, offset)
+            except (urllib.error.HTTPError, pd.errors.ParserError) as e:
+                raise OPD_DataUnavailableError(*e.args, _url_error_msg.format(self.url))
+
+
+    def __convert_chunks(self, reader, date, agency, format_date):
+        types = None
+        date_format = None
+        for df in reader:
+            if types is None:
+                types = _infer_column_types(df)
+            df = _apply_column_types(df, types)
+
+            if date_format is None and pd.notnull(self.date_field) and self.date_field in df and types.get(self.date_field) is None and \
+                len(dates:=df[self.date_field].dropna())>0:
+                # Format of first date is used for the whole column (same as when all rows are converted at once)
+                date_format = guess_datetime_format(dates.iloc[0].strip()) or 'infer'
+
+            yield self.__filter(df, date, agency, format_date, None if date_format=='infer' else date_format)
+
+
+    def __filter(self, table, date, agency, format_date, date_format=None):
+        if len(table.columns)==1 and ('?xml' in table.columns[0] or re.search(r'^\<.+\>', table.columns[0])):
+            # Read data was not a CSV file. It was an error code or HTML
+            raise OPD_DataUnavailableError(table.iloc[0,0], _url_error_msg.format(self.url))
+
+        # filter_dataframe may modify date filter list in place
+        date = date.copy() if isinstance(date, list) else date
+        table = filter_dataframe(table, date_field=self.date_field, date_filter=date,
+            agency_field=self.agency_field, agency=agency, format_date=format_date, date_format=date_format)
+
+        if bool(self.query):
+            for k,v in self.query.items():
+                table = table[table[k]==v]
+
+        return table.reset_index(drop=True)
+
 
     def get_years(self, *, force=False, **kwargs):
         '''Get years contained in data set
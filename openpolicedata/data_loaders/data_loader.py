@@ -1,21 +1,31 @@
 from abc import ABC, abstractmethod
-import datetime
-from datetime import datetime
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import functools
 from io import BytesIO
+import itertools
 import numbers
 import json
+import numpy as np
 import pandas as pd
+import random
 import re
 import requests
+import threading
+import time
 from time import sleep
 from tqdm import tqdm
 import urllib
+from urllib.parse import urlparse
 import urllib3
 import warnings
+import weakref
 from zipfile import ZipFile
 
 from ..datetime_parser import to_datetime
-from ..exceptions import DateFilterException
+from ..exceptions import DateFilterException, OPD_TooManyRequestsError
 from .. import log, httpio
 from ..utils import is_str_number
 
@@ -33,12 +43,81 @@ _use_gpd_force = None
 # Default number of records to read per request
 _default_limit = 100000
 
+# Default number of threads used to request pages of data. 1 requests pages one at a time
+_default_max_workers = 1
+# Maximum number of simultaneous requests that will be made to a single host
+max_requests_per_host = 4
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+# Minimum number of seconds between the start of successive loads from a single host when loading multiple files or datasets
+min_request_interval = 0.5
+_host_last_request = {}
+# asyncio semaphores can only be used in a single event loop so they are stored per loop
+_async_host_semaphores = weakref.WeakKeyDictionary()
+
+# Block size and number of blocks to read ahead when reading from zip files on servers that support range requests
+_zip_block_size = 2**20
+_zip_prefetch = 4
+
 _url_error_msg = "There is likely an issue with the website. Open the URL {} with a web browser to confirm. " + \
                     "See a list of known site outages at https://github.com/openpolicedata/opd-data/blob/main/outages.csv"
 def _check_year(year):
     return isinstance(year, int) or (isinstance(year, str) and len(year)==4 and year.isdigit())
 
 
+def _get_host(url):
+    return urlparse(url if '://' in url else 'https://'+url).netloc
+
+
+def _get_host_semaphore(url):
+    # Semaphore shared by all loaders that limits the number of simultaneous requests to the host of url
+    host = _get_host(url)
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(max_requests_per_host)
+        return _host_semaphores[host]
+
+
+def _throttle_host(url, interval=None):
+    # Wait until at least interval seconds have passed since the previous call for the host of url. 
+    # Requests to different hosts do not wait on each other.
+    interval = min_request_interval if interval is None else interval
+    host = _get_host(url)
+    with _host_semaphores_lock:
+        now = time.monotonic()
+        start = max(now, _host_last_request.get(host, now-interval)+interval)
+        # Reserve the start time so that other threads wait for the following interval
+        _host_last_request[host] = start
+    if start>now:
+        sleep(start-now)
+
+
+def _get_async_host_semaphore(url):
+    # Semaphore shared by all asynchronous loads in the running event loop that limits the number of 
+    # simultaneous loads from the host of url
+    semaphores = _async_host_semaphores.setdefault(asyncio.get_running_loop(), {})
+    host = _get_host(url)
+    if host not in semaphores:
+        semaphores[host] = asyncio.Semaphore(max_requests_per_host)
+    return semaphores[host]
+
+
+async def _run_async(url, func, *args, executor=None, **kwargs):
+    # Run blocking load function func in a worker thread so that the event loop is free to start other loads.
+    # Loads are run in executor or the event loop's default executor if None. If url is None, the number
+    # of simultaneous loads is only limited by the executor.
+    async def run():
+        if executor is None:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        else:
+            return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args, **kwargs))
+        
+    if url is None:
+        return await run()
+    async with _get_async_host_semaphore(url):
+        return await run()
+
+
 def _process_date(date, date_field=None, force_year=False, datetime_format=None, is_date_string=False):
     if not isinstance(date, list):
         date = [date, date]
@@ -84,7 +163,7 @@ def _process_date(date, date_field=None, force_year=False, datetime_format=None,
     return start_date, stop_date
 
 
-def filter_dataframe(df, date_field=None, date_filter=None, agency_field=None, agency=None, format_date=True):
+def filter_dataframe(df, date_field=None, date_filter=None, agency_field=None, agency=None, format_date=True, date_format=None):
     '''Filter dataframe by agency and/or date range
     
     Parameters
@@ -104,6 +183,8 @@ def filter_dataframe(df, date_field=None, date_filter=None, agency_field=None, a
     format_date : bool, optional
         If True, known date columns (based on presence of date_field in datasets table or data type information provided by dataset owner) will be automatically formatted
         to be pandas datetimes (or pandas Period in rare cases), by default True
+    date_format : str, optional
+        Format of dates in date_field if they are strings. By default, the format is inferred
     '''
 
     if agency != None and agency_field != None:
@@ -122,7 +203,7 @@ def filter_dataframe(df, date_field=None, date_filter=None, agency_field=None, a
                 # To retain the old behavior, use either `df[df.columns[i]] = newvals` or, if columns are non-unique, `df.isetitem(i, newvals)`
                 logger.debug(f"Converting values in column {date_field} to datetime objects")
                 try:
-                    df[date_field] = to_datetime(df[date_field], ignore_errors=True)
+                    df[date_field] = to_datetime(df[date_field], ignore_errors=True, format=date_format)
                 except:
                     return df
     
@@ -170,7 +251,7 @@ def filter_dataframe(df, date_field=None, date_filter=None, agency_field=None, a
 
     return df
 
-def get_legacy_session():
+def _get_legacy_ssl_context():
     try:
         import ssl
     except:
@@ -178,8 +259,12 @@ def get_legacy_session():
                           " but is not for some Python versions like the one used by Jupyter Lite. To install, run 'pip install ssl'")
     ctx = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
     ctx.options |= 0x4  # OP_LEGACY_SERVER_CONNECT
+    return ctx
+
+
+def get_legacy_session():
     session = requests.session()
-    session.mount('https://', CustomHttpAdapter(ctx))
+    session.mount('https://', CustomHttpAdapter(_get_legacy_ssl_context()))
     return session
 
 
@@ -195,13 +280,147 @@ class CustomHttpAdapter (requests.adapters.HTTPAdapter):
         self.poolmanager = urllib3.poolmanager.PoolManager(
             num_pools=connections, maxsize=maxsize,
             block=block, ssl_context=self.ssl_context)
-        
+
+
+class SessionPool:
+    """Shared sessions used for all requests made by data loaders. Connections to each host are kept alive between
+    requests so that successive requests to the same host (i.e. count queries followed by pages of data) do not
+    each require a new TCP connection and TLS handshake.
+
+    Parameters
+    ----------
+    pool_connections : int
+        (Optional) Number of hosts whose connections are kept open. Default: 20
+    pool_maxsize : int
+        (Optional) Maximum number of open connections kept for each host. Default: data_loader.max_requests_per_host 
+        at the time that the first session is created
+    host_pool_sizes : dict
+        (Optional) Maximum number of open connections kept for specific hosts (i.e. {'services.arcgis.com':8}). 
+        Overrides pool_maxsize for these hosts
+
+    Methods
+    -------
+    get_session(legacy=False)
+        Get shared session
+    mount(session, legacy=False)
+        Use shared connections for an existing session
+    set_host_pool_size(host, size)
+        Set maximum number of open connections kept for a host
+    close()
+        Close all connections
+    """
+
+    def __init__(self, pool_connections=20, pool_maxsize=None, host_pool_sizes=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.host_pool_sizes = dict(host_pool_sizes) if host_pool_sizes else {}
+        self._adapters = {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+
+    def __get_adapter(self, legacy, host=None):
+        key = (legacy, host)
+        if key not in self._adapters:
+            maxsize = self.host_pool_sizes[host] if host else (self.pool_maxsize or max_requests_per_host)
+            connections = 1 if host else self.pool_connections
+            if legacy:
+                # Allows unsafe legacy renegotiation, which is required by some servers
+                adapter = CustomHttpAdapter(_get_legacy_ssl_context(), pool_connections=connections, pool_maxsize=maxsize)
+            else:
+                adapter = requests.adapters.HTTPAdapter(pool_connections=connections, pool_maxsize=maxsize)
+            self._adapters[key] = adapter
+        return self._adapters[key]
+
+
+    def __mount(self, session, legacy):
+        session.mount('https://', self.__get_adapter(legacy))
+        if not legacy:
+            session.mount('http://', self.__get_adapter(legacy))
+        for host in self.host_pool_sizes:
+            # Adapter with the longest matching prefix is used
+            session.mount(f'https://{host}', self.__get_adapter(legacy, host))
+            if not legacy:
+                session.mount(f'http://{host}', self.__get_adapter(legacy, host))
+
+
+    def get_session(self, legacy=False):
+        '''Get shared session
+
+        Parameters
+        ----------
+        legacy : bool
+            (Optional) If True, the session allows unsafe legacy SSL renegotiation, which is required by some servers. Default: False
+
+        Returns
+        -------
+        requests.Session
+            Shared session. The session should not be closed by the caller.
+        '''
+        with self._lock:
+            if legacy not in self._sessions:
+                session = requests.Session()
+                self.__mount(session, legacy)
+                self._sessions[legacy] = session
+            return self._sessions[legacy]
+
+
+    def mount(self, session, legacy=False):
+        '''Use shared connections for an existing session (i.e. one created by a 3rd party client). Other settings 
+        of the session such as headers and authentication are unchanged.
+
+        Parameters
+        ----------
+        session : requests.Session
+            Session
+        legacy : bool
+            (Optional) If True, unsafe legacy SSL renegotiation is allowed. Default: False
+        '''
+        with self._lock:
+            self.__mount(session, legacy)
+
+
+    def set_host_pool_size(self, host, size):
+        '''Set maximum number of open connections kept for a host. Applies to shared sessions and sessions 
+        subsequently passed to mount.
+
+        Parameters
+        ----------
+        host : str
+            Host name (i.e. services.arcgis.com)
+        size : int
+            Maximum number of open connections
+        '''
+        with self._lock:
+            for legacy in [False, True]:
+                if (adapter:=self._adapters.pop((legacy, host), None)) is not None:
+                    adapter.close()
+            self.host_pool_sizes[host] = size
+            for legacy, session in self._sessions.items():
+                self.__mount(session, legacy)
+
+
+    def close(self):
+        '''Close all connections. Sessions are recreated as needed by subsequent requests.
+        '''
+        with self._lock:
+            for adapter in self._adapters.values():
+                adapter.close()
+            self._adapters.clear()
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# Sessions used for all requests made by data loaders
+session_pool = SessionPool()
+
 
 class UrlIoContextManager:
     def __init__(self, url) -> None:
         self.url = url
         try:
-            self.file = httpio.open(url)
+            self.file = httpio.open(url, block_size=_zip_block_size, prefetch=_zip_prefetch, max_workers=_zip_prefetch)
             self.ishttp = True
         except httpio.HTTPIOError:
             open_url =  urllib.request.urlopen(url)
@@ -217,7 +436,7 @@ class UrlIoContextManager:
         
 
 def download_zip_and_extract(url, block_size, pbar=True):
-    r = requests.get(url, stream=True)
+    r = _get(url, stream=True)
     r.raise_for_status()
     total_size = int(r.headers.get("Content-Length", 0))
     pbar = pbar and total_size > block_size
@@ -254,6 +473,102 @@ def download_zip_and_extract(url, block_size, pbar=True):
 
     return zip_data
 
+def _iter_batches(tables, nbatch, offset=0):
+    # Combine/split an iterable of DataFrames into DataFrames containing nbatch rows (the last may contain fewer),
+    # skipping the first offset rows
+    buffer = []
+    nbuffer = 0
+    for df in tables:
+        if offset>0:
+            nskip = min(offset, len(df))
+            df = df.iloc[nskip:]
+            offset-=nskip
+        if len(df)==0:
+            continue
+
+        buffer.append(df)
+        nbuffer+=len(df)
+        while nbuffer>=nbatch:
+            df = pd.concat(buffer) if len(buffer)>1 else buffer[0]
+            yield df.iloc[:nbatch].reset_index(drop=True)
+            df = df.iloc[nbatch:]
+            buffer = [df] if len(df)>0 else []
+            nbuffer = len(df)
+
+    if nbuffer>0:
+        df = pd.concat(buffer) if len(buffer)>1 else buffer[0]
+        yield df.reset_index(drop=True)
+
+def _select_columns(df, columns):
+    # Keep only requested columns. Geometry column of GeoDataFrames is always kept.
+    if columns is None or not isinstance(df, pd.DataFrame) or len(df.columns)==0:
+        return df
+    
+    missing = [x for x in columns if x not in df.columns]
+    if len(missing)>0:
+        raise ValueError(f"Requested columns {missing} not found in data. Available columns are {df.columns.tolist()}")
+    
+    keep = list(columns)
+    if _has_gpd and isinstance(df, gpd.GeoDataFrame) and (geo_col:=df._geometry_column_name) in df.columns and geo_col not in keep:
+        keep.append(geo_col)
+    return df[keep]
+
+def _points_from_xy(x, y, missing=None):
+    # Vectorized construction of point geometry from arrays of coordinates. Points where missing is True are set to None.
+    geometry = gpd.points_from_xy(x, y)
+    if missing is not None and missing.any():
+        geometry[missing] = None
+    return geometry
+
+
+def _page_to_columns(records, numeric_cols=()):
+    # Convert a page of records to typed column arrays as soon as it is received so that the decoded JSON of the page
+    # can be freed before the next page is requested. Columns that the source's field type information identifies as 
+    # numeric are converted directly to numeric arrays (float if any values are null). The dtypes of other columns are 
+    # inferred from their values. Returns the number of records and a dictionary of column arrays.
+    names = {}
+    for r in records:
+        names.update(dict.fromkeys(r))
+
+    numeric_cols = set(numeric_cols)
+    columns = {}
+    for name in names:
+        values = [r.get(name) for r in records]
+        arr = None
+        if name in numeric_cols:
+            try:
+                arr = np.array(values, dtype=float) if None in values else np.array(values)
+            except (TypeError, ValueError):
+                pass
+            if arr is not None and arr.dtype.kind not in 'iuf':
+                arr = None
+        columns[name] = pd.Series(values) if arr is None else pd.Series(arr, copy=False)
+
+    return len(records), columns
+
+
+def _concat_pages(pages):
+    # Combine column arrays of pages created by _page_to_columns into a DataFrame. Each column is combined separately
+    # and its arrays are removed from pages as it is combined so that the arrays of each column are only in memory
+    # twice while the column is combined instead of the arrays of all columns.
+    pages = [x for x in pages if x[0]>0]
+    if len(pages)==0:
+        return pd.DataFrame()
+    
+    names = {}
+    for _, columns in pages:
+        names.update(dict.fromkeys(columns))
+
+    data = {}
+    for name in names:
+        # Column is null for pages that do not contain it
+        parts = [columns.pop(name) if name in columns else pd.Series(np.nan, index=range(nrows)) for nrows, columns in pages]
+        data[name] = parts[0] if len(parts)==1 else pd.concat(parts, ignore_index=True)
+        del parts
+
+    return pd.DataFrame(data, copy=False)
+
+
 def str2json(json_str):
     if pd.isnull(json_str):
         return {}
@@ -263,19 +578,336 @@ def str2json(json_str):
     json_str = json_str.replace('“','"').replace('”','"')
     return json.loads(json_str)
 
+# Statistics that can be requested by aggregate and the corresponding pandas groupby method
+_agg_stats = {"count":"count", "sum":"sum", "min":"min", "max":"max", "avg":"mean"}
+# Name of column containing year when aggregating by year
+_agg_year_col = "year"
+
+def _parse_metrics(metrics):
+    # Converts metrics (i.e. ["count", "avg(age)"]) to list of (statistic, column, output name). 
+    # Column is None for count of records.
+    metrics = ["count"] if metrics is None else ([metrics] if isinstance(metrics, str) else metrics)
+    if len(metrics)==0:
+        raise ValueError("At least 1 metric is required")
+    parsed = []
+    for m in metrics:
+        if m.strip().lower() in ["count", "count(*)"]:
+            parsed.append(("count", None, "count"))
+        elif (match:=re.search(r'^\s*(?P<stat>[A-Za-z]+)\((?P<col>.+)\)\s*$', m)) and match['stat'].lower() in _agg_stats:
+            stat = match['stat'].lower()
+            col = match['col'].strip()
+            parsed.append((stat, col, f"{stat}_{col}"))
+        else:
+            raise ValueError(f"Unknown metric {m}. Metrics should be 'count' or one of {list(_agg_stats.keys())} "+
+                             "applied to a column (i.e. 'avg(age)')")
+    return parsed
+
+
+def _format_aggregate(df, group_by, metrics, by_year=False):
+    # Ensure that aggregated data has the same format regardless of the data loader
+    keys = group_by + ([_agg_year_col] if by_year else [])
+    names = [x[2] for x in metrics]
+    df = pd.DataFrame(df, columns=keys+names) if len(df)==0 else df[keys+names]
+    for k in names:
+        df[k] = pd.to_numeric(df[k], errors='coerce')
+    if by_year:
+        df[_agg_year_col] = pd.to_numeric(df[_agg_year_col], errors='coerce').astype("Int64")
+    if len(keys)>0:
+        try:
+            df = df.sort_values(keys, na_position='last')
+        except TypeError:
+            # Mixed types in group columns
+            pass
+    return df.reset_index(drop=True)
+
+
+def _aggregate_dataframe(df, group_by, metrics, year_field=None):
+    # Local groupby used for data sets that cannot be aggregated by the server
+    keys = list(group_by)
+    if year_field:
+        dts = df[year_field]
+        if pd.api.types.is_numeric_dtype(dts):
+            years = dts
+        else:
+            years = dts if hasattr(dts, "dt") else to_datetime(dts, ignore_errors=True)
+            years = years.dt.year
+        df = df.assign(**{_agg_year_col:years})
+        keys.append(_agg_year_col)
+
+    if len(keys)==0:
+        df = df.assign(_opd_group=0)
+        grouped = df.groupby("_opd_group")
+    else:
+        grouped = df.groupby(keys, dropna=False)
+
+    result = {}
+    for stat, col, name in metrics:
+        if col is None:
+            result[name] = grouped.size()
+        else:
+            result[name] = getattr(grouped[col], _agg_stats[stat])()
+
+    result = pd.DataFrame(result)
+    result = result.reset_index(drop=len(keys)==0)
+    if len(keys)==0 and len(result)==0:
+        # No records
+        result = pd.DataFrame({name:[0 if stat in ["count","sum"] else None] for stat,_,name in metrics})
+    return _format_aggregate(result, group_by, metrics, year_field is not None)
+
 sleep_time = 0.1
 
+class CountCache:
+    """Cache of record counts shared by all data loaders in the current process
+
+    Parameters
+    ----------
+    ttl : int or float
+        Number of seconds that a count is valid for. None indicates that counts do not expire
+    hits : int
+        Number of requested counts found in the cache
+    misses : int
+        Number of requested counts not found in the cache
+
+    Methods
+    -------
+    get(key)
+        Get cached value. Returns None if not found or expired
+    put(key, value)
+        Store value in cache
+    clear()
+        Remove all values from cache and reset statistics
+    stats()
+        Get cache statistics
+    """
+
+    def __init__(self, ttl=15*60):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._values:
+                created, value = self._values[key]
+                if self.ttl is None or time.time()-created <= self.ttl:
+                    self.hits+=1
+                    return value
+                else:
+                    self._values.pop(key)
+
+            self.misses+=1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._values[key] = (time.time(), value)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        '''Get cache statistics
+
+        Returns
+        -------
+        dict
+            Number of hits, misses, and stored counts
+        '''
+        with self._lock:
+            return {"hits":self.hits, "misses":self.misses, "size":len(self._values)}
+
+# Counts are requested repeatedly (i.e. for each batch in Source.load_iter and when finding years in get_years)
+# so share them across loader instances
+count_cache = CountCache()
+
+
+class RetryPolicy:
+    """Policy for retrying requests that fail due to transient errors (i.e. too many requests, server unavailable, 
+    or dropped connections)
+
+    Parameters
+    ----------
+    max_attempts : int
+        Maximum number of attempts of a request (including the first). 1 disables retries
+    backoff : float
+        Number of seconds to wait before the first retry. The wait doubles for each subsequent retry
+    max_backoff : float
+        Maximum number of seconds to wait before a retry
+    jitter : bool
+        If True, wait times are randomly scaled between 50% and 150% so that simultaneous requests do not all retry at once
+    status_codes : list[int]
+        HTTP status codes that will be retried
+
+    Methods
+    -------
+    get(url, session=None, **kwargs)
+        Make GET request, retrying on retryable status codes and connection errors
+    call(func, *args, **kwargs)
+        Call func, retrying if it raises a retryable error
+    get_delay(attempt, response=None)
+        Number of seconds to wait before retrying after attempt number attempt (starting from 0)
+    """
+
+    def __init__(self, max_attempts=4, backoff=1.0, max_backoff=60.0, jitter=True, status_codes=(429, 500, 502, 503, 504)):
+        if max_attempts<1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_codes = list(status_codes)
+
+    def get_delay(self, attempt, response=None):
+        '''Number of seconds to wait before retrying. The Retry-After header of the response is used if available.
+
+        Parameters
+        ----------
+        attempt : int
+            Number of the attempt that failed (starting from 0)
+        response : requests.Response, optional
+            Response of failed request
+
+        Returns
+        -------
+        float
+            Number of seconds to wait
+        '''
+        if response is not None and (retry_after:=response.headers.get("Retry-After")) is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    # Retry-After can also be an HTTP date
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0), self.max_backoff)
+
+        delay = min(self.backoff * 2**attempt, self.max_backoff)
+        if self.jitter:
+            delay *= random.uniform(0.5, 1.5)
+        return delay
+
+    def is_retryable(self, error):
+        '''Whether error is due to a transient error that should be retried
+
+        Parameters
+        ----------
+        error : Exception
+            Error raised by request
+
+        Returns
+        -------
+        bool
+        '''
+        if isinstance(error, OPD_TooManyRequestsError):
+            return True
+        if isinstance(error, requests.exceptions.SSLError):
+            # Retrying will not fix SSL errors
+            return False
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return error.response.status_code in self.status_codes
+        return False
+
+    def get(self, url, session=None, **kwargs):
+        '''Make GET request. Requests with a retryable status code or connection error are retried.
+
+        Parameters
+        ----------
+        url : str
+            URL to request
+        session : requests.Session, optional
+            Session to use for request. Default: requests.get is used
+
+        **kwargs are passed to get
+
+        Returns
+        -------
+        requests.Response
+            Response of the last attempt. Errors due to the status code are not raised.
+        '''
+        getter = session.get if session is not None else requests.get
+        for attempt in range(self.max_attempts):
+            try:
+                r = getter(url, **kwargs)
+            except Exception as e:
+                if attempt==self.max_attempts-1 or not self.is_retryable(e):
+                    raise
+                delay = self.get_delay(attempt)
+                logger.debug(f"Request to {url} failed ({type(e).__name__}). Retrying in {delay:.1f} seconds")
+            else:
+                if attempt==self.max_attempts-1 or r.status_code not in self.status_codes:
+                    return r
+                delay = self.get_delay(attempt, r)
+                logger.debug(f"Request to {url} returned status code {r.status_code}. Retrying in {delay:.1f} seconds")
+                r.close()
+            sleep(delay)
+
+    def call(self, func, *args, **kwargs):
+        '''Call func. func is called again if it raises a retryable error.
+
+        Parameters
+        ----------
+        func : Callable
+            Function to call
+
+        *args and **kwargs are passed to func
+
+        Returns
+        -------
+        Return value of func
+        '''
+        for attempt in range(self.max_attempts):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt==self.max_attempts-1 or not self.is_retryable(e):
+                    raise
+                response = e.response if isinstance(e, requests.exceptions.RequestException) else None
+                delay = self.get_delay(attempt, response)
+                logger.debug(f"{type(e).__name__} raised. Retrying in {delay:.1f} seconds")
+            sleep(delay)
+
+# Retry policy used for all requests made by data loaders. Set to RetryPolicy(max_attempts=1) to disable retries.
+retry_policy = RetryPolicy()
+
+def _get(url, session=None, retry=True, **kwargs):
+    # GET request using the current retry policy. Shared session is used by default so that connections are reused.
+    # Set retry to False when the caller retries the request itself so that retries do not multiply
+    session = session if session is not None else session_pool.get_session()
+    if not retry:
+        return session.get(url, **kwargs)
+    return retry_policy.get(url, session=session, **kwargs)
+
+def _call_with_retry(func, *args, **kwargs):
+    return retry_policy.call(func, *args, **kwargs)
+
+def _is_retryable(e):
+    return retry_policy.is_retryable(e)
+
 class Data_Loader(ABC):
     """Base class for data loaders
 
     Methods
     -------
-    load(date=None, nrows=None, pbar=True, agency=None, opt_filter=None, select=None, output_type=None)
+    load(date=None, nrows=None, pbar=True, agency=None, opt_filter=None, select=None, output_type=None, columns=None)
         Load data for query
+    load_iter(nbatch, date=None, offset=0, pbar=True, agency=None, opt_filter=None, force=False)
+        Generator that loads data for query in batches
     get_count(date=None, agency=None, force=False, opt_filter=None, where=None)
         Get number of records/rows generated by query
-    get_years(nrows=1)
+    get_years(nrows=1, check=None, max_workers=None)
         Get years contained in data set
+    aggregate(group_by=None, metrics=None, date=None, by_year=False, agency=None, opt_filter=None)
+        Group records and calculate statistics for each group
     """
 
     _last_count = None
@@ -284,21 +916,93 @@ class Data_Loader(ABC):
     def isfile(self):
         pass
 
+    def _count_key(self, *args):
+        # Key for count_cache for the request defined by args. Includes all attributes that the where clause depends on.
+        return json.dumps([type(self).__name__, self.url, getattr(self, 'data_set', None), getattr(self, 'query', None), 
+                           getattr(self, 'date_field', None), getattr(self, 'agency_field', None)] + list(args), 
+                          sort_keys=True, default=str)
+
     @abstractmethod
     def get_count(self, date=None, *, agency=None, force=False, opt_filter=None, where=None):
         pass
 
     @abstractmethod
-    def load(self, date=None, nrows=None, offset=0, *, pbar=True, agency=None, opt_filter=None, select=None, output_type=None, format_date=True):
+    def load(self, date=None, nrows=None, offset=0, *, pbar=True, agency=None, opt_filter=None, select=None, output_type=None, format_date=True, 
+             columns=None):
         pass
 
-    def get_years(self, *, nrows=1, check=None, **kwargs):
+    async def aload(self, *args, executor=None, **kwargs):
+        '''Asynchronous version of load. Inputs other than executor are passed to load. 
+
+        Data is requested in a worker thread so that a single event loop can load many datasets concurrently. 
+        The number of simultaneous loads from a single host is limited by data_loaders.data_loader.max_requests_per_host.
+        The total number of simultaneous loads is limited by the number of worker threads of executor.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor
+            (Optional) Executor to run load in. Default: the event loop's default executor, which has 
+            min(32, os.cpu_count() + 4) worker threads
+
+        Returns
+        -------
+        pandas or geopandas DataFrame
+            DataFrame returned by load
+        '''
+        return await _run_async(self.url, self.load, *args, executor=executor, **kwargs)
+
+    def load_iter(self, nbatch, date=None, offset=0, *, pbar=True, agency=None, opt_filter=None, force=False, **kwargs):
+        '''Generator that loads data in batches
+        
+        Parameters
+        ----------
+        nbatch : int
+            Number of records to load in each batch
+        date : int or a length 2 list of start and stop year(s), date string(s), and/or timestamp(s)
+            (Optional) Define timespan of data to request:
+                1. Request data for an entire year by inputting the year (i.e. 2023)
+                2. Request data from a start year or datetime to a stop year or datetime using a length 2 list (i.e. [2021, '2023-02-01'] for start of 2021 to end of 2023-02-01)
+        offset - int
+            (Optional) Number of records to offset from first record. Default is 0 to return records starting from the first.
+        pbar : bool
+            (Optional) If true (default), a progress bar will be displayed
+        agency : str
+            (Optional) Name of the agency to filter for. None value returns data for all agencies.
+        opt_filter : str
+            (Optional) Additional filter to apply to data (beyond any date filter specified by self.date_field and date)
+        force : bool
+            (Optional) Passed to get_count for data that is not file-based
+
+        **kwargs are passed to load
+
+        Returns
+        -------
+        DataFrame generator
+            generates DataFrames containing nbatch records (last DataFrame may contain fewer)
+        '''
+
+        if self.isfile():
+            # The file needs to be read in its entirety so only read it once
+            yield from _iter_batches([self.load(date=date, offset=offset, pbar=pbar, agency=agency, opt_filter=opt_filter, **kwargs)], nbatch)
+        else:
+            count = self.get_count(date=date, agency=agency, opt_filter=opt_filter, force=force)
+            for k in range(offset, count, nbatch):
+                yield self.load(date=date, nrows=min(nbatch, count-k), offset=k, pbar=pbar, agency=agency, opt_filter=opt_filter, **kwargs)
+
+
+    def get_years(self, *, nrows=1, check=None, max_workers=None, **kwargs):
         '''Get years contained in data set
         
         Parameters
         ----------
         nrows : int
             (Optional) Number of records to load when checking each year
+        check : list
+            (Optional) If set, only these years will be checked
+        max_workers : int
+            (Optional) Number of year counts to request simultaneously if years cannot be found with a single 
+            grouped query. Requests are also limited by the maximum number of simultaneous requests per host 
+            (max_requests_per_host). Default is max_requests_per_host. 1 requests counts one at a time
             
         Returns
         -------
@@ -313,38 +1017,123 @@ class Data_Loader(ABC):
 
         if check_input and len(check)==0:
             return []
+        
+        cur_year = datetime.now().year
+        try:
+            years = self._get_years_grouped()
+        except Exception as e:
+            logger.debug(f"Unable to get years with a grouped query: {e}")
+            years = None
+
+        if years is not None:
+            years = [y for y in years if y<=cur_year and (not check_input or y in check)]
+            years.sort(reverse=True)
+            return years
 
         if check_input:
-            check = check.copy()
-            check.sort(reverse=True)
-            year = check.pop(0)
+            candidates = iter(sorted(check, reverse=True))
         else:
-            year = datetime.date.today().year
+            candidates = itertools.count(cur_year, -1)
+
+        max_workers = max_workers if max_workers else max_requests_per_host
+        host_semaphore = _get_host_semaphore(self.url)
+        def get_count(year):
+            with host_semaphore:
+                count = self.get_count(date=year)
+                sleep(sleep_time)
+            return count
 
         oldest_recent = 20
         max_misses_gap = 10
         max_misses = oldest_recent
         misses = 0
         years = []
-        while misses < max_misses:
-            count = self.get_count(date=year)
-
-            if count==0:  # If doesn't have len attribute, it is None
-                misses+=1
-            else:
-                misses = 0
-                max_misses = max_misses_gap
-                years.append(year)
+        pending = []
+        executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers>1 else None
+        try:
+            while misses < max_misses:
+                if len(pending)==0:
+                    # Request the counts that will be needed regardless of the results. If a year is found, only 
+                    # max_misses_gap more years may be checked
+                    new_years = list(itertools.islice(candidates, min(max_misses-misses, max_misses_gap)))
+                    if len(new_years)==0:
+                        break
+                    if executor and len(years)+misses==0:
+                        # Run 1st request alone in case loader initializes information about the date field
+                        pending = [(new_years[0], get_count(new_years[0]))]
+                        new_years = new_years[1:]
+                    if executor:
+                        pending.extend([(y, executor.submit(get_count, y)) for y in new_years])
+                    else:
+                        pending.extend([(y, None) for y in new_years])
 
-            sleep(sleep_time)
+                year, count = pending.pop(0)
+                if count is None:
+                    count = get_count(year)
+                elif not isinstance(count, numbers.Number):
+                    count = count.result()
 
-            year-=1
-            if check_input:
-                if len(check)==0:
-                    break
-                while year not in check:
-                    year-=1
-                check.remove(year)
+                if count==0:  # If doesn't have len attribute, it is None
+                    misses+=1
+                else:
+                    misses = 0
+                    max_misses = max_misses_gap
+                    years.append(year)
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
 
         return years
+
+
+    def aggregate(self, group_by=None, metrics=None, date=None, *, by_year=False, agency=None, opt_filter=None, pbar=True, **kwargs):
+        '''Group records and calculate statistics for each group. By default, the data is loaded and 
+        grouped locally. Loaders whose backend supports grouped queries override this so that only the 
+        results are downloaded.
+        
+        Parameters
+        ----------
+        group_by : str or list
+            (Optional) Column(s) to group by. If None, statistics are calculated for all records
+        metrics : str or list
+            (Optional) Statistics to calculate: 'count' for the number of records or 'count', 'sum', 'min', 'max', 
+            or 'avg' applied to a column (i.e. 'avg(age)'). Default is 'count'
+        date : int or a length 2 list of start and stop year(s), date string(s), and/or timestamp(s)
+            (Optional) Define timespan of data to request:
+                1. Request data for an entire year by inputting the year (i.e. 2023)
+                2. Request data from a start year or datetime to a stop year or datetime using a length 2 list (i.e. [2021, '2023-02-01'] for start of 2021 to end of 2023-02-01)
+        by_year : bool
+            (Optional) If True, records are also grouped by the year of the date field. Year is output to the 'year' column
+        agency : str
+            (Optional) Name of the agency to filter for. None value returns data for all agencies.
+        opt_filter : str
+            (Optional) Additional filter to apply to data (beyond any date filter specified by self.date_field and date)
+        pbar : bool
+            (Optional) If true (default), a progress bar will be displayed if data is loaded
+
+        Returns
+        -------
+        pandas DataFrame
+            DataFrame containing group_by columns (and year column if by_year is True) followed by 1 column for each metric. 
+            Count columns are named 'count' (number of records) or '{statistic}_{column}' (i.e. 'avg_age')
+        '''
+
+        group_by, metrics = self._check_aggregate_inputs(group_by, metrics, by_year)
+        logger.debug(f"Loading data from {self.url} to aggregate locally")
+        df = self.load(date=date, agency=agency, opt_filter=opt_filter, pbar=pbar, **kwargs)
+        return _aggregate_dataframe(df, group_by, metrics, self.date_field if by_year else None)
+
+
+    def _check_aggregate_inputs(self, group_by, metrics, by_year):
+        group_by = [] if group_by is None else ([group_by] if isinstance(group_by, str) else list(group_by))
+        if by_year and pd.isnull(self.date_field):
+            raise ValueError("A date field is required to aggregate by year")
+        return group_by, _parse_metrics(metrics)
+
+
+    def _get_years_grouped(self):
+        # Get all years in data set with a single query that groups records by year. Loaders whose
+        # backend supports grouped queries override this. None indicates that grouping is unavailable
+        # and the years will be found by requesting the count for each year.
+        return None
  
\ No newline at end of file
@@ -7,14 +7,14 @@ from pandas.api.types import is_numeric_dtype
 from pandas.api.types import is_datetime64_any_dtype as is_datetime
 from rapidfuzz import fuzz
 import re
-import requests
 import tempfile
 import urllib
 import warnings
 from xlrd.biffh import XLRDError
 from zipfile import ZipFile
 
-from .data_loader import Data_Loader, UrlIoContextManager, _url_error_msg, get_legacy_session, filter_dataframe
+from .data_loader import Data_Loader, UrlIoContextManager, _url_error_msg, session_pool, filter_dataframe, _select_columns, _get, \
+    _zip_block_size, _zip_prefetch
 from .. import dataset_id, log, httpio
 from ..exceptions import OPD_DataUnavailableError
 
@@ -101,7 +101,7 @@ class Excel(Data_Loader):
                     'Sec-Fetch-User': '?1',
                 }
                 for k, h in enumerate([headers, headers2]):
-                    r = requests.get(self.url, stream=True, headers=h)
+                    r = _get(self.url, stream=True, headers=h)
                     try:
                         r.raise_for_status()
                         break
@@ -114,9 +114,7 @@ class Excel(Data_Loader):
                 raise OPD_DataUnavailableError(*e.args, _url_error_msg.format(self.url))
         except urllib.error.URLError as e:
             if "[SSL: UNSAFE_LEGACY_RENEGOTIATION_DISABLED] unsafe legacy renegotiation disabled" in str(e.args[0]):
-                with get_legacy_session() as session:
-                    r = session.get(self.url)
-                    
+                r = _get(self.url, session=session_pool.get_session(legacy=True))
                 r.raise_for_status()
                 file_like = BytesIO(r.content)
                 self.excel_file = pd.ExcelFile(file_like)
@@ -133,7 +131,7 @@ class Excel(Data_Loader):
                     raise ImportError(f"{self.url} is encrypted. OpenPoliceData may be able to open it if msoffcrypto-tool " + 
                         "(https://pypi.org/project/msoffcrypto-tool/) is installed (pip install msoffcrypto-tool)")
                 # Download file to temporary file
-                r = requests.get(self.url)
+                r = _get(self.url)
                 r.raise_for_status()
                 # https://stackoverflow.com/questions/22789951/xlrd-error-workbook-is-encrypted-python-3-2-3
                 fp_decrypt = tempfile.TemporaryFile(suffix=".xls")
@@ -241,7 +239,7 @@ class Excel(Data_Loader):
         return names, False
 
 
-    def load(self, date=None, nrows=None, offset=0, *, agency=None, format_date=True, _first_time=True, **kwargs):
+    def load(self, date=None, nrows=None, offset=0, *, agency=None, format_date=True, columns=None, _first_time=True, **kwargs):
         '''Download Excel file to pandas DataFrame
         
         Parameters
@@ -259,6 +257,9 @@ class Excel(Data_Loader):
         format_date : bool, optional
             If True, known date columns (based on presence of date_field in datasets table or data type information provided by dataset owner) will be automatically formatted
             to be pandas datetimes (or pandas Period in rare cases), by default True
+        columns : list
+            (Optional) Names of columns to return. Column names are found after reading each sheet so all columns are read 
+            but only these are returned. Default is None (all columns)
             
         Returns
         -------
@@ -347,7 +348,7 @@ class Excel(Data_Loader):
                 self.url=='https://data-openjustice.doj.ca.gov/sites/default/files/dataset/2023-12/RIPA-Stop-Data-2022.zip':
                 # According to https://data-openjustice.doj.ca.gov/sites/default/files/dataset/2024-01/RIPA Dataset Read Me 2022.pdf,
                 # cases need to be added in that did not originally upload
-                with httpio.open(self.url) as fp:
+                with httpio.open(self.url, block_size=_zip_block_size, prefetch=_zip_prefetch, max_workers=_zip_prefetch) as fp:
                     with ZipFile(fp) as z:
                         df = pd.read_excel(BytesIO(z.read('12312022 Supplement RIPA SD.xlsx')))
 
@@ -382,7 +383,7 @@ class Excel(Data_Loader):
             logger.debug(f"Extracting the first {nrows} rows")
             table = table.head(nrows)
 
-        return table
+        return _select_columns(table, columns)
 
 
     def __check_sheet(self, cur_sheet, sheets):
@@ -543,7 +544,7 @@ class Excel(Data_Loader):
             if sum([pd.notnull(x) for x in new_cols]) / len(new_cols) < 0.2 and \
                 df.iloc[col_row+1].apply(lambda x: isinstance(x,str)).all():  # Most columns are null. Check if the next rows is all strings
                 # There are likely multiple rows of columns
-                r = requests.get(self.url)
+                r = _get(self.url)
                 r.raise_for_status()
                 wb = openpyxl.load_workbook(BytesIO(r.content))
                 if sheet_name:
@@ -1,6 +1,6 @@
 import pandas as pd
 
-from .data_loader import Data_Loader, filter_dataframe
+from .data_loader import Data_Loader, filter_dataframe, _select_columns
 from ..datetime_parser import to_datetime
 from .. import log
 
@@ -94,7 +94,7 @@ class Html(Data_Loader):
         return count
 
 
-    def load(self, date=None, nrows=None, offset=0, *, pbar=True, agency=None, format_date=True, **kwargs):
+    def load(self, date=None, nrows=None, offset=0, *, pbar=True, agency=None, format_date=True, columns=None, **kwargs):
         '''Download HTML file to pandas DataFrame
         
         Parameters
@@ -114,6 +114,8 @@ class Html(Data_Loader):
         format_date : bool, optional
             If True, known date columns (based on presence of date_field in datasets table or data type information provided by dataset owner) will be automatically formatted
             to be pandas datetimes (or pandas Period in rare cases), by default True
+        columns : list
+            (Optional) Names of columns to return. Default is None (all columns)
             
         Returns
         -------
@@ -160,7 +162,7 @@ class Html(Data_Loader):
             logger.debug(f"Extracting the first {nrows} rows")
             table = table.head(nrows)
 
-        return table
+        return _select_columns(table, columns)
 
     def get_years(self, *, force=False, **kwargs):
         '''Get years contained in data set
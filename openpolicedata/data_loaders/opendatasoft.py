@@ -1,13 +1,14 @@
+from io import BytesIO
 import warnings
 import pandas as pd
 import requests
 import urllib3
 
-from .data_loader import Data_Loader, str2json, _url_error_msg, _process_date
+from .data_loader import Data_Loader, str2json, _url_error_msg, _process_date, count_cache, _agg_year_col, _format_aggregate, _get
 from .csv_class import TqdmReader
 from ..datetime_parser import to_datetime
 from ..exceptions import OPD_DataUnavailableError
-from .. import log
+from .. import cache, log
 
 logger = log.get_logger()
 
@@ -98,20 +99,21 @@ class Opendatasoft(Data_Loader):
             Record count or number of rows in data request
         '''
 
-        if self._last_count is not None and self._last_count[0]==date:
+        count_key = self._count_key(date)
+        if (cached_count:=count_cache.get(count_key)) is not None:
             logger.debug("Request matches previous count request. Returning saved count.")
-            return self._last_count[1]
+            return cached_count[0]
         else:
             where = self.__construct_where(date)
             json = self.__request(where=where, return_count=True)
             count = json["total_count"]
 
-        self._last_count = (date, count, where)
+        count_cache.put(count_key, (count, where))
 
         return count
 
 
-    def __request(self, where=None, return_count=False, out_fields="*", out_type='csv', offset=0, count=None, pbar=False, sortby=None):
+    def __request(self, where=None, return_count=False, out_fields="*", out_type='csv', offset=0, count=None, pbar=False, sortby=None, group_by=None):
 
         query = ""
         params = {}
@@ -124,6 +126,8 @@ class Opendatasoft(Data_Loader):
 
             if sortby:
                 params['order_by'] = sortby
+            if group_by:
+                params['group_by'] = group_by
 
         if where != None:
             query+=where
@@ -154,8 +158,11 @@ class Opendatasoft(Data_Loader):
         for k,v in params.items():
             logger.debug(f"\t{k} = {v}")
 
-        if return_count:
-            r = requests.get(url, params=params)
+        if return_count or out_type.lower()=='json':
+            if (result:=cache.get_json(url, params)) is not None:
+                return result
+            
+            r = _get(url, params=params)
 
             try:
                 r.raise_for_status()
@@ -169,7 +176,10 @@ class Opendatasoft(Data_Loader):
                 else: raise e
             except: raise
             
-            return r.json()
+            result = r.json()
+            cache.put_json(url, params, result)
+            
+            return result
         elif out_type.lower()=='csv':
             start = None
             if 'offset' in params and 'limit' in params and params['offset']>0 and \
@@ -179,15 +189,26 @@ class Opendatasoft(Data_Loader):
                 start = params.pop('offset')
                 count = params.pop('limit')
             
-            try:
-                r = requests.get(url, params=params, stream=True)
-                r.raise_for_status()
-            except requests.exceptions.ConnectionError as e:
-                if len(e.args)>0 and isinstance(e.args[0], urllib3.exceptions.MaxRetryError):
-                    raise OPD_DataUnavailableError(self.get_api_url(), _url_error_msg.format(self.get_api_url())) from e
-                else:
-                    raise e
-            df = pd.read_csv(TqdmReader(r, pbar=pbar), delimiter=';', low_memory=False)
+            content = cache.get(url, params)
+            if content is None:
+                try:
+                    r = _get(url, params=params, stream=True)
+                    r.raise_for_status()
+                except requests.exceptions.ConnectionError as e:
+                    if len(e.args)>0 and isinstance(e.args[0], urllib3.exceptions.MaxRetryError):
+                        raise OPD_DataUnavailableError(self.get_api_url(), _url_error_msg.format(self.get_api_url())) from e
+                    else:
+                        raise e
+                
+                if cache.is_enabled():
+                    # Entire response is needed in order to store it
+                    content = r.content
+                    cache.put(url, params, content)
+
+            if content is None:
+                df = pd.read_csv(TqdmReader(r, pbar=pbar), delimiter=';', low_memory=False)
+            else:
+                df = pd.read_csv(BytesIO(content), delimiter=';', low_memory=False)
 
             if start!=None:
                 stop = start+count if count!=-1 else len(df)+1
@@ -198,6 +219,44 @@ class Opendatasoft(Data_Loader):
             raise NotImplementedError(f"Unable to format output type: {out_type}")
 
 
+    def __get_fields(self):
+        # Dataset metadata contains field types
+        url = f'{self.url}/{self.data_set}'
+        if (result:=cache.get_json(url)) is None:
+            r = _get(url)
+            r.raise_for_status()
+            result = r.json()
+            cache.put_json(url, None, result)
+        return result['fields']
+
+
+    def aggregate(self, group_by=None, metrics=None, date=None, *, by_year=False, pbar=True, **kwargs):
+        '''Group records and calculate statistics for each group using a group_by query. See Data_Loader.aggregate
+        for details on inputs and outputs.
+        '''
+
+        group_by, parsed_metrics = self._check_aggregate_inputs(group_by, metrics, by_year)
+        if by_year:
+            date_col_info = [x for x in self.__get_fields() if x['name']==self.date_field]
+            if len(date_col_info)==0 or date_col_info[0]['type'] not in ['date','datetime']:
+                # Year cannot be extracted in query
+                return super().aggregate(group_by, metrics, date, by_year=by_year, pbar=pbar, **kwargs)
+
+        # Grouped fields are included in results so only the metrics are selected
+        group = group_by.copy()
+        if by_year:
+            group.append(f"year({self.date_field}) AS {_agg_year_col}")
+        select = [f"{stat}({col if col else '*'}) AS {name}" for stat, col, name in parsed_metrics]
+
+        where = self.__construct_where(date)
+        logger.debug(f"Request aggregated data from {self.data_set} from {self.url}")
+        result = self.__request(where=where, out_fields=", ".join(select), out_type="json", 
+                                group_by=", ".join(group) if len(group)>0 else None)
+
+        return _format_aggregate(pd.DataFrame(result, columns=group_by+([_agg_year_col] if by_year else [])+[x[2] for x in parsed_metrics]), 
+                                 group_by, parsed_metrics, by_year)
+
+
     def __construct_where(self, date=None):
         if self.date_field!=None and date!=None:
             start_date, stop_date = _process_date(date, date_field=self.date_field)
@@ -208,7 +267,7 @@ class Opendatasoft(Data_Loader):
         return where_query
 
     
-    def load(self, date=None, nrows=None, offset=0, *, pbar=True, format_date=True, sortby=None, **kwargs):
+    def load(self, date=None, nrows=None, offset=0, *, pbar=True, format_date=True, sortby=None, columns=None, **kwargs):
         '''Download table to pandas or geopandas DataFrame
         
         Parameters
@@ -228,6 +287,8 @@ class Opendatasoft(Data_Loader):
             to be pandas datetimes (or pandas Period in rare cases), by default True
         sortby : str
             (Optional) Columns to sort by. Allowable values: None (defaults to id) or "date"
+        columns : list
+            (Optional) Names of columns to request. Default is None (all columns)
             
         Returns
         -------
@@ -244,7 +305,8 @@ class Opendatasoft(Data_Loader):
                 raise ValueError("Date sorting was requested but no date field was provided")
 
         where_query = self.__construct_where(date)
-        df = self.__request(where=where_query, offset=offset, count=nrows, pbar=pbar, sortby=sortby)
+        out_fields = ", ".join(columns) if columns else "*"
+        df = self.__request(where=where_query, out_fields=out_fields, offset=offset, count=nrows, pbar=pbar, sortby=sortby)
         
         return df
 
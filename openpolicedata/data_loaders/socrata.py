@@ -1,6 +1,7 @@
 import os
 import warnings
 import pandas as pd
+import numpy as np
 from numpy import nan
 import requests
 from sodapy import Socrata as SocrataClient
@@ -8,12 +9,14 @@ from tqdm import tqdm
 from math import ceil
 import re
 
-from .data_loader import Data_Loader, _process_date, _url_error_msg, _use_gpd_force, _default_limit, _has_gpd
+from .data_loader import Data_Loader, _process_date, _url_error_msg, _use_gpd_force, _default_limit, _has_gpd, count_cache, \
+    _agg_year_col, _format_aggregate, _call_with_retry, _points_from_xy, session_pool
 from ..exceptions import OPD_SocrataHTTPError
-from .. import log
+from .. import cache, checkpoint, log
 
 if _has_gpd:
     import geopandas as gpd
+    from shapely.geometry import shape
 
 logger = log.get_logger()
 
@@ -71,6 +74,35 @@ class Socrata(Data_Loader):
         # Unauthenticated client only works with public data sets. Note 'None'
         # in place of application token, and no username or password:
         self.client = SocrataClient(self.url, key, timeout=90)
+        # Share connections with other loaders
+        session_pool.mount(self.client.session)
+
+
+    def __get(self, **kwargs):
+        # Request data using sodapy client. Responses are stored in the cache if it is enabled.
+        url = self.get_api_url()
+        if (results:=cache.get_json(url, kwargs)) is not None:
+            return results
+        
+        results = _call_with_retry(self.client.get, self.data_set, **kwargs)
+        cache.put_json(url, kwargs, results)
+        return results
+    
+
+    def __get_metadata(self):
+        url = self.get_api_url().replace("/resource/", "/api/views/")
+        if (meta:=cache.get_json(url)) is not None:
+            return meta
+        
+        meta = _call_with_retry(self.client.get_metadata, self.data_set)
+        cache.put_json(url, None, meta)
+        return meta
+
+
+    def __geometry_column(self):
+        # Name of column containing geometry that is converted to the geometry of a GeoDataFrame (None if not found)
+        fields = [x.get('fieldName') for x in self.__get_metadata().get('columns', [])]
+        return next((x for x in ["geolocation", "geocoded_column"] if x in fields), None)
 
 
     def __construct_where(self, date, opt_filter):
@@ -80,7 +112,7 @@ class Socrata(Data_Loader):
             assume_date = False
             try:
                 # Get metadata to ensure that date is not formatted as text
-                meta = self.client.get_metadata(self.data_set)
+                meta = self.__get_metadata()
                 column = [x for x in meta['columns'] if x['fieldName']==self.date_field]
                 if len(column)>0 and 'dataTypeName' in column[0] and column[0]['dataTypeName']=='text':
                     # The date column is text. It may have some metadata about it's largest value which 
@@ -164,19 +196,20 @@ class Socrata(Data_Loader):
             Record count or number of rows in data request
         '''
 
+        count_key = self._count_key(date, opt_filter, where)
+        if (count:=count_cache.get(count_key)) is not None:
+            logger.debug("Request matches previous count request. Returning saved count.")
+            return count
+
         if where==None:
             where = self.__construct_where(date, opt_filter)
-
-        if self._last_count is not None and self._last_count[0]==(date, opt_filter, where):
-            logger.debug("Request matches previous count request. Returning saved count.")
-            return self._last_count[1]
         
         logger.debug(f"Request dataset {self.data_set} from {self.url}")
         logger.debug(f"\twhere={where}")
         logger.debug(f"\tselect=count(*)")
 
         try:
-            results = self.client.get(self.data_set, where=where, select="count(*)")
+            results = self.__get(where=where, select="count(*)")
         except (requests.HTTPError, requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError) as e:
             raise OPD_SocrataHTTPError(self.url, self.data_set, *e.args, _url_error_msg.format(self.get_api_url()))
         except Exception as e: 
@@ -192,12 +225,68 @@ class Socrata(Data_Loader):
             num_rows = float(results[0]["count_1"]) # Value used in VT Shootings data
 
         count = int(num_rows)
-        self._last_count = ((date, opt_filter, where),count)
+        count_cache.put(count_key, count)
 
         return count
 
 
-    def load(self, date=None, nrows=None, offset=0, *, pbar=True, opt_filter=None, select=None, output_type=None, sortby=None, **kwargs):
+    def __is_date_type(self):
+        # Years can only be extracted from columns with a date type
+        meta = self.__get_metadata()
+        column = [x for x in meta['columns'] if x['fieldName']==self.date_field]
+        return len(column)>0 and column[0].get('dataTypeName') in ['calendar_date', 'floating_timestamp', 'fixed_timestamp']
+
+
+    def aggregate(self, group_by=None, metrics=None, date=None, *, by_year=False, opt_filter=None, pbar=True, **kwargs):
+        '''Group records and calculate statistics for each group using a SoQL group query. See Data_Loader.aggregate
+        for details on inputs and outputs.
+        '''
+
+        group_by, parsed_metrics = self._check_aggregate_inputs(group_by, metrics, by_year)
+        if by_year and not self.__is_date_type():
+            return super().aggregate(group_by, metrics, date, by_year=by_year, opt_filter=opt_filter, pbar=pbar, **kwargs)
+        
+        select = group_by.copy()
+        group = group_by.copy()
+        if by_year:
+            select.append(f"date_extract_y({self.date_field}) AS {_agg_year_col}")
+            group.append(_agg_year_col)
+        for stat, col, name in parsed_metrics:
+            select.append(f"{stat}({col if col else '*'}) AS {name}")
+
+        where = self.__construct_where(date, opt_filter)
+        logger.debug(f"Request aggregated data from dataset {self.data_set} from {self.url}")
+        logger.debug(f"\twhere={where}")
+        logger.debug(f"\tselect={', '.join(select)}")
+
+        kwargs = {"select":", ".join(select), "where":where if where else None, "limit":_default_limit}
+        if len(group)>0:
+            kwargs["group"] = ", ".join(group)
+
+        results = []
+        try:
+            while len(new:=self.__get(offset=len(results), **kwargs))>0:
+                results.extend(new)
+                if len(new)<_default_limit:
+                    break
+        except (requests.HTTPError, requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError) as e:
+            raise OPD_SocrataHTTPError(self.url, self.data_set, *e.args, _url_error_msg.format(self.get_api_url()))
+
+        return _format_aggregate(pd.DataFrame(results, columns=group_by+([_agg_year_col] if by_year else [])+[x[2] for x in parsed_metrics]), 
+                                 group_by, parsed_metrics, by_year)
+
+
+    def _get_years_grouped(self):
+        if not self.__is_date_type():
+            return None
+
+        logger.debug(f"Requesting years in dataset {self.data_set} from {self.url} with grouped query")
+        results = self.__get(select=f"date_extract_y({self.date_field}) AS year, count(*) AS count",
+                             group="year", limit=_default_limit)
+        return [int(x['year']) for x in results if x.get('year') is not None and int(float(x['count']))>0]
+
+
+    def load(self, date=None, nrows=None, offset=0, *, pbar=True, opt_filter=None, select=None, output_type=None, sortby=None, columns=None, **kwargs):
         '''Download table from Socrata to pandas or geopandas DataFrame
         
         Parameters
@@ -220,6 +309,9 @@ class Socrata(Data_Loader):
             (Optional) Data type for the output. Allowable values: GeoDataFrame, DataFrame, set, list. Default: GeoDataFrame or DataFrame
         sortby : str
             (Optional) Columns to sort by. Allowable values: None (defaults to id) or "date"
+        columns : list
+            (Optional) Names of columns to request. Ignored if select is input. The geometry of GeoDataFrames is always 
+            included. Default is None (all columns)
             
         Returns
         -------
@@ -267,16 +359,44 @@ class Socrata(Data_Loader):
                 # https://dev.socrata.com/docs/paging.html#2.1
                 order = ":id"
 
+            if columns:
+                columns = list(columns)
+                if use_gpd and (geo_col:=self.__geometry_column()) and geo_col not in columns:
+                    # Geometry of GeoDataFrames is always kept (matching other loaders)
+                    columns.append(geo_col)
+                select = ", ".join(columns)
+
+        # When ordering by :id, pages after the first are requested by filtering for :id values greater than the last one 
+        # of the previous page (keyset paging) instead of by offset so that the server does not scan all previous records 
+        # for each page. :id is not returned unless it is requested.
+        keyset = order==":id"
+        if keyset:
+            select = ":id, " + (select if select else "*")
+
+        # Completed pages are stored if checkpointing is enabled so that a failed download can be resumed
+        spool = checkpoint.Spool(type(self).__name__, self.url, self.data_set, where, order, select)
+
+        records = []
+        last_id = None
+
         while N > 0:
+            page_where = where
+            page_offset = offset
+            if last_id is not None:
+                id_filter = f":id > '{last_id}'"
+                page_where = f"({where}) AND {id_filter}" if where else id_filter
+                page_offset = 0
+
             logger.debug(f"Request dataset {self.data_set} from {self.url}")
-            logger.debug(f"\twhere={where}")
+            logger.debug(f"\twhere={page_where}")
             logger.debug(f"\tselect={select}")
             logger.debug(f"\tlimit={batch_size}")
-            logger.debug(f"\toffset={offset}")
+            logger.debug(f"\toffset={page_offset}")
             logger.debug(f"\torder={order}")
             try:
-                results = self.client.get(self.data_set, where=where,
-                    limit=batch_size,offset=offset, select=select, order=order)
+                if (results:=spool.get(offset, batch_size)) is None:
+                    results = self.__get(where=page_where, limit=batch_size, offset=page_offset, select=select, order=order)
+                    spool.put(offset, batch_size, results)
             except requests.HTTPError as e:
                 raise OPD_SocrataHTTPError(self.url, self.data_set, *e.args, _url_error_msg.format(self.get_api_url()))
             except Exception as e: 
@@ -299,6 +419,11 @@ class Socrata(Data_Loader):
                 else:
                     raise e
 
+            if keyset and len(results)>0:
+                last_id = results[-1][":id"]
+                for r in results:
+                    r.pop(":id", None)
+
             if use_gpd and output_type==None:
                 # Check for geo info
                 for r in results:
@@ -323,42 +448,11 @@ class Socrata(Data_Loader):
                 if len(results)>0:
                     [df.append(row[select]) for row in results]
 
-            elif use_gpd and output_type=="GeoDataFrame":
-                output_type = "GeoDataFrame"
-                # Presumed to be a list of properties that possibly include coordinates
-                geojson = {"type" : "FeatureCollection", "features" : []}
-                for p in results:
-                    feature = {"type" : "Feature", "properties" : p}
-                    if "geolocation" in feature["properties"]:
-                        geo = feature["properties"].pop("geolocation")
-                        if list(geo.keys()) == ["human_address"]:
-                            feature["geometry"] = {"type" : "Point", "coordinates" : (nan, nan)}  
-                        elif "coordinates" in geo:
-                            feature["geometry"] = geo
-                        else:
-                            feature["geometry"] = {"type" : "Point", "coordinates" : (float(geo["longitude"]), float(geo["latitude"]))}
-                    elif "geocoded_column" in feature["properties"]:
-                        feature["geometry"] = feature["properties"].pop("geocoded_column")
-                    else:
-                        feature["geometry"] = {"type" : "Point", "coordinates" : (nan, nan)} 
-                    
-                    geojson["features"].append(feature)
-
-                if len(results)>0:
-                    logger.debug("Geometry found. Contructing geopandas GeoDataFrame")
-                    new_gdf = gpd.GeoDataFrame.from_features(geojson, crs=4326)
-                        
-                    if offset==start_offset:
-                        df = new_gdf
-                    else:
-                        df = pd.concat([df, new_gdf], ignore_index=True)
             else:
-                output_type = "DataFrame"
-                rows = pd.DataFrame.from_records(results)
-                if offset==start_offset:
-                    df = pd.DataFrame(rows)
-                else:
-                    df = pd.concat([df, rows], ignore_index=True)
+                if not (use_gpd and output_type=="GeoDataFrame"):
+                    output_type = "DataFrame"
+                # DataFrame is built once all pages are loaded to avoid repeatedly copying previous pages
+                records.extend(results)
 
             N = len(results)
             offset += N
@@ -372,7 +466,51 @@ class Socrata(Data_Loader):
         if show_pbar:
             bar.close()
 
+        spool.remove()
+
+        if output_type=="GeoDataFrame":
+            logger.debug("Geometry found. Contructing geopandas GeoDataFrame")
+            df = _records_to_geodataframe(records)
+        elif output_type not in ["set", "list"]:
+            df = pd.DataFrame.from_records(records)
+
         if isinstance(df, pd.DataFrame) and nrows is not None and len(df)>nrows:
             df = df.head(nrows)
         return df
 
+
+def _records_to_geodataframe(records):
+    # Geometry is stored in the geolocation or geocoded_column field of each record. Collect point coordinates 
+    # into arrays so that points are constructed all at once. Records are replaced in the records list by copies 
+    # without the geometry field. The record dictionaries themselves are not modified.
+    x = np.full(len(records), nan)
+    y = np.full(len(records), nan)
+    missing = np.zeros(len(records), dtype=bool)
+    other_geometry = {}
+    for k, r in enumerate(records):
+        key = "geolocation" if "geolocation" in r else ("geocoded_column" if "geocoded_column" in r else None)
+        if key is None:
+            # No location. Point remains NaN
+            continue
+        geo = r[key]
+        records[k] = {i:v for i,v in r.items() if i!=key}
+        if not isinstance(geo, dict):
+            missing[k] = geo is None
+        elif "coordinates" in geo:
+            if geo.get("type")=="Point":
+                if len(geo["coordinates"])>=2:
+                    x[k], y[k] = geo["coordinates"][0], geo["coordinates"][1]
+            else:
+                other_geometry[k] = shape(geo)
+        elif "longitude" in geo and "latitude" in geo:
+            x[k], y[k] = float(geo["longitude"]), float(geo["latitude"])
+        # Otherwise, location only contains an address (human_address) and point remains NaN
+
+    geometry = _points_from_xy(x, y, missing)
+    for k, geom in other_geometry.items():
+        geometry[k] = geom
+
+    df = pd.DataFrame.from_records(records)
+    # Geometry is the first column (matching GeoDataFrame.from_features)
+    df.insert(0, "geometry", geometry)
+    return gpd.GeoDataFrame(df, geometry="geometry", crs=4326)
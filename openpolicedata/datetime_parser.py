@@ -11,6 +11,111 @@ import numbers
 
 from .utils import is_str_number
 
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+# Number of values used to infer the format of string dates
+_format_sample_size = 100
+
+_month_abbrevs = ["jan","feb","mar","apr","may","jun","jul","aug","sep","oct","nov","dec"]
+
+
+def _month_to_num(months):
+    # Convert month names (i.e. January, Jan, Sept) or numbers to month numbers
+    is_str = months.map(lambda x: isinstance(x,str))
+    if not is_str.any():
+        return pd.to_numeric(months)
+
+    str_vals = months[is_str].astype(str)
+    is_digit = str_vals.str.isdigit()
+    nums = pd.to_numeric(months.where(~is_str), errors='coerce')
+    nums[str_vals.index[is_digit]] = str_vals[is_digit].astype(int)
+    names = str_vals[~is_digit].str[:3].str.lower().map({y:k+1 for k,y in enumerate(_month_abbrevs)})
+    if names.isnull().any():
+        raise ValueError(f"Unable to convert month {str_vals[~is_digit][names.isnull()].iloc[0]} to a number")
+    nums[names.index] = names
+    return nums
+
+
+def _str_number_mask(col):
+    # Vectorized version of is_str_number for string columns
+    return col.str.strip().str.fullmatch(r"\d+(\.\d+)?").fillna(False).astype(bool)
+
+
+def _infer_date_formats(col):
+    # Infer the formats of string dates from a sample of values. Returns None if any format cannot be inferred
+    sample = col[col.notnull()].head(10*_format_sample_size)
+    sample = sample[sample.str.strip()!=""].head(_format_sample_size)
+    formats = []
+    for x in sample.unique():
+        fmt = guess_datetime_format(x.strip())
+        if fmt is None:
+            return None
+        elif fmt not in formats:
+            formats.append(fmt)
+    return formats if len(formats)>0 else None
+
+
+def _parse_with_formats(col, formats):
+    # Parse string dates in a single pass per format. Returns None if there are values that do not match any format
+    if len(formats)>1 and any(["%z" in x or "%Z" in x for x in formats]):
+        # Mixed time zones are not handled by combining results
+        return None
+    col = col.str.strip()
+    result = None
+    for fmt in formats:
+        try:
+            dts = pd.to_datetime(col if result is None else col[result.isnull()], format=fmt, 
+                                 errors='raise' if len(formats)==1 else 'coerce')
+        except (ValueError, OverflowError):
+            return None
+        result = dts if result is None else result.fillna(dts)
+
+    is_empty = col.isnull() | (col=="")
+    if result.isnull().sum() > is_empty.sum():
+        return None
+    return result
+
+
+# Times with a colon such as HH:MM, HH:MM:SS, and HH:MM PM. Spaces are removed before matching
+_time_pattern = r"^(?P<hour>[0-9]{1,2}):(?P<minute>[0-9]{1,2})(?::(?P<second>[0-9]{1,2}))?(?P<ampm>[AaPp][Mm])?$"
+# Times without a colon such as HHMM and HMM PM
+_hhmm_pattern = r"^(?P<hour>[0-9]{0,2}?)(?P<minute>[0-9]{1,2})(?P<ampm>[AaPp][Mm])?$"
+
+
+def _time_parts_to_sec(parts):
+    # Convert hour, minute, second, and AM/PM strings extracted from times to seconds since 00:00. 
+    # Invalid times are NaN
+    hour = parts["hour"].where(parts["hour"]!="", "0").astype(int)
+    minute = parts["minute"].astype(int)
+    ampm = parts["ampm"].str.upper()
+    is_pm = ampm=="PM"
+    # 24 hour time with PM indicated is a typo. Hours are not adjusted
+    add_hours = 12*(is_pm & (hour<=12))
+    hour = hour.where(~(ampm.isin(["AM","PM"]) & (hour==12)), 0) + add_hours
+
+    seconds = hour*3600 + minute*60
+    if "second" in parts:
+        # Invalid seconds are ignored
+        second = parts["second"].fillna("0").astype(int)
+        seconds+=second.where(second<60, 0)
+    return seconds.where((hour<24) & (minute<60)).astype(float)
+
+
+def _sec_to_time(seconds):
+    # Convert seconds since 00:00 to datetime.time. Only unique values are converted
+    lut = {x:dt.time(hour=int(x//3600), minute=int(x%3600//60), second=int(x%60)) for x in seconds[seconds.notnull()].unique()}
+    return seconds.map(lut)
+
+
+def _time_to_sec(times):
+    # Convert datetime.time values to seconds since 00:00. Only unique values are converted
+    lut = {x:x.hour*3600+x.minute*60+x.second+x.microsecond/1e6 for x in times[times.notnull()].unique()}
+    return times.map(lut).astype(float)
+
+
 def parse_date_to_datetime(date_col):
     if len(date_col.shape)==2:
         if date_col.shape[1] > 1:
@@ -28,20 +133,18 @@ def parse_date_to_datetime(date_col):
                 d = date_col.copy()
                 d[d.columns[0]] = date_col.iloc[:,0].dt.year
 
-                def month_name_to_num(x):
-                    month_list = ["jan","feb","mar","apr","may","jun","jul","aug","sep","oct","nov","dec"]
-                    if isinstance(x,str) and not x.isdigit():
-                        month_num = [k+1 for k,y in enumerate(month_list) if x.lower().startswith(y)]
-                        return month_num[0]
-                    else:
-                        return int(x) if pd.notnull(x) else x
-
-                d[d.columns[1]] = date_col.iloc[:,1].apply(month_name_to_num)
+                d[d.columns[1]] = _month_to_num(date_col.iloc[:,1])
 
                 if d.shape[1]==2:
-                    return d.apply(lambda x: pd.Period(to_datetime(f"{int(x.iloc[1])}/1/{int(x.iloc[0])}"), 'M') 
-                                   if pd.notnull(x.iloc[1])
-                                   else pd.Period(to_datetime(f"{int(x.iloc[0])}"), 'Y'), axis=1)
+                    years = d.iloc[:,0]
+                    months = d.iloc[:,1]
+                    if years.isnull().any():
+                        raise ValueError("Year cannot be null")
+                    has_month = months.notnull()
+                    # Months are set to January where missing to allow conversion of all rows at once
+                    dates = pd.to_datetime({"year":years, "month":months.where(has_month, 1), "day":1})
+                    periods = np.where(has_month, dates.dt.to_period('M').astype("O"), dates.dt.to_period('Y').astype("O"))
+                    return pd.Series(list(periods), index=d.index)
                 else:
                     return to_datetime(d)
         else:
@@ -49,14 +152,32 @@ def parse_date_to_datetime(date_col):
 
     ind_is_num = date_col.notnull()
     if ind_is_num.any():
-        if not hasattr(date_col[ind_is_num].iloc[0], "year") or (date_col[ind_is_num].apply(type)==str).any():
+        if not hasattr(date_col[ind_is_num].iloc[0], "year") or \
+            (date_col.dtype=="O" and (date_col[ind_is_num].apply(type)==str).any()):
             is_num = is_numeric_dtype(date_col)
             if not is_num:
                 # Try to convert to all numbers
                 with warnings.catch_warnings():
                     warnings.filterwarnings("ignore", category=RuntimeWarning, message="invalid value encountered in cast")
                     new_col = date_col.convert_dtypes()
-                if new_col.dtype in ["object", "string", "string[python]"] and \
+                if new_col.dtype in ["string", "string[python]"]:
+                    # All values are strings. Check for numbers using str accessors
+                    head = new_col[new_col.notnull()].head(_format_sample_size)
+                    # Check the first values before checking all values
+                    if (~(_str_number_mask(head) | (head.str.strip()==""))).sum() > 1:
+                        is_str_num = pd.Series(False, index=new_col.index)
+                    else:
+                        is_str_num = _str_number_mask(new_col)
+                    if is_str_num.any() and \
+                        (new_col.isnull() | is_str_num | (new_col.str.strip()=="")).sum()>=len(new_col)-1:
+                        # Almost all numeric or null values and at least one numeric value
+                        date_col = pd.Series(np.trunc(pd.to_numeric(new_col.where(is_str_num), errors='coerce').astype(float)), 
+                                             index=new_col.index)
+                        if date_col.notnull().all():
+                            date_col = date_col.astype("int64")
+                        ind_is_num = date_col.notnull()
+                        is_num = True
+                elif new_col.dtype in ["object"] and \
                     new_col.apply(lambda x: pd.notnull(x) and (isinstance(x, numbers.Number) or is_str_number(x))).sum() > 0 and \
                     new_col.apply(lambda x: pd.isnull(x) or isinstance(x,(pd.Timestamp,int, dt.datetime)) or \
                                   isinstance(x, numbers.Number) or is_str_number(x) or \
@@ -93,20 +214,20 @@ def parse_date_to_datetime(date_col):
 
                 any_valid = True
                 if is_valid_first:
-                    year = dts.apply(lambda x : np.floor(x / 10000) if not pd.isnull(x) else x)
-                    month_day = dts.apply(lambda x : x % 10000 if not pd.isnull(x) else x)
+                    year = year_first
+                    month_day = year_last
                 elif is_valid_last:
-                    year = dts.apply(lambda x : x % 10000 if not pd.isnull(x) else x)
-                    month_day = dts.apply(lambda x : np.floor(x / 10000) if not pd.isnull(x) else x)
+                    year = year_last
+                    month_day = year_first
                 elif is_valid_last_2digit:
-                    year = 2000+dts.apply(lambda x : x % 100 if not pd.isnull(x) else x)
-                    month_day = dts.apply(lambda x : np.floor(x / 100) if not pd.isnull(x) else x)
+                    year = 2000+year_last_2digit
+                    month_day = np.floor(dts / 100)
                 else:
                     any_valid = False
 
                 if any_valid:
                     # Determine if month is first or last in month_day
-                    first_val = month_day.apply(lambda x: np.floor(x/100) if pd.notnull(x) and isinstance(x,numbers.Number) else x)
+                    first_val = np.floor(month_day / 100)
                     last_val = month_day % 100
 
                     is_valid_month_first = first_val.max() < 13 and last_val.max() < 32
@@ -182,6 +303,12 @@ def parse_date_to_datetime(date_col):
 
                     if num_match<num_check-1:
                         raise ValueError("Column is not a date column")
+                    
+                    if new_col.dtype in ["string", "string[python]"] and \
+                        (formats:=_infer_date_formats(new_col)) and \
+                        (result:=_parse_with_formats(new_col, formats)) is not None:
+                        # Formats inferred from a sample of values. Dates were parsed without parsing each value individually
+                        return result
                     try:
                         return to_datetime(new_col)
                     except:
@@ -224,6 +351,38 @@ def merge_date_and_time(date_col, time_col, empty_time):
                 raise ValueError("empty_time must be 'NaT' or 'ignore'")
         else:
             return d.replace(hour=t.hour, minute=t.minute, second=t.second)
+        
+    if pd.api.types.is_datetime64_any_dtype(date_col) and len(date_col)==len(time_col):
+        date_col = date_col.reset_index(drop=True)
+        time_col = time_col.reset_index(drop=True)
+        is_empty = date_col.notnull() & time_col.isnull()
+        if empty_time not in ["nat", "ignore"] and is_empty.any():
+            raise ValueError("empty_time must be 'NaT' or 'ignore'")
+        
+        try:
+            if pd.api.types.is_timedelta64_dtype(time_col):
+                seconds = time_col.dt.total_seconds()
+            else:
+                seconds = _time_to_sec(time_col)
+        except AttributeError:
+            # Time column contains values that are not times
+            seconds = None
+
+        if seconds is not None:
+            # Replace the time of day of the date. Fractional seconds of the date are kept as with Timestamp.replace
+            dates = date_col.dt.tz_localize(None) if date_col.dt.tz else date_col
+            result = dates.dt.normalize() + pd.to_timedelta(np.floor(seconds), unit='s') + (dates - dates.dt.floor('s'))
+            try:
+                if date_col.dt.tz:
+                    result = result.dt.tz_localize(date_col.dt.tz)
+            except Exception:
+                # Times are ambiguous or do not exist due to daylight savings time
+                result = None
+            
+            if result is not None:
+                if empty_time=="ignore":
+                    result[is_empty] = date_col[is_empty]
+                return result.rename(None)
 
     return pd.Series([combine(d, t) for d,t in zip(date_col, time_col)])
 
@@ -375,8 +534,8 @@ def validate_time(df, match_cols_test, date_col=None):
     return match_cols
 
 
-def parse_time(time_col):
-    # Returns time in seconds since 00:00
+def parse_time(time_col, as_timedelta=False):
+    # Returns time as datetime.time or, if as_timedelta is True, as the time since 00:00 (timedelta64)
     time_col = time_col.copy()
     if pd.api.types.is_numeric_dtype(time_col):
         # Expected to be time as integer in 24-hr HHMM format
@@ -399,17 +558,43 @@ def parse_time(time_col):
             else:
                 raise NotImplementedError()
 
-        return pd.Series([dt.time(hour=int(x),minute=int(y)) if (pd.notnull(x) and pd.notnull(y)) else pd.NaT for x,y in zip(hour,min)])
+        seconds = pd.Series((hour*3600 + min*60).to_numpy(dtype=float, na_value=np.nan))
+        if as_timedelta:
+            return pd.to_timedelta(seconds, unit='s')
+        return _sec_to_time(seconds).fillna(pd.NaT)
     elif time_col.dtype in ['O','string[python]']:
         new_col = time_col.convert_dtypes()
         if new_col.dtype in ["string",'string[python]'] or \
             time_col.apply(lambda x: isinstance(x,str) or isinstance(x,int) or pd.isnull(x) or isinstance(x,dt.time)).all():
             # Cleanup split AM or PM, which causes a warning from pandas
-            new_col = new_col.apply(lambda x: x.replace("P M","PM").replace("A M","AM") if isinstance(x,str) else x)
-            new_col = new_col.apply(lambda x: x.strftime('%H:%M') if isinstance(x,dt.time) else x)
+            if new_col.dtype in ["string",'string[python]']:
+                new_col = new_col.str.replace("P M","PM", regex=False).str.replace("A M","AM", regex=False)
+            else:
+                new_col = new_col.apply(lambda x: x.replace("P M","PM").replace("A M","AM") if isinstance(x,str) else x)
+                new_col = new_col.apply(lambda x: x.strftime('%H:%M') if isinstance(x,dt.time) else x)
+
+            # Parse unique values using the hour, minute, second, and AM/PM extracted from all of them at once
+            codes, uniques = pd.factorize(new_col)
+            uniques = pd.Series(uniques, dtype="O")
+            seconds = pd.Series(np.nan, index=uniques.index)
+            str_vals = uniques[uniques.apply(lambda x: isinstance(x,str))].str.replace(" ","", regex=False)
+            parts = str_vals.str.extract(_time_pattern)
+            is_parsed = parts["hour"].notnull()
+            seconds[parts.index[is_parsed]] = _time_parts_to_sec(parts[is_parsed])
+
+            if len(uniques)>0 and len(str_vals)==len(uniques) and (str_vals==uniques).all() and parts["ampm"].isnull().all() and \
+                seconds.notnull().all() and (parts["second"].isnull() | (parts["second"].astype(float)<60)).all():
+                # All values are valid times in HH:MM or HH:MM:SS format. Parsing each value with to_datetime is not necessary
+                seconds = pd.Series(seconds.reindex(codes).to_numpy(), index=new_col.index, name=new_col.name)
+                if as_timedelta:
+                    return pd.to_timedelta(seconds, unit='s')
+                return _sec_to_time(seconds).astype("O").fillna(pd.NaT)
+
             try:
-                new_col = to_datetime(new_col)
-                return new_col.dt.time
+                dts = to_datetime(new_col)
+                if as_timedelta:
+                    return dts - dts.dt.normalize()
+                return dts.dt.time
             except:
                 pass
 
@@ -501,7 +686,29 @@ def parse_time(time_col):
                         pass
 
                 return t
-            return new_col.apply(convert_timestr_to_sec)
+            
+            parts = str_vals[~is_parsed].str.extract(_hhmm_pattern)
+            # Times like 30PM are not parsed here
+            is_hhmm = parts["minute"].notnull() & (parts["ampm"].isnull() | (parts["hour"].str.len()>0))
+            seconds[parts.index[is_hhmm]] = _time_parts_to_sec(parts[is_hhmm])
+
+            is_parsed = is_parsed | is_hhmm.reindex(is_parsed.index, fill_value=False) | str_vals.isin(["","-"])
+            
+            # Remaining values are parsed individually
+            other_vals = uniques.drop(is_parsed.index[is_parsed]).apply(convert_timestr_to_sec)
+
+            if as_timedelta:
+                seconds[other_vals.index] = _time_to_sec(other_vals)
+                seconds = pd.Series(seconds.reindex(codes).to_numpy(), index=new_col.index, name=new_col.name)
+                return pd.to_timedelta(seconds, unit='s')
+            
+            values = _sec_to_time(seconds).astype("O")
+            values[values.isnull()] = pd.NaT
+            values[other_vals.index] = other_vals
+            result = new_col.astype("O").to_numpy(copy=True)
+            result[codes>=0] = values.to_numpy()[codes[codes>=0]]
+            # Allow the data type to be inferred as pd.Series.apply would
+            return pd.Series(result.tolist(), index=new_col.index, name=new_col.name)
         else:
             raise NotImplementedError()
     else:
@@ -1,5 +1,7 @@
 from __future__ import absolute_import
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import re
 import requests
 import urllib.request
@@ -29,6 +31,9 @@ req_headers = {
             'Sec-Fetch-User': '?1',
         }
 
+# Default maximum number of blocks stored in the cache of each file
+default_cache_size = 256
+
 
 def open(url, block_size=-1, **kwargs):
     """
@@ -36,6 +41,12 @@ def open(url, block_size=-1, **kwargs):
 
     :param url: The URL of the file to open
     :param block_size: The cache block size, or `-1` to disable caching.
+    :param cache_size: Maximum number of blocks kept in the cache. Least
+        recently used blocks are removed first. Default: default_cache_size
+    :param prefetch: Number of blocks following each read to request in the
+        background before they are read. Default: 0 (no read-ahead)
+    :param max_workers: Number of simultaneous range requests used for
+        read-ahead and for splitting large reads. Default: 1
     :param kwargs: Additional arguments to pass to `requests.Request()`
     :return: An `httpio.HTTPIOFile` object supporting most of the usual
         file-like object methods.
@@ -50,14 +61,21 @@ class HTTPIOError(IOBaseError):
 
 
 class SyncHTTPIOFile(BufferedIOBase):
-    def __init__(self, url, block_size=-1, **kwargs):
+    def __init__(self, url, block_size=-1, cache_size=None, prefetch=0, max_workers=1, **kwargs):
         super(SyncHTTPIOFile, self).__init__()
         self.url = url
         self.block_size = block_size
+        self.cache_size = cache_size if cache_size is not None else default_cache_size
+        self.prefetch = prefetch
+        self.max_workers = max(1, max_workers)
 
         self._kwargs = kwargs
         self._cursor = 0
-        self._cache = {}
+        # Ordered from least to most recently used
+        self._cache = OrderedDict()
+        # Sector -> future of background range request containing the sector
+        self._pending = {}
+        self._executor = None
         self._session = None
 
         self.length = None
@@ -105,7 +123,10 @@ class SyncHTTPIOFile(BufferedIOBase):
 
     def close(self):
         self._closing = True
-        self._cache.clear()
+        self._clear_cache()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
         if self._session is not None:
             self._session.close()
         super(SyncHTTPIOFile, self).close()
@@ -113,7 +134,7 @@ class SyncHTTPIOFile(BufferedIOBase):
     def flush(self):
         self._assert_not_closed()
         self.open()
-        self._cache.clear()
+        self._clear_cache()
 
     def peek(self, size=-1):
         loc = self.tell()
@@ -213,35 +234,118 @@ class SyncHTTPIOFile(BufferedIOBase):
         offset1 += 1
         sector1 += 1
 
+        self._store_completed()
+
+        # Sectors of this read. Kept separately from the cache so that
+        # reads larger than the cache are not affected by eviction.
+        sectors = {}
+        for idx in range(sector0, sector1):
+            if idx in self._cache:
+                self._cache.move_to_end(idx)
+                sectors[idx] = self._cache[idx]
+            elif idx in self._pending:
+                # Wait for read-ahead request. If it failed, the sector is
+                # requested again below.
+                future = self._pending.pop(idx)
+                if future.exception() is None:
+                    sectors.update(self._store(*future.result()))
+
         # Fetch any sectors missing from the cache
-        status = "".join(str(int(idx in self._cache))
+        status = "".join(str(int(idx in sectors))
                          for idx in range(sector0, sector1))
-        raw_reads = 0
+        gaps = []
         for match in re.finditer("0+", status):
-            if max_raw_reads >= 0 and raw_reads >= max_raw_reads:
+            if max_raw_reads >= 0 and len(gaps) >= max_raw_reads:
                 break
+            gaps.append((sector0 + match.start(), sector0 + match.end()))
 
-            data = self._read_raw(
-                self.block_size * (sector0 + match.start()),
-                self.block_size * (sector0 + match.end()))
-            raw_reads += 1
+        for result in self._read_sectors(gaps):
+            sectors.update(self._store(*result))
 
-            for idx in range(match.end() - match.start()):
-                self._cache[sector0 + idx + match.start()] = data[
-                    self.block_size * idx:
-                    self.block_size * (idx + 1)]
+        if self.prefetch > 0:
+            self._read_ahead(sector1)
 
         data = []
         for idx in range(sector0, sector1):
-            if idx not in self._cache:
+            if idx not in sectors:
                 break
 
             start = offset0 if idx == sector0 else None
             end = offset1 if idx == (sector1 - 1) else None
-            data.append(self._cache[idx][start:end])
+            data.append(sectors[idx][start:end])
 
         return data
 
+    def _read_sector_range(self, sector0, sector1):
+        start = self.block_size * sector0
+        end = min(self.block_size * sector1, self.length)
+        return sector0, self._read_raw(start, end)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _read_sectors(self, gaps):
+        # Request ranges of sectors. With multiple workers, gaps are split
+        # into 1 range per worker and requested simultaneously.
+        if self.max_workers == 1:
+            return [self._read_sector_range(*gap) for gap in gaps]
+
+        ranges = []
+        for sector0, sector1 in gaps:
+            step = -(-(sector1 - sector0) // self.max_workers)
+            ranges.extend((k, min(k + step, sector1))
+                          for k in range(sector0, sector1, step))
+
+        if len(ranges) == 1:
+            return [self._read_sector_range(*ranges[0])]
+
+        executor = self._get_executor()
+        futures = [executor.submit(self._read_sector_range, *r)
+                   for r in ranges]
+        return [f.result() for f in futures]
+
+    def _read_ahead(self, sector0):
+        # Request upcoming sectors in the background
+        num_sectors = -(-self.length // self.block_size)
+        for idx in range(sector0, min(sector0 + self.prefetch, num_sectors)):
+            if idx not in self._cache and idx not in self._pending:
+                self._pending[idx] = self._get_executor().submit(
+                    self._read_sector_range, idx, idx + 1)
+
+    def _store_completed(self):
+        # Move results of completed read-ahead requests into the cache
+        for idx, future in list(self._pending.items()):
+            if future.done():
+                del self._pending[idx]
+                if not future.cancelled() and future.exception() is None:
+                    self._store(*future.result())
+
+    def _store(self, sector0, data):
+        # Add sectors to the cache, removing least recently used sectors
+        # if the cache is full
+        sectors = {}
+        for idx in range((len(data) + self.block_size - 1) // self.block_size):
+            sectors[sector0 + idx] = data[self.block_size * idx:
+                                          self.block_size * (idx + 1)]
+
+        for idx, sector in sectors.items():
+            self._pending.pop(idx, None)
+            self._cache[idx] = sector
+            self._cache.move_to_end(idx)
+
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return sectors
+
+    def _clear_cache(self):
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._cache.clear()
+
     def _read_raw(self, start, end):
         headers = {"Range": "bytes=%d-%d" % (start, end - 1)}
         headers.update(self._kwargs.get("headers", {}))
@@ -0,0 +1,178 @@
+from __future__ import annotations
+import copy
+import os
+import pickle
+import tempfile
+import threading
+
+from . import log
+from ._version import __version__
+
+logger = log.get_logger()
+
+# Default location where lookup tables of standardized values are stored
+default_directory = os.path.join(os.path.expanduser("~"), ".openpolicedata", "luts")
+
+# Version of the lookup tables. Increment whenever a change to the converters in _converters changes the
+# standardized value of any raw value so that previously stored lookup tables are not used.
+_lut_version = 1
+
+# Maximum number of raw values stored. The lookup table is emptied if this is exceeded.
+_max_entries = 10**6
+
+_ext = ".pkl"
+
+_luts = {}
+_directory = None
+_modified = False
+_lock = threading.Lock()
+
+
+def enable(directory: str | None = None) -> None:
+    '''Enable storing lookup tables of standardized values to disk. Standardized values of raw values (i.e.
+    race, gender, and ethnicity values) are always reused within a session. Once enabled, they are also stored
+    locally by :func:`save` and loaded in future sessions so that the standardization of values that were
+    previously seen is not repeated. Stored lookup tables are only used by the same version of OpenPoliceData.
+
+    Parameters
+    ----------
+    directory : str | None, optional
+        Directory where lookup tables are stored, by default ~/.openpolicedata/luts
+    '''
+    global _directory
+    directory = directory if directory else default_directory
+    os.makedirs(directory, exist_ok=True)
+    logger.debug(f"Enabling lookup tables of standardized values in {directory}")
+    with _lock:
+        _directory = directory
+        try:
+            with open(_get_filename(), "rb") as f:
+                stored = pickle.load(f)
+        except (FileNotFoundError, OSError, EOFError, pickle.UnpicklingError, ValueError, AttributeError):
+            return
+
+        if not isinstance(stored, dict):
+            return
+
+        # Values already in memory take priority
+        stored.update(_luts)
+        _luts.clear()
+        _luts.update(stored)
+
+
+def disable() -> None:
+    '''Disable storing lookup tables of standardized values to disk. Previously stored lookup tables are not deleted.
+    '''
+    global _directory
+    with _lock:
+        _directory = None
+
+
+def is_enabled() -> bool:
+    '''Returns whether lookup tables of standardized values are stored to disk
+
+    Returns
+    -------
+    bool
+        True if lookup tables are stored to disk
+    '''
+    return _directory is not None
+
+
+def save() -> None:
+    '''Store lookup tables of standardized values to disk. Does nothing if storing to disk is disabled or there are
+    no new values. This is called automatically at the end of each standardization.
+    '''
+    global _modified
+    with _lock:
+        if not is_enabled() or not _modified:
+            return
+
+        # Write to temporary file first so that an interruption does not leave a partial file
+        fd, tmp_file = tempfile.mkstemp(dir=_directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(_luts, f)
+            os.replace(tmp_file, _get_filename())
+        except:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+        _modified = False
+
+
+def clear() -> None:
+    '''Remove all lookup tables of standardized values from memory and from disk if storing to disk is enabled
+    '''
+    global _modified
+    with _lock:
+        _luts.clear()
+        _modified = False
+        if is_enabled():
+            with os.scandir(_directory) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith(_ext):
+                        os.remove(entry.path)
+
+
+def _get_filename():
+    return os.path.join(_directory, f"luts_{__version__}_v{_lut_version}{_ext}")
+
+
+def _freeze(x):
+    # Convert dictionaries and lists to hashable values
+    if isinstance(x, dict):
+        return (dict, tuple((k, _freeze(v)) for k,v in x.items()))
+    elif isinstance(x, (list, tuple)):
+        return (type(x), tuple(_freeze(v) for v in x))
+    else:
+        return x
+
+
+def _copy(x):
+    # Values stored in lookup tables may be modified by the caller
+    return copy.deepcopy(x) if isinstance(x, (list, dict, set)) else x
+
+
+def memoize(converter):
+    '''Wrap converter so that standardized values are stored in lookup tables keyed by the converter, raw value, and
+    all other inputs (i.e. source name, state, categories, agg_cat, and no_id). Converters are identified by name so
+    converter should be a module-level function whose output only depends on its inputs.
+
+    Parameters
+    ----------
+    converter : function
+        Function that converts a raw value to a standardized value
+
+    Returns
+    -------
+    function
+        Function that returns stored standardized values when available
+    '''
+    if getattr(converter, "_is_memoized", False):
+        return converter
+
+    name = f"{converter.__module__}.{converter.__qualname__}"
+    def memoized(x, *args, **kwargs):
+        global _modified
+        try:
+            # Type is included so that values such as 1 and 1.0 are not considered the same
+            key = (name, type(x).__name__, x, _freeze(args), _freeze(kwargs))
+            value = _luts[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable value
+            return converter(x, *args, **kwargs)
+        else:
+            return _copy(value)
+
+        value = converter(x, *args, **kwargs)
+        if len(_luts) >= _max_entries:
+            _luts.clear()
+        _luts[key] = _copy(value)
+        _modified = True
+        return value
+
+    memoized._is_memoized = True
+    return memoized
@@ -12,6 +12,7 @@ from . import datetime_parser
 from . import defs
 from . import _converters as convert
 from . import log
+from . import lut_cache
 from ._converters import  _p_age_range
 from ._preproc_utils import _MultData, check_column, DataMapping, _case, MultType
 from .exceptions import BadCategoryDict
@@ -20,6 +21,18 @@ from .utils import camel_case_split, split_words, is_str_number
 _skip_tables = ["calls for service"]
 _OLD_COLUMN_INDICATOR = "RAW"
 
+# When identifying columns, data is validated using samples of rows for tables with more rows than _id_sample_size.
+# Each sample contains _id_sample_size random rows. Samples for validators that check whether values are valid 
+# also contain the first row containing each of up to _id_sample_max_unique unique values of each tested column. 
+# Validators that compare the proportion of valid values to a threshold only use random rows so that proportions
+# are not skewed by rare values. The full table is validated if the results from _id_num_samples samples do not 
+# agree or if a proportion is within _id_confidence_z standard errors of its threshold. Set _id_sample_size to None 
+# to always validate the full table.
+_id_sample_size = 10000
+_id_sample_max_unique = 1000
+_id_num_samples = 2
+_id_confidence_z = 3
+
 logger = log.get_logger()
 
 class _ColMapDict():
@@ -123,6 +136,7 @@ def standardize(df, table_type, year,
     std.standardize_rename_only([defs.columns.ZIP_CODE])
     std.cleanup()
     std.sort_columns()
+    lut_cache.save()
 
     # Print column changes and then full maps
     logger.info(f"Identified columns:")
@@ -420,6 +434,10 @@ class Standardizer:
         self.col_map = _ColMapDict()
         self.data_maps = []
 
+        # Rows containing the first occurrence of unique values in each column of _unique_rows_df (used for sampling)
+        self._unique_rows = {}
+        self._unique_rows_df = None
+
         self.mult_civilian = _MultData()
         self.mult_officer = _MultData()
         self.mult_both = _MultData()
@@ -437,6 +455,59 @@ class Standardizer:
             raise BadCategoryDict(f"Unknown key(s) {unknown} in {attr} dictionary")
         
 
+    def __get_unique_rows(self, col_name):
+        if self._unique_rows_df is not self.df:
+            # DataFrame has been replaced
+            self._unique_rows = {}
+            self._unique_rows_df = self.df
+        if col_name not in self._unique_rows:
+            try:
+                self._unique_rows[col_name] = np.flatnonzero(~self.df[col_name].duplicated().to_numpy())
+            except TypeError:
+                # Unhashable values such as lists
+                self._unique_rows[col_name] = np.array([], dtype=int)
+        return self._unique_rows[col_name]
+
+
+    def __sample_rows(self, cols_test, seed, include_unique=True):
+        # Stratified sample containing random rows and (if include_unique) rows containing the unique values of each column
+        rng = np.random.default_rng(seed)
+        rows = [rng.choice(len(self.df), size=_id_sample_size, replace=False)]
+        for col_name in (cols_test if include_unique else []):
+            unique_rows = self.__get_unique_rows(col_name)
+            if len(unique_rows) > _id_sample_max_unique:
+                unique_rows = rng.choice(unique_rows, size=_id_sample_max_unique, replace=False)
+            rows.append(unique_rows)
+
+        # Keep rows in their original order
+        return np.unique(np.concatenate(rows))
+
+
+    def __validate(self, validator, cols_test, validate_args):
+        if _id_sample_size is None or len(self.df) <= _id_sample_size or validator in _unsampled_validators:
+            return validator(self.df, cols_test, *validate_args)
+        
+        is_proportion = validator in _proportion_validators
+        results = []
+        for k in range(_id_num_samples):
+            rows = self.__sample_rows(cols_test, k, include_unique=not is_proportion)
+            df = self.df.iloc[rows].reset_index(drop=True)
+            # Arguments containing data for each row of the table (i.e. date column) are sampled too
+            args = [x.iloc[rows].reset_index(drop=True) if isinstance(x,(pd.Series, pd.DataFrame)) and len(x)==len(self.df) else x
+                    for x in validate_args]
+            kwargs = {"uncertain":[]} if is_proportion else {}
+            results.append(validator(df, df.columns if cols_test is self.df.columns else cols_test, *args, **kwargs))
+            if len(kwargs.get("uncertain", []))>0:
+                logger.info(f"Proportions of valid values in samples of rows of column(s) {kwargs['uncertain']} are near "+
+                            "the validation threshold. Validating all rows.")
+                return validator(self.df, cols_test, *validate_args)
+            if results[k]!=results[0]:
+                logger.info(f"Validation of samples of rows of column(s) {list(cols_test)} did not agree. Validating all rows.")
+                return validator(self.df, cols_test, *validate_args)
+            
+        return results[0]
+
+
     def __pattern_search(self, select_cols, patterns, match_substr, run_all=False):
         matches = []
         for p in patterns:
@@ -616,12 +687,12 @@ class Standardizer:
 
             if (len(match_cols)>0 and always_validate) or (multi_check and validator != None and len(match_cols) > 1):
                 logger.info(f"Testing data in column(s) {match_cols} as potential {id} column")
-                match_cols = validator(self.df, match_cols, *validate_args)
+                match_cols = self.__validate(validator, match_cols, validate_args)
                 logger.info(f"Validated data in column(s) {match_cols} as potential {id} column")
 
             if (search_data or self.table_type in required_table_types) and len(match_cols)==0:
                 logger.info(f"Testing data in all columns as potential {id} column")
-                match_cols = validator(self.df, self.df.columns, *validate_args)
+                match_cols = self.__validate(validator, self.df.columns, validate_args)
                 logger.info(f"Validated data in column(s) {match_cols} as potential {id} column")
                 
             match_cols_out = self._remove_excluded(match_cols, exclude_col_names, match_substr)
@@ -633,6 +704,8 @@ class Standardizer:
 
 
     def id_columns(self):
+        # Columns may have been modified since unique rows were found
+        self._unique_rows = {}
         # Find the date columns
         match_cols = self._find_col_matches("date", ['datetime',"date"], known_col_names=self.known_cols[defs.columns.DATE], 
             std_col_name=defs.columns.DATE,
@@ -1385,7 +1458,9 @@ class Standardizer:
             
     
     def merge_date_time(self, empty_time="NaT"):
-        if defs.columns.DATE in self.col_map and defs.columns.TIME in self.col_map and not self.df[defs.columns.DATE].apply(lambda x: isinstance(x, pd.Period)).any():
+        if defs.columns.DATE in self.col_map and defs.columns.TIME in self.col_map and \
+            (pd.api.types.is_datetime64_any_dtype(self.df[defs.columns.DATE]) or \
+             not self.df[defs.columns.DATE].apply(lambda x: isinstance(x, pd.Period)).any()):
             self.df[defs.columns.DATETIME] = datetime_parser.merge_date_and_time(self.df[defs.columns.DATE], self.df[defs.columns.TIME], empty_time)
             self.data_maps.append(DataMapping(orig_column_name=[defs.columns.DATE, defs.columns.TIME], new_column_name=defs.columns.DATETIME))
 
@@ -2164,7 +2239,17 @@ def _age_validator(df, cols_test, match_substr):
 
     return match_cols
 
-def _race_validator(df, cols_test, source_name, mult_data=_MultData()):
+def _check_proportion(uncertain, col_name, p, thresholds, n):
+    # Adds col_name to uncertain (if not None) if proportion p calculated from n rows is too close to any of the thresholds 
+    # to be confident that the proportion for the full table is on the same side of the threshold. Returns p.
+    if uncertain is not None and n>0:
+        for t in (thresholds if isinstance(thresholds, list) else [thresholds]):
+            if abs(p-t) <= _id_confidence_z*np.sqrt(t*(1-t)/n):
+                uncertain.append(col_name)
+                break
+    return p
+
+def _race_validator(df, cols_test, source_name, mult_data=_MultData(), uncertain=None):
     search_all = df.columns.equals(cols_test)
     match_cols = []
     for col_name in cols_test:
@@ -2175,9 +2260,12 @@ def _race_validator(df, cols_test, source_name, mult_data=_MultData()):
         # Anything checked beyond this point is less likely to be a race column
         col = df[col_name]
         try:
-            if len(col.unique())>100:
+            if (num_unique:=len(col.unique()))>100:
                 # There shouldn't be this many race values
                 continue
+            elif uncertain is not None and num_unique>50:
+                # Sample of rows may not contain all unique values
+                uncertain.append(col_name)
             if "address" in col_name.lower() or \
                 (search_all and pd.api.types.is_numeric_dtype(col.dtype)):
                 # Addresses are complicated and could trigger false alarms
@@ -2203,7 +2291,7 @@ def _race_validator(df, cols_test, source_name, mult_data=_MultData()):
                     if k in [defs._race_keys.WHITE, defs._race_keys.BLACK]:
                         white_or_black_found = True
 
-            if not white_or_black_found or total / len(col) < 1/3:
+            if not white_or_black_found or _check_proportion(uncertain, col_name, total / len(col), 1/3, len(col)) < 1/3:
                 continue
             
             if total!=len(col):
@@ -2223,16 +2311,20 @@ def _race_validator(df, cols_test, source_name, mult_data=_MultData()):
                                                                             race_cats[defs._race_keys.MULTIPLE],race_cats[defs._race_keys.OTHER]]]
                     knowns = df[col_name].isin(all_races)
                     unknowns = col.isin([race_cats[defs._race_keys.UNSPECIFIED],race_cats[defs._race_keys.UNKNOWN]]) & matches
-                    if (matches.sum() - knowns.sum() - unknowns.sum()) / (len(matches) - unknowns.sum()) > 0.1:
+                    if _check_proportion(uncertain, col_name, (matches.sum() - knowns.sum() - unknowns.sum()) / (len(matches) - unknowns.sum()), 
+                                         0.1, len(matches) - unknowns.sum()) > 0.1:
                         continue
             elif len(cols_test) > 5 and df[col_name].isin(["A","B"]).all():
                 # Most likely we are searching all columns in the table and this a column that uses
                 # letters to indicate something other than race
+                if uncertain is not None:
+                    # Rows not in sample may contain other values
+                    uncertain.append(col_name)
                 continue
 
-            if col.apply(lambda x: isinstance(x,list)).mean() > 0.95 and \
-                col.apply(lambda x: any([isinstance(y,Number) or is_str_number(y) for y in x]) 
-                          if isinstance(x,list) else False).mean() > 0.95:
+            if _check_proportion(uncertain, col_name, col.apply(lambda x: isinstance(x,list)).mean(), 0.95, len(col)) > 0.95 and \
+                _check_proportion(uncertain, col_name, col.apply(lambda x: any([isinstance(y,Number) or is_str_number(y) for y in x]) 
+                          if isinstance(x,list) else False).mean(), 0.95, len(col)) > 0.95:
                 # Date columns can result in lists that are mostly of numbers
                 continue
 
@@ -2266,7 +2358,7 @@ def _eth_validator(df, cols_test):
     return match_cols
 
 
-def _gender_validator(df, match_cols_test, source_name):
+def _gender_validator(df, match_cols_test, source_name, uncertain=None):
     match_cols = []
     for col_name in match_cols_test:
         if check_column(col_name, ["gender", "sex"]):
@@ -2291,7 +2383,7 @@ def _gender_validator(df, match_cols_test, source_name):
                 if v in counts.index:
                     total+=counts[v]
 
-            if total / len(col) < 0.5:
+            if _check_proportion(uncertain, col_name, total / len(col), 0.5, len(col)) < 0.5:
                 continue
 
             match_cols.append(col_name)
@@ -2368,20 +2460,25 @@ def _firearm_validator(df, cols_test):
 
     return match_cols
 
-def _zip_code_validator(df, cols_test, state):
+def _zip_code_validator(df, cols_test, state, uncertain=None):
     match_cols = []
     for col_name in cols_test:
         try:
             min_zip = 1e3 if state=='Vermont' else 1e4
             possible_zips = df[col_name].apply(lambda x: (isinstance(x, Number) or is_str_number(x)) and \
                                                pd.notnull(x) and int(float(x))>=min_zip and int(float(x))<1e5 and int(float(x))==float(x))
-            if (m:=possible_zips.mean())>0.5 or \
-                (m>=0.1 and m+df[col_name].apply(lambda x: pd.isnull(x) or (isinstance(x,str) and x.strip().upper() in ['','UNKNOWN'])).mean()>=0.99):
+            if _check_proportion(uncertain, col_name, m:=possible_zips.mean(), [0.1, 0.5], len(df))>0.5 or \
+                (m>=0.1 and _check_proportion(uncertain, col_name, 
+                    m+df[col_name].apply(lambda x: pd.isnull(x) or (isinstance(x,str) and x.strip().upper() in ['','UNKNOWN'])).mean(), 
+                    0.99, len(df))>=0.99):
                 match_cols.append(col_name)
             elif (df[col_name]=='UNKNOWN').any() and \
-                len(m:=df[col_name][df[col_name]!='UNKNOWN'])/len(df)>0.3 and \
+                _check_proportion(uncertain, col_name, len(m:=df[col_name][df[col_name]!='UNKNOWN'])/len(df), 0.3, len(df))>0.3 and \
                 m.apply(lambda x: (isinstance(x, Number) or is_str_number(x)) and \
                                                pd.notnull(x) and int(x)>=1e4 and int(x)<1e5).mean()==1:
+                if uncertain is not None:
+                    # Rows not in sample may contain values that are not zip codes
+                    uncertain.append(col_name)
                 match_cols.append(col_name)
             else:
                 raise ValueError("Column is not recognized as a zip code column")
@@ -2390,7 +2487,7 @@ def _zip_code_validator(df, cols_test, state):
 
     return match_cols
 
-def _name_validator(df, cols_test):
+def _name_validator(df, cols_test, uncertain=None):
     match_cols = []
     off_words = ["deputy", "employee", "officer", 'personnel', 'offficer', 'trooper']
     civilian_terms = ["citizen","subject","suspect","civilian", "offender", 'victim']
@@ -2409,9 +2506,9 @@ def _name_validator(df, cols_test):
                 (len(words)<2 or not any(x in bad_words and y=='name' for x,y in zip(words[:-1], words[1:]))):
                 match_cols.append(col_name)
             elif col_name.lower() in all_words and \
-                (df[col_name][df[col_name].notnull()].apply(lambda x: name_pattern.search(x.strip()) is not None).mean() > 0.5 or \
-                df[col_name][df[col_name].notnull()].apply(lambda x: all([name_pattern.search(y.strip()) for y in x.split(',')])).mean() > 0.5 or \
-                df[col_name][df[col_name].notnull()].apply(lambda x: all([name_pattern.search(y.strip()) for y in x.split('/')])).mean() > 0.5):
+                (_check_proportion(uncertain, col_name, (vals:=df[col_name][df[col_name].notnull()]).apply(lambda x: name_pattern.search(x.strip()) is not None).mean(), 0.5, len(vals)) > 0.5 or \
+                _check_proportion(uncertain, col_name, vals.apply(lambda x: all([name_pattern.search(y.strip()) for y in x.split(',')])).mean(), 0.5, len(vals)) > 0.5 or \
+                _check_proportion(uncertain, col_name, vals.apply(lambda x: all([name_pattern.search(y.strip()) for y in x.split('/')])).mean(), 0.5, len(vals)) > 0.5):
                 # Data looks like a name
                 match_cols.append(col_name)
         except:
@@ -2490,9 +2587,7 @@ def california_ori2agency(col, year, unknown='ignore'):
     try:
         ori_df = reader(data[0], index_col=data[2])
     except urllib.error.URLError:
-        with data_loaders.data_loader.get_legacy_session() as session:
-            r = session.get(data[0])
-            
+        r = data_loaders.data_loader.session_pool.get_session(legacy=True).get(data[0])
         r.raise_for_status()
         file_like = BytesIO(r.content)
         ori_df = reader(file_like, index_col=data[2])
@@ -2506,3 +2601,11 @@ def california_ori2agency(col, year, unknown='ignore'):
         return col.map(ori_df[data[1]])
     except:
         return col
+
+
+# Validators that compare the proportion of valid values in a column to a threshold
+_proportion_validators = [_race_validator, _gender_validator, _zip_code_validator, _name_validator]
+
+# Validators that are not run on samples of rows. validate_time compares the proportion of times in the date column
+# that are not on the hour to a threshold and already limits the number of rows validated
+_unsampled_validators = [datetime_parser.validate_time]
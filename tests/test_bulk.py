@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+import threading
+import time
+
+from openpolicedata import bulk
+from openpolicedata.data_loaders import data_loader
+from openpolicedata.exceptions import OPD_TooManyRequestsError
+
+datasets = pd.DataFrame({'SourceName':['A','A','A','B','C'], 'State':'Virginia', 'Agency':['A','A','A','B','C'], 'TableType':'STOPS',
+                         'Year':[2020,2021,2022,'MULTIPLE',2020], 'URL':['https://a.com/1','https://a.com/2','https://a.com/3','https://b.com','c.com'],
+                         'dataset_id':None}, index=[10,11,12,13,14])
+
+no_wait = data_loader.RetryPolicy(backoff=0)
+
+class _FakeSource:
+    lock = threading.Lock()
+    running = {}
+    max_running = {}
+    num_429 = 0
+    def __init__(self, source_name, state=None, agency=None):
+        self.source_name = source_name
+    def load(self, table_type, date, url=None, id=None, **kwargs):
+        with self.lock:
+            self.running[self.source_name] = self.running.get(self.source_name, 0)+1
+            self.max_running[self.source_name] = max(self.max_running.get(self.source_name, 0), self.running[self.source_name])
+        time.sleep(0.05)
+        with self.lock:
+            self.running[self.source_name]-=1
+        if self.source_name=='C':
+            raise ValueError('Bad dataset')
+        if self.source_name=='B' and _FakeSource.num_429==0:
+            _FakeSource.num_429+=1
+            raise OPD_TooManyRequestsError(url)
+        return pd.DataFrame({'date':[date], 'url':[url]})
+
+
+@pytest.fixture()
+def fake_source(monkeypatch):
+    monkeypatch.setattr(bulk, "Source", _FakeSource)
+    monkeypatch.setattr(data_loader, "min_request_interval", 0)
+    _FakeSource.running = {}
+    _FakeSource.max_running = {}
+    _FakeSource.num_429 = 0
+
+
+@pytest.mark.parametrize('max_loads_per_host', [1,2])
+def test_load_iter(fake_source, max_loads_per_host):
+    results = dict(bulk.load_iter(datasets, max_loads_per_host=max_loads_per_host, errors='return', retry_policy=no_wait))
+    assert sorted(results.keys())==datasets.index.tolist()
+    for k in datasets.index[:4]:
+        assert results[k]['url'].iloc[0]==datasets.loc[k, 'URL']
+    assert isinstance(results[14], ValueError)
+    assert _FakeSource.max_running['A']==max_loads_per_host
+    assert _FakeSource.num_429==1
+
+
+def test_load_iter_raise(fake_source):
+    with pytest.raises(ValueError):
+        list(bulk.load_iter(datasets, retry_policy=no_wait))
+
+
+def test_load_iter_retries_exceeded(fake_source):
+    results = dict(bulk.load_iter(datasets.loc[[13]], errors='return', retry_policy=data_loader.RetryPolicy(max_attempts=1)))
+    assert isinstance(results[13], OPD_TooManyRequestsError)
+
+
+def test_load_callback(fake_source):
+    results = bulk.load(datasets.loc[[10,11]], callback=lambda idx, table: len(table), pbar=False)
+    assert results=={10:1, 11:1}
+
+
+class _FakeTable:
+    saved = []
+    def __init__(self, df):
+        self.df = df
+    def to_parquet(self, output_dir, mixed=False):
+        self.saved.append(self)
+        return f"{output_dir}/{self.df['url'].iloc[0]}.parquet"
+
+
+def test_load_callback_output_dir(fake_source, monkeypatch, tmp_path):
+    load = _FakeSource.load
+    monkeypatch.setattr(_FakeSource, "load", lambda *args, **kwargs: _FakeTable(load(*args, **kwargs)))
+    _FakeTable.saved = []
+    results = bulk.load(datasets.loc[[10,11]], output_dir=tmp_path, pbar=False,
+                        callback=lambda idx, table: table in _FakeTable.saved)
+    # Callback is called after table is saved
+    assert results=={10:True, 11:True}
+
+
+def test_throttle_host():
+    start = time.monotonic()
+    data_loader._throttle_host('https://throttle.com', interval=0)
+    data_loader._throttle_host('https://throttle.com/1', interval=0.1)
+    data_loader._throttle_host('https://throttle.com/2', interval=0.1)
+    data_loader._throttle_host('https://other.com', interval=0.1)
+    # Only lower bound is checked since the duration of sleeps can be longer than requested
+    assert time.monotonic()-start >= 0.2
@@ -0,0 +1,69 @@
+import os
+import pytest
+import time
+
+from openpolicedata import cache
+
+url = "https://data.example.com/query"
+
+@pytest.fixture()
+def cache_dir(tmp_path):
+    cache.enable(tmp_path)
+    yield tmp_path
+    cache.disable()
+
+def test_disabled():
+    assert not cache.is_enabled()
+    cache.put_json(url, {"where":"1=1"}, {"count":1})
+    assert cache.get_json(url, {"where":"1=1"}) is None
+
+def test_get_put(cache_dir):
+    result = {"features":[{"attributes":{"a":1}}]}
+    cache.put_json(url, {"where":"1=1", "offset":0}, result)
+    assert cache.get_json(url, {"offset":0, "where":"1=1"}) == result
+    # None parameters are not sent with requests
+    assert cache.get_json(url, {"offset":0, "where":"1=1", "limit":None}) == result
+    assert cache.get_json(url, {"offset":1, "where":"1=1"}) is None
+
+def test_info(cache_dir):
+    cache.put_json(url, {"offset":0}, [1,2])
+    cache.put(url, {"offset":1}, b"a;b\n1;2")
+    df = cache.info()
+    assert len(df)==2
+    assert (df["url"]==url).all()
+    assert not df["expired"].any()
+
+def test_ttl(cache_dir):
+    cache.enable(cache_dir, ttl=1)
+    cache.put_json(url, None, [1])
+    filename = cache.info()["filename"].iloc[0]
+    old = time.time()-10
+    os.utime(filename, (old, old))
+    assert cache.get_json(url) is None
+    assert cache.info()["expired"].all()
+    assert cache.purge(expired_only=True)==1
+    assert len(cache.info())==0
+
+def test_lru_eviction(cache_dir):
+    content = os.urandom(2000)  # Does not compress
+    cache.put(url, {"offset":0}, content)
+    cache.put(url, {"offset":1}, content)
+    # Access 1st so that 2nd is least recently used
+    now = time.time()
+    for f in cache.info()["filename"]:
+        os.utime(f, (now-100, now-100))
+    assert cache.get(url, {"offset":0}) == content
+
+    cache.enable(cache_dir, max_size=5000)
+    cache.put(url, {"offset":2}, content)
+
+    assert cache.get(url, {"offset":0}) == content
+    assert cache.get(url, {"offset":1}) is None
+    assert cache.get(url, {"offset":2}) == content
+
+def test_purge_url(cache_dir):
+    cache.put_json(url, None, [1])
+    cache.put_json("https://other.com", None, [1])
+    assert cache.purge("other.com")==1
+    assert cache.info()["url"].tolist()==[url]
+    assert cache.purge()==1
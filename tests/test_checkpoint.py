@@ -0,0 +1,37 @@
+import os
+import pytest
+
+from openpolicedata import checkpoint
+
+@pytest.fixture()
+def checkpoint_dir(tmp_path):
+    checkpoint.enable(tmp_path)
+    yield tmp_path
+    checkpoint.disable()
+
+def test_disabled():
+    assert not checkpoint.is_enabled()
+    spool = checkpoint.Spool("https://data.example.com", "1=1")
+    spool.put(0, 10, [{"a":1}])
+    assert spool.get(0, 10) is None
+
+def test_get_put_remove(checkpoint_dir):
+    result = {"features":[{"attributes":{"a":1}}]}
+    spool = checkpoint.Spool("https://data.example.com", "1=1", "*")
+    spool.put(0, 1, result)
+    assert spool.get(0, 1) == result
+    assert spool.get(1, 1) is None
+    # Pages are shared by downloads with the same key
+    assert checkpoint.Spool("https://data.example.com", "1=1", "*").get(0, 1) == result
+    assert checkpoint.Spool("https://data.example.com", "1=0", "*").get(0, 1) is None
+
+    spool.remove()
+    assert spool.get(0, 1) is None
+    assert len(os.listdir(checkpoint_dir))==0
+
+def test_clear(checkpoint_dir):
+    checkpoint.Spool("https://data.example.com", "1=1").put(0, 1, [1])
+    checkpoint.Spool("https://data.example.com", "1=0").put(0, 1, [2])
+    assert len(os.listdir(checkpoint_dir))==2
+    checkpoint.clear()
+    assert len(os.listdir(checkpoint_dir))==0
@@ -1,5 +1,6 @@
 import pytest
 
+import datetime
 import numbers
 import pandas as pd
 
@@ -96,4 +97,40 @@ def test_mixed_to_datetime(dates, format):
 def test_mixed_floats_to_datetime(dates):
     new_dates = pd.Series({k:v.strftime('%Y%m%d.0') if k/2%1!=0 else v.strftime('%#m%d%Y.0') for k,v in dates.items()}, name=dates.name)
     dates_conv = opd.datetime_parser.to_datetime(new_dates)
-    pd.testing.assert_series_equal(pd.to_datetime(dates.dt.date), dates_conv.dt.tz_localize(None))
\ No newline at end of file
+    pd.testing.assert_series_equal(pd.to_datetime(dates.dt.date), dates_conv.dt.tz_localize(None))
+
+def test_parse_year_month_to_period():
+    df = pd.DataFrame({'year':pd.to_datetime(['2021','2022','2023']), 'month':['March', None, 'sept']})
+    result = opd.datetime_parser.parse_date_to_datetime(df)
+    pd.testing.assert_series_equal(result, pd.Series([pd.Period('2021-03','M'), pd.Period('2022','Y'), pd.Period('2023-09','M')]))
+
+
+@pytest.mark.parametrize('values', [['20210105', '20220317', None, '20230930'], ['01/05/2021', '03/17/2022 13:45:00', None, '09/30/2023']])
+def test_parse_date_strings(values):
+    result = opd.datetime_parser.parse_date_to_datetime(pd.Series(values))
+    expected = pd.Series([pd.Timestamp(x) if x else pd.NaT for x in values])
+    pd.testing.assert_series_equal(result, expected)
+
+
+@pytest.mark.parametrize('as_timedelta', [False, True])
+def test_parse_time_strings(as_timedelta):
+    times = pd.Series(['13:45', '0830', '1:05:30 PM', '12:15 AM', '2575', None, '-'])
+    expected = [(13,45,0), (8,30,0), (13,5,30), (0,15,0), None, None, None]
+    result = opd.datetime_parser.parse_time(times, as_timedelta=as_timedelta)
+    if as_timedelta:
+        expected = pd.Series([pd.Timedelta(hours=x[0], minutes=x[1], seconds=x[2]) if x else pd.NaT for x in expected])
+        pd.testing.assert_series_equal(result, expected)
+    else:
+        assert [(x.hour, x.minute, x.second) if pd.notnull(x) else None for x in result] == expected
+
+
+@pytest.mark.parametrize('empty_time', ['NaT', 'ignore'])
+@pytest.mark.parametrize('tz', [None, 'US/Eastern'])
+def test_merge_date_and_time(empty_time, tz):
+    dates = pd.Series(pd.to_datetime(['2022-03-12', '2022-03-13', '2022-07-04 10:00:00.5', None], format='ISO8601')).dt.tz_localize(tz)
+    times = pd.Series([datetime.time(23,59,1), datetime.time(14,0), None, datetime.time(1,0)])
+    expected = pd.Series([d.replace(hour=t.hour, minute=t.minute, second=t.second) if pd.notnull(t) else (d if empty_time=='ignore' else pd.NaT) 
+                          for d,t in zip(dates, times)])
+    expected[dates.isnull()] = pd.NaT
+    result = opd.datetime_parser.merge_date_and_time(dates, times, empty_time)
+    pd.testing.assert_series_equal(result, expected)
@@ -5,6 +5,7 @@ import sys
 if __name__ == "__main__":
 	sys.path.append('../openpolicedata')
 from openpolicedata import data_loaders
+from openpolicedata.exceptions import OPD_TooManyRequestsError
 import pandas as pd
 try:
     import geopandas as gpd
@@ -193,3 +194,165 @@ def test_arcgis_pandas():
 
     # Ensure that count updates properly with different call (most recent count is cached)
     assert count!=count2
+
+def test_arcgis_threaded_load():
+    url = "https://gis.charlottenc.gov/arcgis/rest/services/CMPD/CMPDEmployeeDemographics/MapServer/0"
+    gis = data_loaders.Arcgis(url)
+    # Force several pages
+    gis.max_record_count = 200
+    df = gis.load(pbar=False)
+    df_threaded = gis.load(pbar=False, max_workers=4)
+
+    pd.testing.assert_frame_equal(df, df_threaded)
+
+    offset = 150
+    df_threaded = gis.load(pbar=False, max_workers=4, offset=offset)
+    pd.testing.assert_frame_equal(df.iloc[offset:].reset_index(drop=True), df_threaded)
+
+
+def _varint(value):
+    out = b""
+    while True:
+        b = value & 0x7f
+        value >>= 7
+        if value:
+            out+=bytes([b | 0x80])
+        else:
+            return out+bytes([b])
+
+def _zz(value):
+    return (value << 1) ^ (value >> 63)
+
+def _msg(field, content):
+    return _varint(field << 3 | 2) + _varint(len(content)) + content
+
+def _num(field, value):
+    return _varint(field << 3) + _varint(value)
+
+def _dbl(field, value):
+    import struct
+    return _varint(field << 3 | 1) + struct.pack("<d", value)
+
+def test_arcgis_pbf_decode():
+    fields = _msg(13, _msg(1, b"OBJECTID") + _num(2, 6)) + _msg(13, _msg(1, b"name") + _num(2, 4)) + \
+        _msg(13, _msg(1, b"date") + _num(2, 5)) + _msg(13, _msg(1, b"value") + _num(2, 3))
+    transform = _msg(12, _num(1, 0) + _msg(2, _dbl(1, 0.5) + _dbl(2, 0.25)) + _msg(3, _dbl(1, -100.0) + _dbl(2, 50.0)))
+    feat1 = _msg(15, _msg(1, _num(5, 1)) + _msg(1, _msg(1, "café".encode())) + _msg(1, _num(6, 1672531200000)) + 
+                 _msg(1, _dbl(3, 2.5)) + _msg(2, _msg(3, _varint(_zz(10)) + _varint(_zz(-4)))))
+    feat2 = _msg(15, _msg(1, _num(5, 2)) + _msg(1, b"") + _msg(1, _num(6, 1)) + _msg(1, _dbl(3, -1.0)))
+    result = _msg(1, _msg(1, b"OBJECTID") + _num(7, 0) + _msg(8, _num(1, 4326)) + _num(9, 1) + transform + fields + feat1 + feat2)
+    content = _msg(2, result)
+
+    data = data_loaders.arcgis_pbf.decode(content)
+    assert data["spatialReference"]["wkid"]==4326
+    assert data["exceededTransferLimit"]
+    assert [x["type"] for x in data["fields"]]==['esriFieldTypeOID','esriFieldTypeString','esriFieldTypeDate','esriFieldTypeDouble']
+    assert data["features"]==[
+        {"attributes":{"OBJECTID":1, "name":"café", "date":1672531200000, "value":2.5}, "geometry":{"x":-95.0, "y":51.0}},
+        {"attributes":{"OBJECTID":2, "name":None, "date":1, "value":-1.0}}
+    ]
+
+    with pytest.raises(ValueError):
+        data_loaders.arcgis_pbf.decode(_msg(2, _msg(1, _num(7, 3))))
+
+
+def test_arcgis_objectid_paging():
+    url = "https://gis.charlottenc.gov/arcgis/rest/services/CMPD/CMPDEmployeeDemographics/MapServer/0"
+    gis = data_loaders.Arcgis(url)
+    # Force several pages
+    gis.max_record_count = 200
+    df = gis.load(pbar=False)
+    df_ids = gis.load(pbar=False, paging='objectid', max_workers=4)
+
+    oid = gis._oid_field
+    pd.testing.assert_frame_equal(df.sort_values(oid, ignore_index=True), df_ids)
+
+
+def _offline_arcgis(monkeypatch, date_type, date_format, requests):
+    loader = object.__new__(data_loaders.Arcgis)
+    loader.url = "https://fake.com/arcgis/rest/services/Fake/FeatureServer/0"
+    loader.query = {}
+    loader.verify = False
+    loader.date_field = "date"
+    loader._date_type = date_type
+    loader._date_format = date_format
+    loader._ineq_comp = False
+    loader._full_date = True
+    loader._supports_statistics = True
+    loader._fields = [{'name':'OBJECTID', 'type':'esriFieldTypeOID'}, {'name':'date', 'type':date_type}]
+    def request(where=None, return_count=False, out_statistics=None, **kwargs):
+        requests.append((where, return_count, out_statistics is not None))
+        if out_statistics:
+            return {'features':[{'attributes':{'count':5}}]}
+        return {'count':10}
+    monkeypatch.setattr(loader, "_Arcgis__request", request, raising=False)
+    return loader
+
+
+@pytest.mark.parametrize('date_type, date_format', [('esriFieldTypeDate',0), 
+    ('esriFieldTypeString',data_loaders.arcgis_class.repeat_format("{} LIKE '%[0-9][/-][0-9][0-9][/-]{}%'"))])
+def test_arcgis_aggregate_offline(monkeypatch, date_type, date_format):
+    data_loaders.data_loader.count_cache.clear()
+    requests = []
+    loader = _offline_arcgis(monkeypatch, date_type, date_format, requests)
+    agg = loader.aggregate(date=2023)
+    assert agg['count'].tolist()==[5]
+    # Where query is built without a count request
+    assert len(requests)==1 and requests[0][2]
+    assert '2023' in requests[0][0]
+
+
+def test_arcgis_aggregate_inexact_where(monkeypatch):
+    data_loaders.data_loader.count_cache.clear()
+    requests = []
+    loader = _offline_arcgis(monkeypatch, 'esriFieldTypeString', 
+                             data_loaders.arcgis_class.repeat_format("{} LIKE '%[0-9][/-][0-9][0-9][/-]{}%'"), requests)
+    df = pd.DataFrame({'date':pd.to_datetime(['2023-01-15','2023-02-15','2023-05-01']), 'race':['W','B','W']})
+    def load(date=None, **kwargs):
+        return df[(df['date']>=date[0]) & (df['date']<=date[1])]
+    monkeypatch.setattr(loader, "load", load, raising=False)
+
+    # Where query only filters by year for text date fields so data is aggregated locally
+    agg = loader.aggregate('race', date=['2023-01-01','2023-03-01'])
+    assert not any(x[2] for x in requests)
+    assert agg.set_index('race')['count'].to_dict()=={'B':1, 'W':1}
+
+
+@pytest.mark.parametrize('error', [requests.exceptions.ReadTimeout, 429])
+def test_arcgis_request_page_attempts(monkeypatch, error):
+    attempts = []
+    class Session:
+        def get(self, url, **kwargs):
+            attempts.append(url)
+            if error==429:
+                return _FakeResponse({'error':{'code':429, 'message':'Too many requests'}})
+            raise error("Timed out")
+    class Spool:
+        def get(self, offset, count):
+            return None
+        def put(self, offset, count, data):
+            pass
+
+    loader = object.__new__(data_loaders.Arcgis)
+    loader.url = "https://fake.com/arcgis/rest/services/Fake/FeatureServer/0"
+    loader.verify = False
+    loader.date_field = None
+    loader._supports_pbf = False
+    monkeypatch.setattr(data_loaders.data_loader.session_pool, "get_session", lambda legacy=False: Session())
+    monkeypatch.setattr(data_loaders.data_loader, "retry_policy", data_loaders.data_loader.RetryPolicy(max_attempts=4, backoff=0))
+
+    with pytest.raises((requests.exceptions.ReadTimeout, OPD_TooManyRequestsError)):
+        loader._Arcgis__request_page("1=1", 0, 10, "*", Spool())
+    # Request is only retried by the retry policy of the page request
+    assert len(attempts)==4
+
+
+class _FakeResponse:
+    status_code = 200
+    headers = {"Content-Type":"application/json"}
+    def __init__(self, result):
+        self.result = result
+    def raise_for_status(self):
+        pass
+    def json(self):
+        return self.result
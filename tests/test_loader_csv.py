@@ -124,3 +124,45 @@ def test_csv_year_filter(url, date_field):
 
     # Ensure that count updates properly with different call (most recent count is cached)
     assert count!=count2
+
+    batches = list(loader.load_iter(7, date=year, pbar=False))
+    assert all(len(x)==7 for x in batches[:-1])
+    df_iter = pd.concat(batches, ignore_index=True)
+    assert len(df_iter) == len(df)
+    assert df_iter[date_field].equals(df[date_field])
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.headers = {}
+        self.url = "https://fake.com/data.csv"
+    def iter_lines(self):
+        for line in self.text.splitlines():
+            yield line.encode()
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        pass
+
+
+def test_csv_load_iter_matches_load(monkeypatch):
+    rows = ["id,zip,count,flag,date"]
+    for k in range(20):
+        # count is only null and zip is only numbers in rows after the first batch
+        zip = f"A{k:04d}" if k<5 else f"0{k:04d}"
+        count = "" if k==12 else str(k)
+        rows.append(f"{k},{zip},{count},{'True' if k%2 else 'False'},01/{k+1:02d}/2023")
+    text = "\n".join(rows)
+    monkeypatch.setattr(data_loaders.Csv, "_Csv__open", lambda self: _FakeResponse(text))
+    loader = data_loaders.Csv("https://fake.com/data.csv", date_field="date")
+
+    df = loader.load(pbar=False)
+    batches = list(loader.load_iter(5, pbar=False))
+    assert all(len(x)==5 for x in batches)
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), df)
+    # Column of strings is not converted to numbers in batches that only contain numbers
+    assert all(x['zip'].dtype==object for x in batches)
+
+    pd.testing.assert_frame_equal(pd.concat(loader.load_iter(5, date=['2023-01-03','2023-01-15'], offset=2, pbar=False), ignore_index=True), 
+                                  loader.load(date=['2023-01-03','2023-01-15'], offset=2, pbar=False))
@@ -1,4 +1,6 @@
+import pytest
 import sys
+from copy import deepcopy
 
 if __name__ == "__main__":
 	sys.path.append('../openpolicedata')
@@ -94,3 +96,73 @@ def test_socrata():
 
     assert len(df) == count
     assert rows.equals(df)
+
+
+def _from_features(records):
+    # GeoDataFrame construction previously used for each page of records
+    from numpy import nan
+    features = []
+    for p in records:
+        p = dict(p)
+        feature = {"type" : "Feature", "properties" : p}
+        if "geolocation" in p:
+            geo = p.pop("geolocation")
+            if list(geo.keys()) == ["human_address"]:
+                feature["geometry"] = {"type" : "Point", "coordinates" : (nan, nan)}  
+            elif "coordinates" in geo:
+                feature["geometry"] = geo
+            else:
+                feature["geometry"] = {"type" : "Point", "coordinates" : (float(geo["longitude"]), float(geo["latitude"]))}
+        elif "geocoded_column" in p:
+            feature["geometry"] = p.pop("geocoded_column")
+        else:
+            feature["geometry"] = {"type" : "Point", "coordinates" : (nan, nan)} 
+        features.append(feature)
+    return gpd.GeoDataFrame.from_features({"type" : "FeatureCollection", "features" : features}, crs=4326)
+
+
+@pytest.mark.skipif(not _has_gpd, reason="geopandas is not installed")
+@pytest.mark.parametrize('records', [
+    [{"a":"1", "geolocation":{"latitude":"38.5", "longitude":"-77.1", "human_address":"{}"}}],  # Latitude and longitude
+    [{"a":"2", "geolocation":{"human_address":"{}"}}],  # Address only
+    [{"a":"3", "geocoded_column":{"type":"Point", "coordinates":[-77.2, 38.6]}}],  # Point
+    [{"a":"4", "geocoded_column":{"type":"LineString", "coordinates":[[-77.2, 38.6], [-77.3, 38.7]]}}],  # Not a point
+    [{"a":"5"}],  # Missing geometry
+    [{"a":"6", "geocoded_column":None}],  # Null geometry
+    [{"a":"1", "geolocation":{"latitude":"38.5", "longitude":"-77.1"}}, {"a":"2", "geolocation":{"human_address":"{}"}}, 
+     {"a":"5", "b":"x"}],
+    [{"a":"3", "geocoded_column":{"type":"Point", "coordinates":[-77.2, 38.6]}}, {"a":"6", "geocoded_column":None},
+     {"a":"4", "geocoded_column":{"type":"Polygon", "coordinates":[[[0,0], [1,0], [1,1], [0,0]]]}}, {"a":"5"}],
+    ])
+def test_records_to_geodataframe(records):
+    orig = list(records)
+    orig_copy = deepcopy(records)
+    gdf = data_loaders.socrata._records_to_geodataframe(records)
+    # Record dictionaries are not modified
+    assert orig==orig_copy
+
+    expected = _from_features(orig_copy)
+    assert gdf.columns.tolist()==expected.columns.tolist()
+    pd.testing.assert_frame_equal(pd.DataFrame(gdf.drop(columns="geometry")), pd.DataFrame(expected.drop(columns="geometry")))
+    assert gdf.crs==expected.crs
+    assert gdf.geometry.to_wkt().tolist()==expected.geometry.to_wkt().tolist()
+
+
+@pytest.mark.parametrize('use_gpd', [True, False])
+def test_socrata_columns_geometry(monkeypatch, use_gpd):
+    loader = data_loaders.Socrata("fake.com", "abcd-1234")
+    requested = []
+    def get(**kwargs):
+        requested.append(kwargs["select"])
+        return [{":id":"1", "a":"1", "geolocation":{"latitude":"38.5", "longitude":"-77.1"}}] if len(requested)==1 else []
+    monkeypatch.setattr(loader, "_Socrata__get", get)
+    monkeypatch.setattr(loader, "_Socrata__get_metadata", lambda: {"columns":[{"fieldName":"a"}, {"fieldName":"geolocation"}]})
+    monkeypatch.setattr(loader, "get_count", lambda **kwargs: 1)
+    monkeypatch.setattr(data_loaders.socrata, "_use_gpd_force", use_gpd and _has_gpd)
+
+    df = loader.load(columns=["a"], pbar=False)
+    if use_gpd and _has_gpd:
+        assert requested[0]==":id, a, geolocation"
+        assert df.columns.tolist()==["geometry", "a"]
+    else:
+        assert requested[0]==":id, a"
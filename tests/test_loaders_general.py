@@ -1,10 +1,16 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import pytest
+import requests
 import sys
+import time
 
 if __name__ == "__main__":
 	sys.path.append('../openpolicedata')
 from openpolicedata import data_loaders
+from openpolicedata.exceptions import OPD_TooManyRequestsError
 
 
 def test_process_date_input_empty():
@@ -56,4 +62,298 @@ def test_sortby_other_columns(loader_class, url, dataset, sort_col):
     # Ensure natural sorting
     col = df1[sort_col].apply(lambda x: int(x) if isinstance(x,str) and x.isdigit() else x)
 
-    assert all((pd.isnull(x) and pd.isnull(y)) or x==y for x,y in zip(col.tolist(), col.sort_values().tolist()))
\ No newline at end of file
+    assert all((pd.isnull(x) and pd.isnull(y)) or x==y for x,y in zip(col.tolist(), col.sort_values().tolist()))
+
+@pytest.mark.parametrize('nbatch, offset', [(3,0), (4,2), (10,0), (2,11)])
+def test_iter_batches(nbatch, offset):
+    df = pd.DataFrame({'a':range(10)})
+    chunks = [df.iloc[:1], df.iloc[1:1], df.iloc[1:6], df.iloc[6:]]
+    batches = list(data_loaders.data_loader._iter_batches(chunks, nbatch, offset))
+    assert all(len(x)==nbatch for x in batches[:-1])
+    if len(batches):
+        pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), df.iloc[offset:].reset_index(drop=True))
+    else:
+        assert offset>=len(df)
+
+
+def test_select_columns():
+    df = pd.DataFrame({'a':[1,2], 'b':[3,4], 'c':[5,6]})
+    assert data_loaders.data_loader._select_columns(df, None) is df
+    pd.testing.assert_frame_equal(data_loaders.data_loader._select_columns(df, ['c','a']), df[['c','a']])
+    with pytest.raises(ValueError):
+        data_loaders.data_loader._select_columns(df, ['d'])
+
+
+def test_page_to_columns():
+    pages = [[{'a':None, 'b':'x', 'd':1}, {'a':None, 'b':'y', 'd':2}], [], 
+             [{'a':1, 'b':'z', 'c':True, 'd':3}, {'a':2, 'b':None, 'c':False, 'd':4.5}],
+             [{'a':3, 'b':'w', 'c':True, 'd':5}]]
+    columns = [data_loaders.data_loader._page_to_columns(x, numeric_cols=['a','d']) for x in pages]
+    df = data_loaders.data_loader._concat_pages(columns)
+    pd.testing.assert_frame_equal(df, pd.DataFrame.from_records([y for x in pages for y in x]))
+    assert data_loaders.data_loader._concat_pages([data_loaders.data_loader._page_to_columns([])]).empty
+    df = data_loaders.data_loader._concat_pages([data_loaders.data_loader._page_to_columns(pages[2], numeric_cols=['a'])])
+    pd.testing.assert_frame_equal(df, pd.DataFrame.from_records(pages[2]))
+
+
+@pytest.mark.parametrize('loader_class, url, dataset, date_field, group_col', [
+     (data_loaders.Socrata, "www.transparentrichmond.org","asfd-zcvn", "occurreddatetime", "officernumbershots"),
+     (data_loaders.Ckan, 'https://data.boston.gov/', '58ad5180-f5f5-4893-a681-742971f71582', 'incident_date', 'incident_district')])
+def test_load_columns(loader_class, url, dataset, date_field, group_col):
+    loader = loader_class(url, dataset, date_field=date_field)
+    df = loader.load(pbar=False)
+    df_cols = loader.load(pbar=False, columns=[group_col, date_field])
+    assert df_cols.columns.tolist()==[group_col, date_field]
+    pd.testing.assert_frame_equal(df_cols, df[[group_col, date_field]])
+
+
+@pytest.mark.parametrize('loader_class, url, dataset, date_field, group_col', [
+     (data_loaders.Socrata, "www.transparentrichmond.org","asfd-zcvn", "occurreddatetime", "officernumbershots"),
+     (data_loaders.Ckan, 'https://data.boston.gov/', '58ad5180-f5f5-4893-a681-742971f71582', 'incident_date', 'incident_district')])
+def test_aggregate(loader_class, url, dataset, date_field, group_col):
+    loader = loader_class(url, dataset, date_field=date_field)
+    df = loader.load(pbar=False)
+    agg = loader.aggregate(group_col, by_year=True)
+
+    assert agg.columns.tolist()==[group_col, 'year', 'count']
+    assert agg['count'].sum()==len(df)
+    counts = df.groupby([df[group_col].astype(str), df[date_field].dt.year]).size()
+    assert all(counts[(str(x),y)]==z for x,y,z in zip(agg[group_col], agg['year'], agg['count']) if pd.notnull(x) and pd.notnull(y))
+
+
+def test_parse_metrics():
+    assert data_loaders.data_loader._parse_metrics(None)==[("count", None, "count")]
+    assert data_loaders.data_loader._parse_metrics(["count(*)", "AVG( age )"])==[("count", None, "count"), ("avg", "age", "avg_age")]
+    with pytest.raises(ValueError):
+        data_loaders.data_loader._parse_metrics("median(age)")
+
+
+def test_aggregate_dataframe():
+    df = pd.DataFrame({'race':['W','B','W',None],'age':[20,30,40,50],
+                       'date':pd.to_datetime(['2020-01-01','2020-05-01','2021-01-01','2021-02-02'])})
+    metrics = data_loaders.data_loader._parse_metrics(['count','max(age)'])
+    agg = data_loaders.data_loader._aggregate_dataframe(df, ['race'], metrics, 'date')
+    assert agg.columns.tolist()==['race','year','count','max_age']
+    assert agg['race'].tolist()[:3]==['B','W','W']
+    assert agg['year'].tolist()==[2020, 2020, 2021, 2021]
+    assert agg['count'].tolist()==[1,1,1,1]
+    assert agg['max_age'].tolist()==[30,20,40,50]
+
+    agg = data_loaders.data_loader._aggregate_dataframe(df, [], metrics)
+    assert agg.to_dict('records')==[{'count':4, 'max_age':50}]
+    agg = data_loaders.data_loader._aggregate_dataframe(df.iloc[:0], [], metrics)
+    assert agg['count'].tolist()==[0]
+
+
+class _YearsLoader(data_loaders.data_loader.Data_Loader):
+    def __init__(self, counts, grouped=False):
+        self.url = "https://data.example.com"
+        self.date_field = "date"
+        self.counts = counts
+        self.grouped = grouped
+        self.requested = []
+    def isfile(self):
+        return False
+    def get_count(self, date=None, **kwargs):
+        self.requested.append(date)
+        return self.counts.get(date, 0)
+    def load(self, *args, **kwargs):
+        pass
+    def _get_years_grouped(self):
+        return list(self.counts.keys()) if self.grouped else None
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_get_years_counts(max_workers):
+    cur_year = pd.Timestamp.now().year
+    counts = {cur_year:1, cur_year-1:5, cur_year-9:2, cur_year-25:3}
+    loader = _YearsLoader(counts)
+    years = loader.get_years(max_workers=max_workers)
+    assert years == [cur_year, cur_year-1, cur_year-9]
+    # No more counts are requested than when requesting one at a time
+    assert sorted(loader.requested, reverse=True) == list(range(cur_year, cur_year-20, -1))
+
+    for found, nrequests in [(cur_year, 11), (cur_year-5, 16), (None, 20)]:
+        loader = _YearsLoader({found:1} if found else {})
+        assert loader.get_years(max_workers=max_workers) == ([found] if found else [])
+        assert sorted(loader.requested, reverse=True) == list(range(cur_year, cur_year-nrequests, -1))
+
+    loader = _YearsLoader(counts)
+    assert loader.get_years(check=[cur_year-1, cur_year-2], max_workers=max_workers) == [cur_year-1]
+    assert sorted(loader.requested) == [cur_year-2, cur_year-1]
+
+
+def test_get_years_grouped():
+    cur_year = pd.Timestamp.now().year
+    loader = _YearsLoader({cur_year+1:1, cur_year-25:3, cur_year:1}, grouped=True)
+    assert loader.get_years() == [cur_year, cur_year-25]
+    assert loader.get_years(check=[cur_year-25]) == [cur_year-25]
+    assert len(loader.requested)==0
+
+
+def test_count_cache():
+    cache = data_loaders.data_loader.CountCache(ttl=None)
+    assert cache.get('key') is None
+    cache.put('key', (10, "where"))
+    assert cache.get('key') == (10, "where")
+    assert cache.stats() == {"hits":1, "misses":1, "size":1}
+    cache.clear()
+    assert cache.stats() == {"hits":0, "misses":0, "size":0}
+
+
+def test_count_cache_expired():
+    cache = data_loaders.data_loader.CountCache(ttl=-1)
+    cache.put('key', 10)
+    assert cache.get('key') is None
+    assert cache.stats() == {"hits":0, "misses":1, "size":0}
+
+
+def test_count_key_shared_across_instances():
+    loader1 = data_loaders.Carto("phl", "shootings", date_field="date_")
+    loader2 = data_loaders.Carto("phl", "shootings", date_field="date_")
+    assert loader1._count_key(2020) == loader2._count_key(2020)
+    assert loader1._count_key(2020) != loader1._count_key(2021)
+    assert loader1._count_key(2020) != data_loaders.Carto("phl", "shootings", query={"a":1})._count_key(2020)
+
+
+def test_count_cache_date_field(monkeypatch):
+    data_loaders.data_loader.count_cache.clear()
+    # Return a count that depends on the where clause
+    monkeypatch.setattr(data_loaders.Carto, "_Carto__request", 
+                        lambda self, where=None, **kwargs: {"rows":[{"count":len(where)}]})
+    loader1 = data_loaders.Carto("phl", "shootings", date_field="date_")
+    loader2 = data_loaders.Carto("phl", "shootings", date_field="other_date")
+    assert loader1._count_key(2020) != loader2._count_key(2020)
+    count1 = loader1.get_count(2020)
+    count2 = loader2.get_count(2020)
+    assert count1 != count2
+    assert data_loaders.data_loader.count_cache.stats()["size"]==2
+    assert loader1.get_count(2020)==count1
+    data_loaders.data_loader.count_cache.clear()
+
+
+class _SlowLoader(_YearsLoader):
+    active = 0
+    max_active = 0
+    def load(self, date=None, **kwargs):
+        _SlowLoader.active+=1
+        _SlowLoader.max_active = max(_SlowLoader.max_active, _SlowLoader.active)
+        time.sleep(0.05)
+        _SlowLoader.active-=1
+        return pd.DataFrame({'date':[date]})
+
+
+def test_aload():
+    async def load_all():
+        loaders = [_SlowLoader({}) for _ in range(3*data_loaders.data_loader.max_requests_per_host)]
+        return await asyncio.gather(*[x.aload(date=k) for k,x in enumerate(loaders)])
+    
+    dfs = asyncio.run(load_all())
+    assert [df['date'].iloc[0] for df in dfs] == list(range(len(dfs)))
+    # All loaders have the same host
+    assert 1 < _SlowLoader.max_active <= data_loaders.data_loader.max_requests_per_host
+
+
+def test_aload_executor():
+    async def load_all(executor):
+        loaders = [_SlowLoader({}) for _ in range(3)]
+        return await asyncio.gather(*[x.aload(date=k, executor=executor) for k,x in enumerate(loaders)])
+    
+    _SlowLoader.max_active = 0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        dfs = asyncio.run(load_all(executor))
+    assert [df['date'].iloc[0] for df in dfs] == list(range(len(dfs)))
+    assert _SlowLoader.max_active==1
+
+
+class _FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+    def close(self):
+        pass
+
+class _FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.num_requests = 0
+    def get(self, url, **kwargs):
+        self.num_requests+=1
+        r = self.responses.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+
+def test_retry_policy_get():
+    policy = data_loaders.data_loader.RetryPolicy(backoff=0)
+    session = _FakeSession([_FakeResponse(503), requests.exceptions.ConnectionError(), _FakeResponse(200)])
+    assert policy.get("https://data.example.com", session=session).status_code==200
+    assert session.num_requests==3
+
+    # Last response is returned once attempts are exhausted
+    session = _FakeSession([_FakeResponse(429)]*4)
+    assert policy.get("https://data.example.com", session=session).status_code==429
+    assert session.num_requests==4
+
+    # Non-retryable status code and errors
+    session = _FakeSession([_FakeResponse(404), _FakeResponse(200)])
+    assert policy.get("https://data.example.com", session=session).status_code==404
+    session = _FakeSession([requests.exceptions.SSLError(), _FakeResponse(200)])
+    with pytest.raises(requests.exceptions.SSLError):
+        policy.get("https://data.example.com", session=session)
+
+
+def test_retry_policy_call():
+    policy = data_loaders.data_loader.RetryPolicy(max_attempts=2, backoff=0)
+    session = _FakeSession([OPD_TooManyRequestsError(), 1])
+    assert policy.call(session.get, "https://data.example.com")==1
+    session = _FakeSession([OPD_TooManyRequestsError()]*2)
+    with pytest.raises(OPD_TooManyRequestsError):
+        policy.call(session.get, "https://data.example.com")
+    session = _FakeSession([ValueError(), 1])
+    with pytest.raises(ValueError):
+        policy.call(session.get, "https://data.example.com")
+    assert session.num_requests==1
+
+
+def test_retry_policy_delay():
+    policy = data_loaders.data_loader.RetryPolicy(backoff=1, max_backoff=5, jitter=False)
+    assert [policy.get_delay(k) for k in range(4)]==[1,2,4,5]
+    assert policy.get_delay(0, _FakeResponse(429, {"Retry-After":"3"}))==3
+    assert policy.get_delay(0, _FakeResponse(429, {"Retry-After":"Wed, 21 Oct 2015 07:28:00 GMT"}))==0
+    policy = data_loaders.data_loader.RetryPolicy(backoff=1, jitter=True)
+    assert all(0.5<=policy.get_delay(0)<=1.5 for _ in range(10))
+
+
+def test_session_pool():
+    pool = data_loaders.data_loader.SessionPool(pool_maxsize=2, host_pool_sizes={'big.example.com':8})
+    session = pool.get_session()
+    assert pool.get_session() is session
+    assert session.get_adapter('https://data.example.com/x')._pool_maxsize==2
+    assert session.get_adapter('https://big.example.com/x')._pool_maxsize==8
+
+    legacy = pool.get_session(legacy=True)
+    assert legacy is not session
+    assert isinstance(legacy.get_adapter('https://data.example.com'), data_loaders.data_loader.CustomHttpAdapter)
+
+    pool.set_host_pool_size('big.example.com', 3)
+    assert session.get_adapter('https://big.example.com/x')._pool_maxsize==3
+
+    other = requests.Session()
+    other.headers['X-App-token'] = 'abc'
+    pool.mount(other)
+    assert other.get_adapter('https://data.example.com') is session.get_adapter('https://data.example.com')
+    assert other.headers['X-App-token']=='abc'
+
+    pool.close()
+    assert pool.get_session() is not session
+
+
+def test_points_from_xy():
+    pytest.importorskip("geopandas")
+    x = np.array([1.0, np.nan, 3.0])
+    y = np.array([2.0, np.nan, 4.0])
+    geometry = data_loaders.data_loader._points_from_xy(x, y, np.array([False, False, True]))
+    assert (geometry[0].x, geometry[0].y) == (1.0, 2.0)
+    assert geometry[2] is None
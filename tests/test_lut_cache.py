@@ -0,0 +1,77 @@
+import os
+import pandas as pd
+import pytest
+
+from openpolicedata import lut_cache
+from openpolicedata import _converters as convert
+from openpolicedata import defs
+
+@pytest.fixture()
+def lut_dir(tmp_path):
+    lut_cache.clear()
+    lut_cache.enable(tmp_path)
+    yield tmp_path
+    lut_cache.clear()
+    lut_cache.disable()
+
+def _counting_converter():
+    calls = []
+    def converter(x, no_id, *args, **kwargs):
+        calls.append(x)
+        return [x.upper(), "Z"]
+    return converter, calls
+
+def test_memoize():
+    converter, calls = _counting_converter()
+    memoized = lut_cache.memoize(converter)
+    assert lut_cache.memoize(memoized) is memoized
+
+    value = memoized("a", "keep", "Source", None, {"A":"B"})
+    value.append("changed")
+    assert memoized("a", "keep", "Source", None, {"A":"B"}) == ["A", "Z"]
+    assert calls == ["a"]
+    # Other inputs are part of the key
+    memoized("a", "keep", "Other Source", None, {"A":"B"})
+    memoized("a", "keep", "Source", None, {"A":"C"})
+    memoized("a", "error", "Source", None, {"A":"B"})
+    assert calls == ["a", "a", "a", "a"]
+    lut_cache.clear()
+
+def test_convert_matches():
+    col = pd.Series(["W", "B", "WHITE", "Black", "H", None, "W"])
+    race_cats = defs.get_race_cats()
+    lut_cache.clear()
+    expected = convert.convert(convert._create_race_lut, col, "Source", cats=race_cats)
+    result = convert.convert(convert._create_race_lut, col, "Source", cats=race_cats)
+    pd.testing.assert_series_equal(result, expected)
+
+def test_save_and_load(lut_dir):
+    converter, calls = _counting_converter()
+    lut_cache.memoize(converter)("a", "keep")
+    lut_cache.save()
+    assert len(os.listdir(lut_dir))==1
+
+    # Simulate new session
+    lut_cache._luts.clear()
+    lut_cache.enable(lut_dir)
+    assert lut_cache.memoize(converter)("a", "keep") == ["A", "Z"]
+    assert calls == ["a"]
+
+def test_version(lut_dir, monkeypatch):
+    converter, calls = _counting_converter()
+    lut_cache.memoize(converter)("a", "keep")
+    lut_cache.save()
+
+    lut_cache._luts.clear()
+    monkeypatch.setattr(lut_cache, "_lut_version", lut_cache._lut_version+1)
+    lut_cache.enable(lut_dir)
+    lut_cache.memoize(converter)("a", "keep")
+    assert calls == ["a", "a"]
+
+def test_clear(lut_dir):
+    converter, _ = _counting_converter()
+    lut_cache.memoize(converter)("a", "keep")
+    lut_cache.save()
+    lut_cache.clear()
+    assert len(lut_cache._luts)==0
+    assert len(os.listdir(lut_dir))==0
@@ -9,7 +9,7 @@ import time
 if __name__ == "__main__":
 	import sys
 	sys.path.append('../openpolicedata')
-from openpolicedata import data, preproc
+from openpolicedata import data, datetime_parser, preproc
 from openpolicedata import defs
 from openpolicedata import Column, TableType
 from openpolicedata import log
@@ -128,6 +128,56 @@ def test_transform_map(std_table):
     assert isinstance(std_table.get_transform_map()[0], DataMapping)
 
 
+@pytest.mark.parametrize("table_name", ["table", "table_w_role"])
+def test_sampled_validation(table_name, request, monkeypatch):
+    table = request.getfixturevalue(table_name)
+    std_table = request.getfixturevalue("std_" + table_name)
+    monkeypatch.setattr(preproc, "_id_sample_size", 100)
+    monkeypatch.setattr(preproc, "_id_sample_max_unique", 20)
+    sampled = standardize(table)
+    assert [(x.orig_column_name, x.new_column_name) for x in sampled.get_transform_map()] == \
+        [(x.orig_column_name, x.new_column_name) for x in std_table.get_transform_map()]
+
+
+def test_check_proportion():
+    uncertain = []
+    assert preproc._check_proportion(uncertain, "col", 0.51, 0.5, 10000)==0.51
+    assert uncertain==["col"]
+    uncertain = []
+    preproc._check_proportion(uncertain, "col", 0.6, [0.1, 0.5], 10000)
+    assert uncertain==[]
+    assert preproc._check_proportion(None, "col", 0.5, 0.5, 100)==0.5
+
+
+def test_sampled_validation_near_threshold(monkeypatch):
+    monkeypatch.setattr(preproc, "_id_sample_size", 100)
+    # Rare values do not change the proportion of valid genders that the sample is validated with
+    df = pd.DataFrame({"col":["MALE"]*505 + ["XYZ"]*395 + [f"OTHER{k}" for k in range(100)]})
+    std = preproc.Standardizer(df, TableType.STOPS, 2023, source_name="Source")
+    full = preproc._gender_validator(df, ["col"], "Source")
+    assert full==["col"]
+    # Proportion is near the threshold so full table is validated
+    assert std._Standardizer__validate(preproc._gender_validator, ["col"], ["Source"])==full
+
+
+def test_sampled_validation_time(monkeypatch):
+    monkeypatch.setattr(preproc, "_id_sample_size", 100)
+    # Proportion of times in the date column that are not on the hour is near the threshold
+    date = pd.Series(pd.to_datetime(["2023-01-01 05:15"]*410 + ["2023-01-01 05:00"]*590))
+    df = pd.DataFrame({"time":["12:30"]*1000})
+    std = preproc.Standardizer(df, TableType.STOPS, 2023, source_name="Source")
+    full = datetime_parser.validate_time(df, ["time"], date)
+    assert full==[]
+    assert std._Standardizer__validate(datetime_parser.validate_time, ["time"], [date])==full
+
+
+def test_unique_rows_reset():
+    std = preproc.Standardizer(pd.DataFrame({"col":[1,1,2]}), TableType.STOPS, 2023)
+    assert std._Standardizer__get_unique_rows("col").tolist()==[0,2]
+    std.df = pd.DataFrame({"col":[1,2,3]})
+    assert std._Standardizer__get_unique_rows("col").tolist()==[0,1,2]
+
+
 @pytest.mark.parametrize("col", [Column.DATE, Column.TIME, Column.DATETIME,
                                  Column.RACE_ETHNICITY_SUBJECT, Column.ETHNICITY_SUBJECT,
                                  Column.RACE_SUBJECT, Column.RE_GROUP_SUBJECT, Column.AGE_SUBJECT,
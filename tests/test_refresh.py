@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from openpolicedata import data
+
+_source = pd.Series({'State':'Virginia', 'SourceName':'A', 'Agency':'A', 'TableType':'STOPS', 'Year':'MULTIPLE',
+                     'URL':'https://a.com', 'DataType':'CSV', 'date_field':'date'})
+
+def _fake_source(monkeypatch, saved, new, date='MULTIPLE'):
+    src = object.__new__(data.Source)
+    requested = []
+    def load_parquet(table_type, date_in, output_dir=None, agency=None, **kwargs):
+        return data.Table(_source, saved.copy(), year_filter=date)
+    def load(table_type, date_in, **kwargs):
+        requested.append(date_in)
+        if isinstance(date_in[0], str):
+            start = pd.Timestamp(date_in[0])
+            start = start.tz_localize(new['date'].dt.tz) if new['date'].dt.tz else start
+            df = new[new['date']>=start]
+        else:
+            df = new[new['date']>=date_in[0]]
+        return data.Table(_source, df.reset_index(drop=True), year_filter=date_in)
+    monkeypatch.setattr(src, "load_parquet", load_parquet, raising=False)
+    monkeypatch.setattr(src, "load", load, raising=False)
+    return src, requested
+
+
+@pytest.mark.parametrize('tz', [None, 'America/New_York'])
+def test_refresh(monkeypatch, tz):
+    dates = pd.to_datetime(['2023-01-01 10:00', '2023-03-01 10:00', '2023-05-01 10:00']).tz_localize(tz)
+    saved = pd.DataFrame({'date':dates, 'value':[1,2,3]})
+    new_dates = pd.to_datetime(['2023-05-01 10:00', '2023-06-01 10:00']).tz_localize(tz)
+    new = pd.DataFrame({'date':new_dates, 'value':[30,4]})
+    src, requested = _fake_source(monkeypatch, saved, new)
+
+    table = src.refresh('STOPS', 'MULTIPLE', save=False, pbar=False)
+    assert requested[0][0]=='2023-05-01'
+    # Saved records on or after since are replaced
+    pd.testing.assert_frame_equal(table.table, pd.concat([saved.iloc[:2], new], ignore_index=True))
+
+
+@pytest.mark.parametrize('tz', [None, 'America/New_York'])
+def test_refresh_since(monkeypatch, tz):
+    dates = pd.to_datetime(['2023-01-01 10:00', '2023-03-01 10:00', '2023-05-01 10:00']).tz_localize(tz)
+    saved = pd.DataFrame({'date':dates, 'value':[1,2,3]})
+    new = pd.DataFrame({'date':dates[1:], 'value':[20,30]})
+    src, requested = _fake_source(monkeypatch, saved, new)
+
+    table = src.refresh('STOPS', 'MULTIPLE', since='2023-02-15', save=False, pbar=False)
+    assert requested[0][0]=='2023-02-15'
+    pd.testing.assert_frame_equal(table.table, pd.concat([saved.iloc[:1], new], ignore_index=True))
+
+
+@pytest.mark.parametrize('tz', [None, 'America/New_York'])
+def test_refresh_since_after_saved(monkeypatch, tz):
+    dates = pd.to_datetime(['2023-01-01 10:00', '2023-03-01 10:00']).tz_localize(tz)
+    saved = pd.DataFrame({'date':dates, 'value':[1,2]})
+    src, requested = _fake_source(monkeypatch, saved, saved, date=[2023, '2023-03-31'])
+
+    table = src.refresh('STOPS', [2023, '2023-03-31'], since='2023-05-01', save=False, pbar=False)
+    assert len(requested)==0
+    pd.testing.assert_frame_equal(table.table, saved)
+
+
+@pytest.mark.parametrize('since', [None, 2022, '2022-05-01'])
+def test_refresh_year(monkeypatch, since):
+    saved = pd.DataFrame({'date':[2020, 2021, 2022], 'value':[1,2,3]})
+    new = pd.DataFrame({'date':[2022, 2023], 'value':[30,4]})
+    src, requested = _fake_source(monkeypatch, saved, new)
+
+    table = src.refresh('STOPS', 'MULTIPLE', since=since, save=False, pbar=False)
+    assert requested[0]==[2022, max(pd.Timestamp.now().year, 2022)]
+    pd.testing.assert_frame_equal(table.table, pd.concat([saved.iloc[:2], new], ignore_index=True))
@@ -196,5 +196,43 @@ def test_writelines():
         with pytest.raises(httpio.HTTPIOError):
             io.writelines([line.encode('ascii') for line in ASCII_LINES])
 
+class _RangeResponse:
+    def __init__(self, content, headers=None):
+        self.content = content
+        self.headers = headers or {}
+    def raise_for_status(self):
+        pass
+
+class _RangeSession:
+    data = bytes(range(256))*40
+    requests = []
+    def head(self, url, **kwargs):
+        return _RangeResponse(b'', {'Content-Length':str(len(self.data)), 'Accept-Ranges':'bytes'})
+    def get(self, url, headers, **kwargs):
+        start, end = [int(x) for x in headers['Range'][6:].split('-')]
+        self.requests.append((start, end))
+        return _RangeResponse(self.data[start:end+1])
+    def close(self):
+        pass
+
+@pytest.mark.parametrize('kwargs', [{}, {'cache_size':3}, {'cache_size':3, 'prefetch':2, 'max_workers':3}])
+def test_cache_and_prefetch(monkeypatch, kwargs):
+    monkeypatch.setattr(httpio.requests, "Session", _RangeSession)
+    _RangeSession.requests = []
+    data = _RangeSession.data
+    with HTTPIOFile(test_url, 1024, **kwargs) as io:
+        assert io.read(3000)==data[:3000]
+        io.seek(5000)
+        assert io.read(1000)==data[5000:6000]
+        io.seek(0)
+        assert io.read()==data
+        assert len(io._cache)<=kwargs.get('cache_size', httpio.default_cache_size)
+        if 'prefetch' in kwargs:
+            # Sectors following each read were requested ahead of time
+            assert (6144, 7167) in _RangeSession.requests
+            # Large read is split into simultaneous requests
+            assert any(end-start+1<len(data)-1024 for start, end in _RangeSession.requests if start==0)
+
+
 def test_httpio():
-    raise NotImplementedError()
\ No newline at end of file
+    raise NotImplementedError()